@@ -0,0 +1,208 @@
+"""
+Headless readability report over many files, without starting the TUI.
+
+    python batch.py docs/ "corpus/**/*.txt" --workers 8 --format csv --wpm 250
+
+Without --wpm, reading time comes from the reading speed profile the TUI keeps
+(the speed at each file's ARI), or from an average reader before any calibration.
+
+Directories and glob patterns only yield likely-text files and skip what the
+reading tab's browser skips (.git, node_modules, build output...); files named
+explicitly are always analyzed, an error row if they can't be.
+
+Every file is written out as soon as it has been analyzed, one JSON object per line
+(or one CSV row), so the output can be piped or tailed while a large run is going.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Iterator, Optional
+
+from widgets import compressed
+from widgets.analysis import SentenceReservoir, StreamingAnalyzer, scan_file
+from widgets.analysis_cache import AnalysisCache
+from widgets.file_browser import SKIPPED_DIRECTORIES, is_text_file
+from widgets.parallel import available_cpus
+from widgets.reading_speed import DEFAULT_WPM, ReadingSpeedProfile
+
+FIELDS = [
+    "path", "words", "sentences", "ari", "coleman_liau", "flesch_reading_ease",
+    "flesch_kincaid", "smog", "wpm", "minutes", "error",
+]
+
+# One cache per worker process
+_cache: Optional[AnalysisCache] = None
+
+
+def _walk(directory: str) -> Iterator[str]:
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if name not in SKIPPED_DIRECTORIES)
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if is_text_file(path, name):
+                yield path
+
+
+def _glob(pattern: str) -> Iterator[str]:
+    # Only the directories the pattern matched are checked, "build/**/*.md" still finds files
+    parts = (pattern.replace(os.altsep, os.sep) if os.altsep else pattern).split(os.sep)
+    fixed = next(index for index, part in enumerate(parts) if glob.has_magic(part))
+    base = os.sep.join(parts[:fixed]) or os.curdir
+    for path in glob.iglob(pattern, recursive=True):
+        directory, name = os.path.split(os.path.relpath(path, base))
+        if os.path.isdir(path) or any(part in SKIPPED_DIRECTORIES for part in directory.split(os.sep)):
+            continue
+        if is_text_file(path, name):
+            yield path
+
+
+def iter_files(targets: list[str]) -> Iterator[str]:
+    """
+    Yields files from paths, directories (walked recursively) and glob patterns.
+    Files found in directories or by patterns are filtered like the reading tab's
+    browser does, paths given as they are always come out.
+    """
+    seen = set()
+    for target in targets:
+        if os.path.isdir(target):
+            matches = _walk(target)
+        elif glob.has_magic(target):
+            matches = _glob(target)
+        else:
+            matches = [target]
+        for path in matches:
+            if path not in seen and not os.path.isdir(path):
+                seen.add(path)
+                yield path
+
+
+def analyze(path: str, use_cache: bool) -> dict:
+    """Runs in a worker process: analyzes one file into an output row."""
+    global _cache
+    row = dict.fromkeys(FIELDS)
+    row["path"] = path
+    try:
+        if use_cache and _cache is None:
+            _cache = AnalysisCache()
+        result = _cache.get(path) if use_cache else None
+        if result is None:
+            # With the sentence sample, the TUI calibrates from the same cache entry
+            result = scan_file(path, StreamingAnalyzer(reservoir=SentenceReservoir())).result()
+            if use_cache:
+                _cache.put(path, result)
+    except (OSError, UnicodeDecodeError, *compressed.ERRORS) as e:
+        row["error"] = str(e)
+        return row
+
+    row["words"] = result.word_count
+    row["sentences"] = result.sentence_count
+    row["ari"] = round(result.ari, 2)
+    for metric in ("coleman_liau", "flesch_reading_ease", "flesch_kincaid", "smog"):
+        row[metric] = round(getattr(result, metric), 2)
+    return row
+
+
+def add_reading_time(row: dict, reading_speed: Callable[[float], float]) -> None:
+    """Fills in the speed and time to read, in the main process which has the profile."""
+    if row["error"] is None:
+        wpm = reading_speed(row["ari"])
+        row["wpm"] = round(wpm, 1)
+        row["minutes"] = round(row["words"] / wpm, 2)
+
+
+class RowWriter:
+    def __init__(self, output, output_format: str):
+        self.output = output
+        self.output_format = output_format
+        if output_format == "csv":
+            self.csv = csv.DictWriter(output, fieldnames=FIELDS)
+            self.csv.writeheader()
+
+    def write(self, row: dict) -> None:
+        if self.output_format == "csv":
+            self.csv.writerow(row)
+        else:
+            self.output.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.output.flush()
+
+
+def profile_speed(profile: ReadingSpeedProfile) -> Callable[[float], float]:
+    def reading_speed(ari: float) -> float:
+        estimate = profile.estimate(ari)
+        return estimate.wpm if estimate is not None else DEFAULT_WPM
+    return reading_speed
+
+
+def run(
+    targets: list[str],
+    output,
+    output_format: str,
+    reading_speed: Callable[[float], float],
+    workers: int,
+    use_cache: bool,
+) -> int:
+    """Analyzes all files, returns the number of files that failed."""
+    writer = RowWriter(output, output_format)
+    failures = 0
+    files = iter_files(targets)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Only keep a few files per worker in flight, the file list can be huge
+        pending = set()
+        for path in files:
+            pending.add(pool.submit(analyze, path, use_cache))
+            if len(pending) < workers * 4:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                row = future.result()
+                add_reading_time(row, reading_speed)
+                failures += row["error"] is not None
+                writer.write(row)
+        for future in wait(pending).done:
+            row = future.result()
+            add_reading_time(row, reading_speed)
+            failures += row["error"] is not None
+            writer.write(row)
+    return failures
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Readability (ARI) and reading time report for text files.")
+    parser.add_argument("targets", nargs="+", help="files, directories or glob patterns")
+    parser.add_argument("--workers", type=int, default=available_cpus(), help="worker processes (default: CPUs)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="output format")
+    parser.add_argument(
+        "--wpm", type=float,
+        help=f"reading speed for the time estimate (default: the profile, or {DEFAULT_WPM:.0f})",
+    )
+    parser.add_argument("--output", "-o", help="write to this file instead of stdout")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write the analysis cache")
+    args = parser.parse_args(argv)
+
+    if args.wpm is not None and args.wpm <= 0:
+        parser.error("--wpm has to be positive")
+    if args.workers < 1:
+        parser.error("--workers has to be at least 1")
+
+    if args.wpm is not None:
+        reading_speed = lambda ari: args.wpm
+    else:
+        reading_speed = profile_speed(ReadingSpeedProfile.from_environment())
+
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        failures = run(args.targets, output, args.format, reading_speed, args.workers, not args.no_cache)
+    finally:
+        if args.output:
+            output.close()
+    if failures:
+        print(f"{failures} file(s) could not be analyzed", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Benchmarks for the text analyzer, the calculator, its numeric backends and the timers.
+
+    python -m benchmarks.bench                          # default sizes, print a table
+    python -m benchmarks.bench --sizes 1KB 1MB 1GB      # pick corpus sizes
+    python -m benchmarks.bench --save baseline.json     # store results as the baseline
+    python -m benchmarks.bench --compare baseline.json  # fail on regressions
+    python -m benchmarks.bench --only startup --files 200000  # time to first paint
+
+Every benchmark reports ops/s (and MB/s where it reads text) plus the peak Python
+memory of a separate tracemalloc run, so the timing runs are not slowed down by it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+from widgets.analysis import SentenceReservoir, StreamingAnalyzer, scan_file
+from widgets.expression import compile_expression, evaluate_many
+from widgets.numeric import DECIMAL, FLOAT, FRACTION, DecimalBackend
+
+from .corpus import KINDS, SIZES, big_directory, corpus_file
+
+DEFAULT_SIZES = ["1KB", "1MB", "16MB"]
+# Benchmarks shorter than this are repeated until they take at least this long
+MIN_BENCH_SECONDS = 0.5
+# Relative slowdown allowed against the baseline before it counts as a regression
+DEFAULT_TOLERANCE = 0.2
+
+MB = 1024 * 1024
+
+
+def measure(run: Callable[[], int], min_seconds: float = MIN_BENCH_SECONDS) -> tuple[float, int]:
+    """Repeats run() until min_seconds passed, returns (seconds per call, ops per call)."""
+    calls = 0
+    ops = 0
+    started = time.perf_counter()
+    while True:
+        ops = run()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return elapsed / calls, ops
+
+
+def peak_memory(run: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_analysis(corpus_dir: Path, sizes: list[str], kinds: list[str]) -> dict:
+    results = {}
+    for size_name in sizes:
+        for kind in kinds:
+            path = corpus_file(corpus_dir, kind, size_name)
+            size = path.stat().st_size
+            for sampled in (False, True):
+                def run() -> int:
+                    reservoir = SentenceReservoir(seed=1) if sampled else None
+                    scan_file(str(path), StreamingAnalyzer(reservoir))
+                    return 1
+
+                seconds, _ = measure(run)
+                name = f"analysis/{kind}/{size_name}" + ("/sampled" if sampled else "")
+                results[name] = {
+                    "ops_per_s": 1 / seconds,
+                    "mb_per_s": size / MB / seconds,
+                    "peak_bytes": peak_memory(run),
+                }
+                print_result(name, results[name])
+    return results
+
+
+def bench_numeric(operations: int) -> dict:
+    """
+    The calculator's batch evaluation path (evaluate_many, evaluate_bindings) with
+    every numeric backend, plus each backend's speed relative to default Decimal.
+    """
+    sources = [f"({i} + {i % 7 + 1}.5) * {i % 13 + 2} / {i % 11 + 3} - {i % 5}^2" for i in range(operations)]
+    program = compile_expression("(x + y) * 3 / (y + 7) - x / 2")
+    bindings = [{"x": Decimal(i), "y": Decimal(i % 17) / 4} for i in range(operations)]
+    # Parse once, the benchmark is about the arithmetic
+    evaluate_many(sources)
+
+    results = {}
+    for backend in (DECIMAL, DecimalBackend(100), FLOAT, FRACTION):
+        name = backend.tag
+        for group, run in (
+            ("evaluate_many", lambda: len(evaluate_many(sources, backend=backend))),
+            ("evaluate_bindings", lambda: len(program.evaluate_bindings(bindings, backend))),
+        ):
+            seconds, ops = measure(run)
+            results[f"numeric/{group}/{name}"] = {"ops_per_s": ops / seconds, "peak_bytes": peak_memory(run)}
+            print_result(f"numeric/{group}/{name}", results[f"numeric/{group}/{name}"])
+    for group in ("evaluate_many", "evaluate_bindings"):
+        default = results[f"numeric/{group}/decimal"]["ops_per_s"]
+        print(f"{group:<45} " + "  ".join(
+            f"{name.split('/')[-1]} {result['ops_per_s'] / default:.2f}x"
+            for name, result in results.items() if name.startswith(f"numeric/{group}/")
+        ), flush=True)
+    return results
+
+
+@contextmanager
+def without_environment(*names: str) -> Iterator[None]:
+    """Unsets the environment variables for the duration of the block."""
+    saved = {name: os.environ.pop(name) for name in names if name in os.environ}
+    try:
+        yield
+    finally:
+        os.environ.update(saved)
+
+
+async def bench_app(operations: int) -> dict:
+    """Calculator and timer benchmarks, these need a running (headless) app."""
+    from main import MultifunctionApp
+    from widgets.calculator import REPLAY_ENV, Calculator
+    from widgets.history_db import HISTORY_DB_ENV
+    from widgets.stopwatch import Stopwatch
+
+    results = {}
+    # history_append would write thousands of rows into the user's persisted history,
+    # and a replay started on mount would run alongside every timing
+    with without_environment(HISTORY_DB_ENV, REPLAY_ENV):
+        app = MultifunctionApp()
+        async with app.run_test(headless=True) as pilot:
+            calculator = app.query_one(Calculator)
+
+            operators = ["plus", "multiply", "minus", "divide"]
+
+            def do_math() -> int:
+                app.clear_history()
+                calculator.left = Decimal(0)
+                for i in range(operations):
+                    calculator.operator = operators[i % 4]
+                    calculator.right = Decimal(i % 97 + 1) / 7
+                    calculator._do_math()
+                return operations
+
+            keys = "".join(f"{i % 97 + 1}{'+-*/'[i % 4]}" for i in range(operations)) + "="
+
+            def replay() -> int:
+                app.clear_history()
+                return calculator.replay(keys)
+
+            def history_append() -> int:
+                app.clear_history()
+                for i in range(operations):
+                    app.add_calculation(Decimal(i), "plus", Decimal(1), Decimal(i + 1))
+                return operations
+
+            # Tabs are mounted when they are first opened
+            app.query_one("TabbedContent").active = "timer"
+            await pilot.pause()
+            stopwatch = app.query(Stopwatch).first()
+
+            def stopwatch_tick() -> int:
+                for _ in range(operations):
+                    stopwatch.update_time()
+                return operations
+
+            for name, run in (
+                ("calculator/do_math", do_math),
+                ("calculator/replay", replay),
+                ("calculator/history_append", history_append),
+                ("timers/stopwatch_tick", stopwatch_tick),
+            ):
+                seconds, ops = measure(run)
+                results[name] = {"ops_per_s": ops / seconds, "peak_bytes": peak_memory(run)}
+                print_result(name, results[name])
+            app.clear_history()
+    return results
+
+
+STARTUP_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from main import MultifunctionApp
+
+async def report(pilot):
+    while pilot.app.first_paint is None:
+        await pilot.pause(0.01)
+    print(pilot.app.first_paint, flush=True)
+    pilot.app.exit()
+
+MultifunctionApp().run(headless=True, auto_pilot=report)
+"""
+
+
+def bench_startup(corpus_dir: Path, files: int, runs: int) -> dict:
+    """
+    Time to first paint of a fresh process started in a directory of `files` files,
+    measured by main.py itself from its first line.
+    """
+    directory = big_directory(corpus_dir, files)
+    repository = str(Path(__file__).resolve().parent.parent)
+    # Persistence and profiling settings of the user don't belong in the measurement
+    env = {key: value for key, value in os.environ.items() if not key.startswith("KALKULATOR_")}
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT, repository],
+            cwd=directory, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        process_seconds = time.perf_counter() - started
+        timings.append(float(output.split()[-1]))
+    seconds = sorted(timings)[len(timings) // 2]
+    name = f"startup/first_paint/{files}_files"
+    results = {name: {"ops_per_s": 1 / seconds, "first_paint_ms": seconds * 1000, "peak_bytes": 0}}
+    print_result(name, results[name])
+    print(f"{'':<45} {seconds * 1000:>14,.1f} ms to first paint (median of {runs}),"
+          f" {process_seconds:,.2f} s for the last whole process", flush=True)
+    return results
+
+
+def print_result(name: str, result: dict) -> None:
+    line = f"{name:<45} {result['ops_per_s']:>14,.1f} ops/s"
+    if "mb_per_s" in result:
+        line += f" {result['mb_per_s']:>10,.1f} MB/s"
+    line += f" {result['peak_bytes'] / MB:>10,.2f} MB peak"
+    print(line, flush=True)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Names and numbers of benchmarks that got slower than the baseline allows."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = result["ops_per_s"] / before["ops_per_s"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{name}: {ratio - 1:+.1%} ops/s")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=DEFAULT_SIZES)
+    parser.add_argument("--kinds", nargs="+", choices=list(KINDS), default=list(KINDS))
+    parser.add_argument("--operations", type=int, default=1000, help="calculator/timer operations per run")
+    parser.add_argument("--corpus-dir", type=Path, default=Path(tempfile.gettempdir()) / "kalkulator-bench")
+    parser.add_argument("--files", type=int, default=100_000, help="files in the start-up working directory")
+    parser.add_argument("--runs", type=int, default=5, help="start-up measurements, the median is reported")
+    parser.add_argument("--only", choices=["analysis", "app", "numeric", "startup"], help="run only one group")
+    parser.add_argument("--save", type=Path, help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.only in (None, "analysis"):
+        results.update(bench_analysis(args.corpus_dir, args.sizes, args.kinds))
+    if args.only in (None, "app"):
+        results.update(asyncio.run(bench_app(args.operations)))
+    if args.only in (None, "numeric"):
+        results.update(bench_numeric(args.operations))
+    if args.only in (None, "startup"):
+        results.update(bench_startup(args.corpus_dir, args.files, args.runs))
+
+    if args.save:
+        report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+        args.save.write_text(json.dumps(report, indent=2))
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
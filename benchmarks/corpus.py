@@ -0,0 +1,128 @@
+"""
+Deterministic synthetic text files for the benchmarks.
+Files are generated once per (kind, size) into the corpus directory and reused.
+"""
+import os
+import random
+from pathlib import Path
+
+WORDS = (
+    "the of and to a in that is was he for it with as his on be at by had "
+    "not are but from or have an they which one you were her all she there would "
+    "their we him been has when who will more no if out so said what up its about "
+    "into than them can only other new some could time these two may then do first "
+    "any my now such like our over man me even most made after also did many before "
+    "must through back years where much your way well down should because each just "
+    "those people how too little state good very make world still own see men work "
+    "long get here between both life being under never day same another know while "
+    "last might us great old year off come since against go came right used take "
+    "elizabeth darcy bennet bingley netherfield pemberley longbourn wickham collins "
+    "extraordinarily incomprehensible acknowledgement circumstances disinterestedness"
+).split()
+UNICODE_WORDS = "zażółć gęślą jaźń łódź źdźbło über naïve café façade 東京 данные".split()
+
+# One block of text is generated and repeated up to the wanted size
+BLOCK_SIZE = 1024 * 1024
+
+SIZES = {
+    "1KB": 1024,
+    "1MB": 1024 * 1024,
+    "16MB": 16 * 1024 * 1024,
+    "128MB": 128 * 1024 * 1024,
+    "1GB": 1024 * 1024 * 1024,
+}
+
+
+def prose(rng: random.Random, size: int) -> str:
+    """Sentences of 3-40 words ending in . ! or ?, with paragraphs."""
+    parts = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40)))
+        sentence = sentence.capitalize() + rng.choice(".....!?") + rng.choice("   \n")
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)
+
+
+def no_punctuation(rng: random.Random, size: int) -> str:
+    """Words and newlines only: the whole file is a single sentence."""
+    return prose(rng, size).translate(str.maketrans(".!?", "   "))
+
+
+def single_line(rng: random.Random, size: int) -> str:
+    """Normal sentences, but no newline anywhere."""
+    return prose(rng, size).replace("\n", " ")
+
+
+def unicode_heavy(rng: random.Random, size: int) -> str:
+    """Mostly non-ASCII words, forces the slow (non-ASCII) code paths."""
+    parts = []
+    length = 0
+    while length < size:
+        words = [rng.choice(UNICODE_WORDS + WORDS[:20]) for _ in range(rng.randint(3, 25))]
+        sentence = " ".join(words) + rng.choice(".!?") + " "
+        parts.append(sentence)
+        length += len(sentence.encode("utf-8"))
+    return "".join(parts)
+
+
+def punctuation_storm(rng: random.Random, size: int) -> str:
+    """Very short sentences and runs of terminators."""
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(WORDS) + rng.choice([".", "!", "?", "...", "?!", ". . ."]) + " "
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)
+
+
+KINDS = {
+    "prose": prose,
+    "no_punctuation": no_punctuation,
+    "single_line": single_line,
+    "unicode": unicode_heavy,
+    "punctuation": punctuation_storm,
+}
+
+
+def corpus_file(directory: Path, kind: str, size_name: str, seed: int = 1342) -> Path:
+    """Path of the corpus file, generating it first if it doesn't exist yet."""
+    size = SIZES[size_name]
+    path = Path(directory) / f"{kind}-{size_name}.txt"
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(f"{seed}-{kind}")
+    block = KINDS[kind](rng, min(size, BLOCK_SIZE)).encode("utf-8")
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        written = 0
+        while written < size:
+            data = block[:size - written]
+            # Don't cut a UTF-8 character in half at the end of the file
+            data = data.decode("utf-8", errors="ignore").encode("utf-8")
+            f.write(data)
+            written += len(data)
+            if not data:
+                break
+    os.replace(tmp_path, path)
+    return path
+
+
+def big_directory(directory: Path, files: int, per_folder: int = 1000) -> Path:
+    """A tree of `files` small text files, for start-up from a huge working directory."""
+    path = Path(directory) / f"tree-{files}"
+    done = path / ".complete"
+    if done.exists():
+        return path
+
+    for number in range(files):
+        folder = path / f"folder-{number // per_folder:04}"
+        if number % per_folder == 0:
+            folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"file-{number:07}.txt").write_text("Just a few words.\n")
+    done.touch()
+    return path
@@ -0,0 +1,445 @@
+"""
+Load and soak test of the whole app, driven headlessly through Textual's pilot.
+
+    python -m benchmarks.soak                                   # 60 s, every scenario
+    python -m benchmarks.soak --duration 3600 --operations 1000000 --rate 2000
+    python -m benchmarks.soak --scenarios calculator timers --budget rss_growth_mb=20
+    python -m benchmarks.soak --save soak.json                  # samples over time as JSON
+
+The scenarios run side by side in one app while the visible tab keeps changing:
+
+    calculator  --operations key presses with the watchers on, plus typed expressions,
+                --rate operations a second (0: as fast as the event loop allows)
+    timers      every stopwatch running and --countdowns countdowns restarted as they expire
+    reading     corpus files selected one after another, through the calibration modal
+
+Recorded: render time of every frame, event loop lag, how late countdowns expire
+and how stale running stopwatches are, and RSS and history size over time. Each
+budget that is exceeded is printed and makes the exit code 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+from itertools import cycle
+from pathlib import Path
+from time import monotonic, perf_counter
+
+from textual.screen import ModalScreen, Screen
+
+from widgets.history_store import DEFAULT_CAPACITY
+from widgets.instrumentation import Histogram
+from widgets.reading_speed import SPEED_ENV
+
+from .corpus import KINDS, corpus_file
+
+SCENARIOS = ["calculator", "timers", "reading"]
+# Limits checked at the end, all can be changed with --budget NAME=VALUE
+DEFAULT_BUDGETS = {
+    "frame_p99_ms": 100.0,
+    "lag_p99_ms": 250.0,
+    "lag_max_ms": 1000.0,
+    "queue_p99_ms": 250.0,
+    "drift_p99_ms": 100.0,
+    "stale_p99_ms": 250.0,
+    "rss_growth_mb": 50.0,
+    "history_entries": DEFAULT_CAPACITY,
+}
+# Seconds between event loop lag probes
+LAG_INTERVAL = 0.05
+# Seconds between RSS and history samples, and between progress lines
+SAMPLE_INTERVAL = 1.0
+REPORT_INTERVAL = 10.0
+# Seconds each tab stays visible
+TAB_INTERVAL = 3.0
+# Calculator operations a second, far more than anyone types
+DEFAULT_RATE = 200.0
+# Calculator operations between yields to the event loop
+OPERATIONS_PER_YIELD = 10
+# Countdown lengths in seconds
+COUNTDOWN_SECONDS = (1, 2, 3, 5)
+READING_SIZES = ["1KB", "1MB"]
+# Seconds the calibration modal stays up
+CALIBRATION_SECONDS = 0.2
+# Seconds from a file's results to selecting the next file
+RESULTS_SECONDS = 1.0
+
+MB = 1024 * 1024
+
+
+def rss_bytes() -> int:
+    """Current resident set size, the peak where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Soak:
+    """Measurements shared by the scenarios of one run."""
+
+    def __init__(self, duration: float, warmup: float):
+        self.duration = duration
+        self.warmup = warmup
+        self.start()
+
+    def start(self) -> None:
+        """Starts the clock and drops what was measured so far, e.g. while setting up."""
+        self.started = monotonic()
+        self.deadline = self.started + self.duration
+        self.warmup_until = self.started + self.warmup
+        self.frames = Histogram()
+        self.lag = Histogram()
+        self.queue = Histogram()
+        self.drift = Histogram()
+        self.stale = Histogram()
+        # (seconds since start, rss bytes, history entries)
+        self.samples: list[tuple[float, int, int]] = []
+        self.baseline_rss = rss_bytes()
+        self.counts = {"calculations": 0, "keys": 0, "countdowns": 0, "files": 0}
+
+    @property
+    def running(self) -> bool:
+        return monotonic() < self.deadline
+
+    def measure_frames(self) -> None:
+        """
+        Times every screen update (layout, compositor, output) until restore_frames().
+        Screens bind the method when they are created, so call it before the app starts.
+        """
+        self._on_timer_update = Screen._on_timer_update
+
+        def on_timer_update(screen: Screen) -> None:
+            started = perf_counter()
+            try:
+                self._on_timer_update(screen)
+            finally:
+                self.frames.record(perf_counter() - started)
+
+        Screen._on_timer_update = on_timer_update
+
+    def restore_frames(self) -> None:
+        Screen._on_timer_update = self._on_timer_update
+
+    def rss_growth(self) -> int:
+        after_warmup = [rss for elapsed, rss, _ in self.samples if elapsed >= self.warmup_until - self.started]
+        return after_warmup[-1] - self.baseline_rss if after_warmup else 0
+
+    def summary(self) -> dict:
+        return {
+            "frame": self.frames.summary(),
+            "lag": self.lag.summary(),
+            "queue": self.queue.summary(),
+            "drift": self.drift.summary(),
+            "stale": self.stale.summary(),
+            "rss_growth_bytes": self.rss_growth(),
+            "max_history_entries": max((entries for *_, entries in self.samples), default=0),
+            "counts": self.counts,
+        }
+
+    def measured(self) -> dict:
+        """The values the budgets are checked against."""
+        return {
+            "frame_p99_ms": self.frames.percentile(99) * 1000,
+            "lag_p99_ms": self.lag.percentile(99) * 1000,
+            "lag_max_ms": self.lag.maximum / 1e6,
+            "queue_p99_ms": self.queue.percentile(99) * 1000,
+            "drift_p99_ms": self.drift.percentile(99) * 1000,
+            "stale_p99_ms": self.stale.percentile(99) * 1000,
+            "rss_growth_mb": self.rss_growth() / MB,
+            "history_entries": max((entries for *_, entries in self.samples), default=0),
+        }
+
+
+async def probe_lag(soak: Soak, app) -> None:
+    """
+    Sleeps LAG_INTERVAL at a time, anything beyond that is time the loop was busy.
+    A callback queued on the app at the same time measures how long its message
+    queue takes to get to it.
+    """
+    while soak.running:
+        started = perf_counter()
+        app.call_later(lambda queued=started: soak.queue.record(perf_counter() - queued))
+        await asyncio.sleep(LAG_INTERVAL)
+        soak.lag.record(max(0.0, perf_counter() - started - LAG_INTERVAL))
+
+
+async def sample(soak: Soak, app) -> None:
+    last_report = monotonic()
+    while soak.running:
+        await asyncio.sleep(SAMPLE_INTERVAL)
+        now = monotonic()
+        if now < soak.warmup_until:
+            soak.baseline_rss = rss_bytes()
+        soak.samples.append((now - soak.started, rss_bytes(), len(app.calc_history)))
+        if now - last_report >= REPORT_INTERVAL:
+            last_report = now
+            measured = soak.measured()
+            print(
+                f"{now - soak.started:>7,.0f} s"
+                f"  frame p99 {measured['frame_p99_ms']:>6.1f} ms"
+                f"  lag p99 {measured['lag_p99_ms']:>6.1f} ms"
+                f"  queue p99 {measured['queue_p99_ms']:>6.1f} ms"
+                f"  drift p99 {measured['drift_p99_ms']:>6.1f} ms"
+                f"  rss {soak.samples[-1][1] / MB:>7.1f} MB"
+                f"  history {soak.samples[-1][2]:,}"
+                f"  {', '.join(f'{name} {count:,}' for name, count in soak.counts.items())}",
+                flush=True,
+            )
+
+
+async def rotate_tabs(soak: Soak, app, tab_ids: list[str]) -> None:
+    tabs = app.query_one("TabbedContent")
+    for tab_id in cycle(tab_ids):
+        if not soak.running:
+            return
+        # The calibration modal covers the tabs, switching under it changes nothing visible
+        tabs.active = tab_id
+        await asyncio.sleep(TAB_INTERVAL)
+
+
+async def run_calculator(soak: Soak, app, operations: int, rate: float) -> None:
+    """
+    Digits and operators through the calculator's state machine, an expression every
+    100 operations, `rate` operations a second. Unpaced, the operations take all of
+    the event loop and the lag measured is the load generator's own.
+    """
+    from textual.widgets import Input
+
+    from widgets.calculator import Calculator
+
+    calculator = app.query_one(Calculator)
+    expression = calculator.query_one("#expression", Input)
+    rng = random.Random(1342)
+    operators = ["plus", "minus", "multiply", "divide"]
+    done = 0
+    # When the next batch of operations is due
+    due = monotonic()
+    while done < operations and soak.running:
+        if isinstance(app.screen, ModalScreen):
+            # Nobody can type into the calculator while the calibration modal is up,
+            # nor catches up afterwards
+            await asyncio.sleep(0.05)
+            due = monotonic()
+            continue
+        for _ in range(OPERATIONS_PER_YIELD):
+            number = str(rng.randint(1, 999))
+            for digit in number:
+                calculator.press_key(f"number-{digit}")
+            calculator.press_key(rng.choice(operators))
+            soak.counts["keys"] += len(number) + 1
+            done += 1
+            if done % 100 == 0:
+                expression.value = f"({rng.randint(1, 99)} + {rng.randint(1, 99)}) * {rng.randint(1, 9)} / 7"
+                await expression.action_submit()
+            if done % 1000 == 0:
+                # Keeps the numbers from growing into the precision limit
+                calculator.press_key("equals")
+                calculator.press_key("clear")
+        soak.counts["calculations"] = done
+        if rate:
+            due += OPERATIONS_PER_YIELD / rate
+        await asyncio.sleep(max(0.0, due - monotonic()))
+
+
+async def run_timers(soak: Soak, app, countdowns: int) -> None:
+    """Starts every stopwatch and keeps `countdowns` countdowns running, measuring how late they end."""
+    from textual.widgets import Button
+
+    from widgets.stopwatch import Stopwatch, StopwatchContainer
+    from widgets.timer import CountdownTimer, CountdownTimerContainer
+
+    stopwatches = list(app.query_one(StopwatchContainer).query(Stopwatch))
+    for stopwatch in stopwatches:
+        stopwatch.query_one("#timer-start", Button).press()
+
+    container = app.query_one(CountdownTimerContainer)
+    for _ in range(countdowns - len(container.query(CountdownTimer))):
+        container.add_timer()
+    timers = list(container.query(CountdownTimer))
+    while not all(timer.is_mounted for timer in timers):
+        await asyncio.sleep(0.05)
+    rng = random.Random(1342)
+
+    def start(timer: CountdownTimer) -> None:
+        timer.time_remaining = float(rng.choice(COUNTDOWN_SECONDS))
+        timer.start()
+
+    def measured_expire(timer: CountdownTimer):
+        expire = timer.expire
+
+        def wrapper() -> None:
+            soak.drift.record(max(0.0, monotonic() - timer.deadline))
+            soak.counts["countdowns"] += 1
+            expire()
+            if soak.running:
+                start(timer)
+
+        return wrapper
+
+    for timer in timers:
+        # The scheduler keeps the bound method it was given, so patch it before starting
+        timer.expire = measured_expire(timer)
+        start(timer)
+
+    # Stopwatches on screen at the previous check, hidden ones are not ticked and
+    # one that was just shown may not have had its first tick yet
+    shown = set()
+    while soak.running:
+        await asyncio.sleep(SAMPLE_INTERVAL / 4)
+        now = monotonic()
+        for stopwatch in stopwatches:
+            if stopwatch.running and stopwatch.is_on_screen and app.screen.is_current:
+                if stopwatch in shown:
+                    soak.stale.record(now - stopwatch.start_time - stopwatch.time)
+                shown.add(stopwatch)
+            else:
+                shown.discard(stopwatch)
+    for stopwatch in stopwatches:
+        stopwatch.stop_timer()
+
+
+async def run_reading(soak: Soak, app, corpus_dir: Path) -> None:
+    """
+    Selects corpus files one after another, finishes each calibration after
+    CALIBRATION_SECONDS and looks at the results for RESULTS_SECONDS.
+    """
+    from textual.widgets import Button, Static
+
+    from widgets.reading import CalibrationScreen, FileOperator
+
+    files = [str(corpus_file(corpus_dir, kind, size)) for size in READING_SIZES for kind in KINDS]
+    operator = app.query_one(FileOperator)
+    report = operator.query_one("#analysis-results", Static)
+    for file_path in cycle(files):
+        if not soak.running:
+            return
+        operator.load_and_process_file(file_path)
+        pressed = None
+        while operator.wpm is None and soak.running:
+            screen = app.screen
+            if isinstance(screen, CalibrationScreen):
+                if screen is not pressed:
+                    # "Reading" the sample, the modal is also fully mounted by then
+                    await asyncio.sleep(CALIBRATION_SECONDS)
+                    screen.query_one("#btn-analyze", Button).press()
+                    pressed = screen
+            elif str(report.content).startswith("Analysis failed"):
+                # Too short to calibrate with, nothing more happens for this file
+                break
+            await asyncio.sleep(0.05)
+        soak.counts["files"] += 1
+        await asyncio.sleep(RESULTS_SECONDS)
+
+
+async def soak_app(args) -> Soak:
+    from main import MultifunctionApp
+
+    app = MultifunctionApp(history_db=str(args.history_db) if args.history_db else None)
+    soak = Soak(args.duration, args.warmup)
+    soak.measure_frames()
+    try:
+        return await run_scenarios(soak, app, args)
+    finally:
+        soak.restore_frames()
+
+
+async def run_scenarios(soak: Soak, app, args) -> Soak:
+    from main import TABS
+
+    tab_ids = [tab_id for tab_id in TABS if tab_id != "dev"]
+    async with app.run_test(headless=True, size=(120, 40)) as pilot:
+        # Every tab is mounted once before the clock starts
+        tabs = app.query_one("TabbedContent")
+        for tab_id in tab_ids:
+            tabs.active = tab_id
+            await pilot.pause()
+        tabs.active = "calculator"
+        await pilot.pause()
+
+        soak.start()
+        tasks = [probe_lag(soak, app), sample(soak, app), rotate_tabs(soak, app, tab_ids)]
+        if "calculator" in args.scenarios:
+            tasks.append(run_calculator(soak, app, args.operations, args.rate))
+        if "timers" in args.scenarios:
+            tasks.append(run_timers(soak, app, args.countdowns))
+        if "reading" in args.scenarios:
+            tasks.append(run_reading(soak, app, args.corpus_dir))
+        await asyncio.gather(*tasks)
+        while isinstance(app.screen, ModalScreen):
+            app.pop_screen()
+    return soak
+
+
+def check_budgets(measured: dict, budgets: dict) -> list[str]:
+    return [
+        f"{name}: {measured[name]:,.1f} > {limit:,.1f}"
+        for name, limit in budgets.items()
+        if measured[name] > limit
+    ]
+
+
+def parse_budget(text: str) -> tuple[str, float]:
+    name, _, value = text.partition("=")
+    if name not in DEFAULT_BUDGETS or not value:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE with NAME one of {', '.join(DEFAULT_BUDGETS)}")
+    return name, float(value)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to run for")
+    parser.add_argument("--warmup", type=float, default=10.0, help="seconds before the RSS baseline is taken")
+    parser.add_argument("--operations", type=int, default=100_000, help="calculator operations, at most")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="calculator operations a second, 0 for unpaced")
+    parser.add_argument("--countdowns", type=int, default=20)
+    parser.add_argument("--corpus-dir", type=Path, default=Path(tempfile.gettempdir()) / "kalkulator-bench")
+    parser.add_argument("--history-db", type=Path, help="persist the calculator history here during the run")
+    parser.add_argument("--budget", type=parse_budget, action="append", default=[], metavar="NAME=VALUE")
+    parser.add_argument("--save", type=Path, help="write the summary and samples as JSON")
+    args = parser.parse_args(argv)
+
+    # The user's history database, macros, reading speed profile and analysis cache
+    # don't belong in the run: everything the app keeps goes to a temporary directory
+    for name in ("KALKULATOR_HISTORY_DB", "KALKULATOR_REPLAY"):
+        os.environ.pop(name, None)
+    budgets = {**DEFAULT_BUDGETS, **dict(args.budget)}
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["XDG_CACHE_HOME"] = os.path.join(home, "cache")
+        os.environ["XDG_DATA_HOME"] = os.path.join(home, "data")
+        os.environ[SPEED_ENV] = os.path.join(home, "reading_speed.json")
+        soak = asyncio.run(soak_app(args))
+    measured = soak.measured()
+    for name, value in measured.items():
+        print(f"{name:<20} {value:>12,.1f}   budget {budgets[name]:,.1f}")
+
+    if args.save:
+        report = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "duration": args.duration,
+            "scenarios": args.scenarios,
+            "budgets": budgets,
+            "summary": soak.summary(),
+            "samples": [{"seconds": s, "rss_bytes": rss, "history_entries": n} for s, rss, n in soak.samples],
+        }
+        args.save.write_text(json.dumps(report, indent=2))
+
+    exceeded = check_budgets(measured, budgets)
+    for line in exceeded:
+        print(f"BUDGET EXCEEDED {line}", file=sys.stderr)
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,41 @@
-import datetime
+from time import perf_counter
+
+# Start of the time to first paint, taken before the heavier imports
+STARTED = perf_counter()
+
+import gc
+import importlib
+from typing import Optional
 
 from textual import on
 from textual.app import App, ComposeResult
+from textual.widget import Widget
 from textual.widgets import Header, Footer, TabbedContent, TabPane
 
-from widgets.calculator import Calculator
-from widgets.calculator_history import CalculatorHistory
-from widgets.stopwatch import StopwatchContainer
-from widgets.timer import CountdownTimer, CountdownTimerContainer
-from widgets.reading import ReadingPredictor
+from widgets.history_db import HistoryDatabase
+from widgets.history_index import HistoryIndex
+from widgets.history_store import DEFAULT_CAPACITY, HistoryStore
+from widgets import instrumentation
+from widgets.instrumentation import timed, trace
+
+# Tab id -> (title, module, widget class, widget id). The module is imported and the
+# widget mounted only when the tab is opened for the first time.
+TABS = {
+    "calculator": ("Kalkulator", "widgets.calculator", "Calculator", None),
+    "history": ("Historia Kalkulatora", "widgets.calculator_history", "CalculatorHistory", "history_widget"),
+    "timer": ("Stoper", "widgets.stopwatch", "StopwatchContainer", None),
+    "countdown": ("Timer Odliczający", "widgets.timer", "CountdownTimerContainer", None),
+    "reader": ("Przewidywanie Czasu", "widgets.reading", "ReadingPredictor", None),
+}
+# Only with KALKULATOR_PROFILE set, F12 shows and hides it
+if instrumentation.ENABLED:
+    TABS["dev"] = ("Dev", "widgets.dev_panel", "DevPanel", None)
+
+INITIAL_TAB = "calculator"
+# Allocations between collections of the youngest generation. Textual's render caches
+# go through objects fast enough that at the default of 700 a full collection (100-200 ms
+# with the history loaded) ran every couple of seconds, the longest stalls of the app.
+GC_THRESHOLD = 10_000
 
 
 class MultifunctionApp(App):
@@ -17,71 +44,119 @@ class MultifunctionApp(App):
     CSS_PATH = "tcss/main.tcss"
     
     BINDINGS = [("q", "quit", "Quit")]
+    if instrumentation.ENABLED:
+        BINDINGS.append(("f12", "toggle_dev", "Dev tab"))
 
-    calc_history = []
+    def __init__(self, history_capacity: int = DEFAULT_CAPACITY, history_db: Optional[str] = None):
+        super().__init__()
+        # Optional SQLite persistence, from the argument or $KALKULATOR_HISTORY_DB
+        if history_db is not None:
+            self.history_db = HistoryDatabase(history_db)
+        else:
+            self.history_db = HistoryDatabase.from_environment()
+        # Bounded: the oldest calculations are dropped once it is full.
+        # With a database, sequence numbers continue from the stored rows.
+        first_sequence = self.history_db.next_id if self.history_db is not None else 0
+        self.calc_history = HistoryStore(history_capacity, first_sequence)
+        # Kept up to date on every calculation, for the search in the history tab
+        self.history_index = HistoryIndex(self.calc_history)
+        # Set once the history tab has been opened
+        self._history_view = None
+        self.loaded_tabs: set[str] = set()
+        # Seconds from start-up to the first frame on screen
+        self.first_paint: Optional[float] = None
 
     def compose(self) -> ComposeResult:
         """Create child widgets for the app."""
         yield Header()
         
-        with TabbedContent(initial="calculator"):
-            with TabPane("Kalkulator", id="calculator"):
-                yield Calculator()
-
-            with TabPane("Historia Kalkulatora", id="history"):
-                yield CalculatorHistory(id="history_widget")
-            
-            with TabPane("Stoper", id="timer"):
-                yield StopwatchContainer()
-
-            with TabPane("Timer Odliczający", id="countdown"):
-                yield CountdownTimerContainer()
-                
-            with TabPane("Przewidywanie Czasu", id="reader"):
-                yield ReadingPredictor()
+        with TabbedContent(initial=INITIAL_TAB):
+            for tab_id, (title, *_) in TABS.items():
+                with TabPane(title, id=tab_id):
+                    # Everything else is mounted when its tab is opened
+                    if tab_id == INITIAL_TAB:
+                        yield self._create_tab_content(tab_id)
 
         yield Footer()
+
+    def on_ready(self) -> None:
+        self.first_paint = perf_counter() - STARTED
+        instrumentation.record("app/first_paint", self.first_paint)
+        trace("app", "First paint after %.1f ms", self.first_paint * 1000)
+        # What start-up created lives as long as the app, full collections can skip it
+        gc.freeze()
+        gc.set_threshold(GC_THRESHOLD)
+
+    def _create_tab_content(self, tab_id: str) -> Widget:
+        _, module_name, class_name, widget_id = TABS[tab_id]
+        with instrumentation.span(f"app/load_tab/{tab_id}"):
+            widget_class = getattr(importlib.import_module(module_name), class_name)
+            widget = widget_class(id=widget_id)
+        self.loaded_tabs.add(tab_id)
+        if tab_id == "history":
+            self._history_view = widget
+        return widget
+
+    @on(TabbedContent.TabActivated)
+    def load_tab(self, event: TabbedContent.TabActivated) -> None:
+        tab_id = event.pane.id
+        if tab_id in TABS and tab_id not in self.loaded_tabs:
+            event.pane.mount(self._create_tab_content(tab_id))
     
-    def add_calculation(self, left, operator, right, result):
+    @timed("app/add_calculation")
+    def add_calculation(self, left, operator, right, result, backend="decimal"):
         """Receives data from calculator, saves it, and updates the view."""
         
-        # Create a timestamp
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        
-        # Map operator words to symbols
-        op_map = {
-            "plus": "+", "minus": "-", "multiply": "×", "divide": "÷", 
-            "plus-minus": "±", "percent": "%"
-        }
-        op_symbol = op_map.get(operator, operator)
-        
-        # Format the expression string (e.g., "5 + 5")
-        expression = f"{left} {op_symbol} {right}"
-        
-        # Create the row data
-        row_data = (timestamp, expression, str(result))
-        
-        # A. Save to memory variable
-        self.calc_history.append(row_data)
+        # A. Save to memory, values stay raw until the row is displayed
+        entry = self.calc_history.append(left, operator, right, result, backend=backend)
         
         # B. Try to update the widget immediately if it exists
-        try:
-            self.query_one("#history_widget", CalculatorHistory).add_line(row_data)
-        except Exception:
-            pass
+        self._show_entry(entry)
+
+    @timed("app/add_expression")
+    def add_expression(self, expression, result, backend="decimal"):
+        """Saves a typed expression and its result, and updates the view."""
+        entry = self.calc_history.append(None, "expression", None, result, source=expression, backend=backend)
+        self._show_entry(entry)
+
+    def _show_entry(self, entry):
+        self.history_index.add(entry)
+        if self.history_db is not None:
+            self.history_db.add(entry)
+        # Until the history tab is opened there is no widget, it reads the store when mounted
+        if self._history_view is not None:
+            self._history_view.add_line(entry)
 
     def clear_history(self):
-        """Clears the calculator history both in memory and in the display."""
+        """
+        Clears the calculator history both in memory and in the display.
+        Persisted history is kept, AC only forgets the current session then.
+        """
         self.calc_history.clear()
-        try:
-            table = self.query_one("#history_widget", CalculatorHistory).query_one("DataTable")
-            table.clear()
-        except Exception:
-            pass
-
-    # catches the default textual way of messaging from the CountdownTimer
-    @on(CountdownTimer.Expired)
-    def notify_user(self, message: CountdownTimer.Expired) -> None:
+        self.history_index.clear()
+        if self.history_db is not None:
+            return
+        if self._history_view is not None:
+            self._history_view.clear()
+
+    def action_toggle_dev(self) -> None:
+        tabs = self.query_one(TabbedContent)
+        if tabs.active == "dev":
+            tabs.hide_tab("dev")
+        else:
+            tabs.show_tab("dev")
+            tabs.active = "dev"
+
+    def on_unmount(self) -> None:
+        # Commits whatever is still queued
+        if self.history_db is not None:
+            self.history_db.close()
+        if instrumentation.DUMP_PATH:
+            instrumentation.dump()
+
+    # catches the default textual way of messaging from the CountdownTimer,
+    # by handler name so widgets.timer is not imported before its tab is opened
+    def on_countdown_timer_expired(self, message) -> None:
         self.notify(
             f"The {message.timer_name} has finished!",
             title="Time's Up!",
@@ -0,0 +1,250 @@
+import math
+import os
+import random
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from widgets import analysis
+from widgets.analysis import (
+    AnalysisCancelled,
+    SentenceReservoir,
+    StreamingAnalyzer,
+    analyze_text,
+    compute_ari,
+    compute_coleman_liau,
+    compute_flesch_kincaid,
+    compute_flesch_reading_ease,
+    compute_smog,
+    count_alnum,
+    count_syllables,
+    count_syllables_in,
+    scan_file,
+)
+
+TEXT = (
+    "The quick brown fox jumps over the lazy dog. Did it?! Yes... it did.\n"
+    "Zażółć gęślą jaźń, wrote someone_else at 10:30.   \n\n"
+    "   Trailing words without a terminator"
+)
+
+
+def reference(text: str) -> tuple[int, int, int, int]:
+    """(words, sentences, alphanumeric characters, syllables) computed over the whole text."""
+    words = text.split()
+    sentences = sum(1 for part in re.split(r"[.!?]+", text) if part.strip())
+    return len(words), sentences, sum(c.isalnum() for c in text), sum(map(count_syllables, words))
+
+
+def counts(analyzer: StreamingAnalyzer) -> tuple[int, int, int, int]:
+    return analyzer.word_count, analyzer.sentence_count, analyzer.char_count, analyzer.syllable_count
+
+
+def chunks(text: str, cuts: list[int]) -> list[str]:
+    edges = [0, *sorted(cuts), len(text)]
+    return [text[start:end] for start, end in zip(edges, edges[1:])]
+
+
+def feed(parts: list[str]) -> StreamingAnalyzer:
+    analyzer = StreamingAnalyzer()
+    for part in parts:
+        analyzer.feed(part)
+    analyzer.finish()
+    return analyzer
+
+
+class StreamingAnalyzerTest(unittest.TestCase):
+    def test_whole_text_matches_reference(self):
+        self.assertEqual(counts(feed([TEXT])), reference(TEXT))
+
+    def test_every_single_cut_matches_reference(self):
+        expected = reference(TEXT)
+        for cut in range(len(TEXT) + 1):
+            with self.subTest(cut=cut):
+                self.assertEqual(counts(feed(chunks(TEXT, [cut]))), expected)
+
+    def test_one_character_chunks(self):
+        self.assertEqual(counts(feed(list(TEXT))), reference(TEXT))
+
+    def test_random_cuts(self):
+        rng = random.Random(7)
+        expected = reference(TEXT)
+        for _ in range(200):
+            cuts = rng.sample(range(len(TEXT)), rng.randint(1, 12))
+            with self.subTest(cuts=cuts):
+                self.assertEqual(counts(feed(chunks(TEXT, cuts))), expected)
+
+    def test_merge_matches_single_feed(self):
+        expected = reference(TEXT)
+        rng = random.Random(11)
+        for _ in range(200):
+            cuts = rng.sample(range(1, len(TEXT)), rng.randint(1, 6))
+            merged = StreamingAnalyzer()
+            for part in chunks(TEXT, cuts):
+                other = StreamingAnalyzer()
+                other.feed(part)
+                merged.merge(other)
+            merged.finish()
+            with self.subTest(cuts=cuts):
+                self.assertEqual(counts(merged), expected)
+
+    def test_empty_and_whitespace_only(self):
+        self.assertEqual(counts(feed([])), (0, 0, 0, 0))
+        self.assertEqual(counts(feed(["  \n", "\t "])), (0, 0, 0, 0))
+
+    def test_analyze_text(self):
+        result = analyze_text(TEXT)
+        words, sentences, chars, syllables = reference(TEXT)
+        self.assertEqual(
+            (result.word_count, result.sentence_count, result.char_count, result.syllable_count),
+            (words, sentences, chars, syllables),
+        )
+        self.assertAlmostEqual(result.ari, 4.71 * chars / words + 0.5 * words / sentences - 21.43)
+
+
+class ScanFileTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "text.txt")
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(TEXT * 50)
+
+    def test_small_chunks_match_reference(self):
+        # Chunks that cut multi-byte characters in half
+        with mock.patch.object(analysis, "CHUNK_SIZE", 7):
+            analyzer = scan_file(self.path, StreamingAnalyzer())
+        self.assertEqual(counts(analyzer), reference(TEXT * 50))
+
+    def test_progress_ends_at_the_whole_file(self):
+        reports = []
+        with mock.patch.object(analysis, "CHUNK_SIZE", 64), mock.patch.object(analysis, "PROGRESS_INTERVAL", 0):
+            scan_file(self.path, StreamingAnalyzer(), progress=reports.append)
+        self.assertGreater(len(reports), 1)
+        self.assertEqual([report.bytes_read for report in reports], sorted(report.bytes_read for report in reports))
+        self.assertEqual(reports[-1].bytes_read, os.path.getsize(self.path))
+        self.assertEqual(reports[-1].fraction, 1.0)
+
+    def test_cancelled(self):
+        polls = []
+
+        def cancelled():
+            polls.append(None)
+            return len(polls) > 2
+
+        with mock.patch.object(analysis, "CHUNK_SIZE", 64):
+            with self.assertRaises(AnalysisCancelled):
+                scan_file(self.path, StreamingAnalyzer(), cancelled=cancelled)
+        self.assertEqual(len(polls), 3)
+
+
+def sampled(size: int, population: int, seed: int) -> list[int]:
+    reservoir = SentenceReservoir(size, seed)
+    for index in range(population):
+        if index == reservoir.next_index:
+            reservoir.offer(index, f"Sentence {index}")
+    return sorted(index for index, _ in reservoir.items)
+
+
+class SentenceReservoirTest(unittest.TestCase):
+    def test_keeps_everything_below_size(self):
+        self.assertEqual(sampled(10, 7, seed=1), list(range(7)))
+
+    def test_size_and_seed(self):
+        picked = sampled(10, 10_000, seed=3)
+        self.assertEqual(len(picked), 10)
+        self.assertEqual(len(set(picked)), 10)
+        self.assertEqual(picked, sampled(10, 10_000, seed=3))
+        self.assertNotEqual(picked, sampled(10, 10_000, seed=4))
+
+    def test_roughly_uniform(self):
+        # Each of 100 sentences is kept with probability 1/10: count the halves
+        halves = [0, 0]
+        for seed in range(2000):
+            for index in sampled(10, 100, seed):
+                halves[index >= 50] += 1
+        self.assertAlmostEqual(halves[0] / sum(halves), 0.5, delta=0.03)
+
+    def test_analyzer_pool_holds_sentences_of_the_text(self):
+        text = " ".join(f"Sentence number {index} is here." for index in range(500))
+        analyzer = StreamingAnalyzer(reservoir=SentenceReservoir(16, seed=5))
+        for part in chunks(text, list(range(37, len(text), 37))):
+            analyzer.feed(part)
+        analyzer.finish()
+        pool = analyzer.result().sample_pool
+        self.assertEqual(len(pool), 16)
+        for sentence in pool:
+            self.assertRegex(sentence.strip(), r"^Sentence number \d+ is here$")
+
+    def test_combine(self):
+        parts = []
+        for seed, population in ((1, 300), (2, 5), (3, 0)):
+            reservoir = SentenceReservoir(10, seed)
+            for index in range(population):
+                if index == reservoir.next_index:
+                    reservoir.offer(index, f"{seed}-{index}")
+            parts.append((reservoir, population))
+        combined = SentenceReservoir.combine(parts, 10, seed=9)
+        self.assertEqual(len(combined.items), 10)
+        self.assertEqual(len(set(combined.items)), 10)
+        self.assertEqual(len(SentenceReservoir.combine(parts[1:], 10, seed=9).items), 5)
+
+
+class ReadabilityTest(unittest.TestCase):
+    def test_count_syllables(self):
+        cases = {"cat": 1, "table": 2, "make": 1, "wanted": 2, "jumped": 1, "boxes": 2, "rhythm": 1, "Zażółć": 2, "...": 1}
+        for word, expected in cases.items():
+            with self.subTest(word=word):
+                self.assertEqual(count_syllables(word), expected)
+        self.assertEqual(count_syllables_in(["beautiful", "cat", "beautiful"]), (7, 2))
+
+    def test_long_words_are_bounded(self):
+        word = "ab" * 10_000
+        self.assertEqual(count_syllables(word), count_syllables(word[-analysis.MAX_WORD_CHARS:]))
+        count_syllables_in([word])
+        self.assertNotIn(word, analysis._syllables)
+
+        # Cut into small chunks, only the end of the word is ever carried
+        text = f"Short words. {word} more words."
+        analyzer = StreamingAnalyzer()
+        for start in range(0, len(text), 64):
+            analyzer.feed(text[start:start + 64])
+            self.assertLessEqual(len(analyzer._word_carry), analysis.MAX_WORD_CHARS)
+        analyzer.finish()
+        self.assertEqual(counts(analyzer), reference(text))
+
+    def test_metrics(self):
+        self.assertAlmostEqual(compute_ari(400, 100, 5), 4.71 * 4 + 0.5 * 20 - 21.43)
+        self.assertEqual(compute_ari(10, 100, 5), 0)
+        self.assertAlmostEqual(compute_coleman_liau(450, 100, 5), 0.0588 * 450 - 0.296 * 5 - 15.8)
+        self.assertAlmostEqual(compute_flesch_reading_ease(100, 5, 150), 206.835 - 1.015 * 20 - 84.6 * 1.5)
+        self.assertAlmostEqual(compute_flesch_kincaid(100, 5, 150), 0.39 * 20 + 11.8 * 1.5 - 15.59)
+        self.assertAlmostEqual(compute_smog(30, 30), 1.0430 * math.sqrt(30) + 3.1291)
+        for metric in (compute_ari, compute_coleman_liau):
+            self.assertEqual(metric(0, 0, 0), 0.0)
+        self.assertEqual(compute_smog(0, 5), 0.0)
+
+    def test_result_metrics(self):
+        text = "The cat sat on the mat. It was a beautiful, extraordinary afternoon."
+        result = analyze_text(text)
+        words = text.split()
+        polysyllables = sum(count_syllables(word) >= analysis.POLYSYLLABLE for word in words)
+        self.assertEqual(result.polysyllable_count, polysyllables)
+        self.assertAlmostEqual(result.smog, compute_smog(2, polysyllables))
+        self.assertAlmostEqual(
+            result.flesch_reading_ease,
+            compute_flesch_reading_ease(len(words), 2, sum(map(count_syllables, words))),
+        )
+        self.assertAlmostEqual(result.coleman_liau, compute_coleman_liau(result.char_count, len(words), 2))
+
+
+class CountAlnumTest(unittest.TestCase):
+    def test_matches_isalnum(self):
+        for text in ["", "abc 123", "under_score", "żółw, 42!", "x y", "٣ digits"]:
+            with self.subTest(text=text):
+                self.assertEqual(count_alnum(text), sum(c.isalnum() for c in text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from widgets.analysis import AnalysisResult
+from widgets.analysis_cache import AnalysisCache, file_key
+
+
+def result(words: int) -> AnalysisResult:
+    return AnalysisResult(words, 2, words * 5, 7.5, words * 2, 1, ["A sentence"])
+
+
+def disk_bytes(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.glob("*.json"))
+
+
+class AnalysisCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        self.cache_dir = self.root / "cache"
+
+    def text_file(self, name: str, text: str = "Some text.") -> str:
+        path = self.root / name
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+    def test_round_trip_through_memory_and_disk(self):
+        path = self.text_file("a.txt")
+        cache = AnalysisCache(self.cache_dir)
+        self.assertIsNone(cache.get(path))
+        cache.put(path, result(10))
+        self.assertEqual(cache.get(path), result(10))
+        self.assertEqual(cache.stats["memory_hits"], 1)
+
+        fresh = AnalysisCache(self.cache_dir)
+        self.assertEqual(fresh.get(path), result(10))
+        self.assertEqual(fresh.stats["disk_hits"], 1)
+        self.assertEqual(fresh.peek(file_key(path)), result(10))
+
+    def test_changed_file_is_a_miss(self):
+        path = self.text_file("a.txt")
+        cache = AnalysisCache(self.cache_dir)
+        cache.put(path, result(10))
+        self.text_file("a.txt", "Some other, longer text.")
+        self.assertIsNone(cache.get(path))
+        self.assertIsNone(AnalysisCache(self.cache_dir).get(path))
+
+    def test_memory_is_bounded(self):
+        cache = AnalysisCache(self.cache_dir, memory_entries=3)
+        for index in range(10):
+            cache.put(self.text_file(f"{index}.txt"), result(index))
+        self.assertEqual(cache.stats["memory_entries"], 3)
+
+    def test_disk_is_trimmed_oldest_first(self):
+        paths = [self.text_file(f"{index}.txt", "x" * index) for index in range(40)]
+        probe = AnalysisCache(self.cache_dir / "probe")
+        probe.put(paths[0], result(0))
+        entry_size = disk_bytes(self.cache_dir / "probe")
+
+        cache = AnalysisCache(self.cache_dir, memory_entries=1, max_disk_bytes=entry_size * 10)
+        for index, path in enumerate(paths):
+            cache.put(path, result(index))
+            # Distinct mtimes in the order of the puts, eviction goes by them
+            entry = cache._entry_path(file_key(path))
+            os.utime(entry, (index + 1, index + 1))
+            self.assertLessEqual(disk_bytes(self.cache_dir), cache.max_disk_bytes)
+            # The running total matches what is on disk
+            self.assertEqual(cache._disk_size(), disk_bytes(self.cache_dir))
+        # The newest entries are the ones kept
+        fresh = AnalysisCache(self.cache_dir)
+        self.assertEqual(fresh.get(paths[-1]), result(39))
+        self.assertIsNone(fresh.get(paths[0]))
+
+    def test_replacing_an_entry_is_counted_once(self):
+        path = self.text_file("a.txt")
+        cache = AnalysisCache(self.cache_dir)
+        for _ in range(5):
+            cache.put(path, result(10))
+        self.assertEqual(cache._disk_size(), disk_bytes(self.cache_dir))
+
+    def test_clear(self):
+        path = self.text_file("a.txt")
+        cache = AnalysisCache(self.cache_dir)
+        cache.put(path, result(10))
+        cache.clear()
+        self.assertIsNone(cache.get(path))
+        self.assertEqual(cache._disk_size(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
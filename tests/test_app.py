@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from textual.widgets import TabbedContent, TabPane
+
+from main import INITIAL_TAB, TABS, MultifunctionApp
+
+
+class LazyTabsTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        environment = mock.patch.dict(os.environ, {
+            "XDG_CACHE_HOME": os.path.join(directory.name, "cache"),
+            "XDG_DATA_HOME": os.path.join(directory.name, "data"),
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        for name in ("KALKULATOR_HISTORY_DB", "KALKULATOR_REPLAY", "KALKULATOR_READING_SPEED"):
+            os.environ.pop(name, None)
+
+    async def test_only_the_initial_tab_is_mounted(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            self.assertEqual(app.loaded_tabs, {INITIAL_TAB})
+            self.assertIsNotNone(app.first_paint)
+            for tab_id in TABS:
+                with self.subTest(tab_id=tab_id):
+                    children = app.query_one(f"#{tab_id}", TabPane).children
+                    self.assertEqual(len(children), 1 if tab_id == INITIAL_TAB else 0)
+
+    async def test_tabs_are_mounted_once_when_opened(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            tabs = app.query_one(TabbedContent)
+            for tab_id, (_, _, class_name, _) in TABS.items():
+                tabs.active = tab_id
+                await pilot.pause()
+                with self.subTest(tab_id=tab_id):
+                    self.assertIn(tab_id, app.loaded_tabs)
+                    (widget,) = app.query_one(f"#{tab_id}", TabPane).children
+                    self.assertEqual(type(widget).__name__, class_name)
+            # Going back doesn't mount anything again
+            tabs.active = INITIAL_TAB
+            await pilot.pause()
+            self.assertEqual(len(app.query_one(f"#{INITIAL_TAB}", TabPane).children), 1)
+            self.assertEqual(app.loaded_tabs, set(TABS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import batch
+from widgets.analysis_cache import AnalysisCache
+
+TEXT = "The quick brown fox jumps over the lazy dog. It was not amused by any of it. " * 20
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        (self.root / "docs" / "nested").mkdir(parents=True)
+        (self.root / "docs" / "a.txt").write_text(TEXT, encoding="utf-8")
+        (self.root / "docs" / "nested" / "b.txt").write_text(TEXT * 2, encoding="utf-8")
+        self.broken = self.root / "broken.txt"
+        self.broken.write_bytes(b"\xff\xfe not utf-8 \xff")
+        # Nothing the tests do may touch the user's cache or profile
+        environment = mock.patch.dict(os.environ, {
+            "XDG_CACHE_HOME": str(self.root / "cache"),
+            "XDG_DATA_HOME": str(self.root / "data"),
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        os.environ.pop("KALKULATOR_READING_SPEED", None)
+        batch._cache = None
+        self.addCleanup(setattr, batch, "_cache", None)
+
+    def test_iter_files(self):
+        docs = str(self.root / "docs")
+        files = list(batch.iter_files([docs, str(self.root / "docs" / "*.txt")]))
+        self.assertEqual(sorted(map(os.path.basename, files)), ["a.txt", "b.txt"])
+
+    def test_directories_and_patterns_skip_what_is_not_prose(self):
+        (self.root / "docs" / ".git").mkdir()
+        (self.root / "docs" / ".git" / "HEAD.txt").write_text("ref: refs/heads/main")
+        (self.root / "docs" / "node_modules" / "pkg").mkdir(parents=True)
+        (self.root / "docs" / "node_modules" / "pkg" / "README.md").write_text(TEXT)
+        (self.root / "docs" / "logo.png").write_bytes(b"\x89PNG\r\n")
+        (self.root / "docs" / "data.bin").write_bytes(b"\0\1\2")
+        docs = str(self.root / "docs")
+        for targets in ([docs], [os.path.join(docs, "**", "*")]):
+            with self.subTest(targets=targets):
+                files = list(batch.iter_files(targets))
+                self.assertEqual(sorted(os.path.relpath(path, docs) for path in files), ["a.txt", os.path.join("nested", "b.txt")])
+        # Named explicitly it is analyzed, and reported if it can't be
+        self.assertEqual(list(batch.iter_files([os.path.join(docs, "data.bin")])), [os.path.join(docs, "data.bin")])
+        # A skipped name above the directory given is fine
+        build = self.root / "build"
+        build.mkdir()
+        (build / "notes.txt").write_text(TEXT)
+        self.assertEqual(list(batch.iter_files([str(build)])), [str(build / "notes.txt")])
+        self.assertEqual(list(batch.iter_files([str(build / "*.txt")])), [str(build / "notes.txt")])
+
+    def test_jsonl(self):
+        output = self.root / "report.jsonl"
+        code = batch.main([str(self.root / "docs"), "--workers", "1", "--wpm", "200", "--no-cache", "-o", str(output)])
+        self.assertEqual(code, 0)
+        rows = {os.path.basename(row["path"]): row for row in map(json.loads, output.read_text().splitlines())}
+        self.assertEqual(set(rows), {"a.txt", "b.txt"})
+        self.assertEqual(rows["a.txt"]["words"], len(TEXT.split()))
+        self.assertEqual(rows["b.txt"]["words"], 2 * len(TEXT.split()))
+        self.assertEqual(rows["a.txt"]["sentences"], 40)
+        self.assertEqual(rows["a.txt"]["wpm"], 200)
+        self.assertEqual(rows["a.txt"]["minutes"], round(len(TEXT.split()) / 200, 2))
+        self.assertIsNone(rows["a.txt"]["error"])
+
+    def test_csv_and_failures(self):
+        output = self.root / "report.csv"
+        targets = [str(self.root / "docs" / "a.txt"), str(self.broken)]
+        with mock.patch("sys.stderr"):
+            code = batch.main(targets + ["--workers", "1", "--format", "csv", "--no-cache", "-o", str(output)])
+        self.assertEqual(code, 1)
+        with open(output, newline="", encoding="utf-8") as file:
+            rows = {os.path.basename(row["path"]): row for row in csv.DictReader(file)}
+        self.assertEqual(rows["broken.txt"]["words"], "")
+        self.assertTrue(rows["broken.txt"]["error"])
+        # No calibration yet: the average reader
+        self.assertEqual(float(rows["a.txt"]["wpm"]), batch.DEFAULT_WPM)
+
+    def test_cached_results_keep_the_sentence_sample(self):
+        path = str(self.root / "docs" / "a.txt")
+        row = batch.analyze(path, use_cache=True)
+        self.assertIsNone(row["error"])
+        cached = AnalysisCache().get(path)
+        self.assertIsNotNone(cached)
+        self.assertTrue(cached.sample_pool)
+        self.assertEqual(batch.analyze(path, use_cache=True), row)
+
+    def test_rejects_bad_arguments(self):
+        with mock.patch("sys.stderr"):
+            for arguments in (["--wpm", "0"], ["--workers", "0"]):
+                with self.subTest(arguments=arguments), self.assertRaises(SystemExit):
+                    batch.main([str(self.root / "docs"), *arguments])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from benchmarks import soak
+from benchmarks.bench import bench_app, compare, without_environment
+from benchmarks.corpus import KINDS, SIZES, corpus_file
+
+
+class CorpusTest(unittest.TestCase):
+    def test_files_have_their_size_and_are_reproducible(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            for kind in KINDS:
+                with self.subTest(kind=kind):
+                    path = corpus_file(Path(first), kind, "1KB")
+                    data = path.read_bytes()
+                    # Only a UTF-8 character that didn't fit is left out at the end
+                    self.assertLessEqual(SIZES["1KB"] - 3, len(data))
+                    self.assertLessEqual(len(data), SIZES["1KB"])
+                    data.decode("utf-8")
+                    self.assertEqual(corpus_file(Path(second), kind, "1KB").read_bytes(), data)
+                    # An existing file is reused
+                    self.assertEqual(corpus_file(Path(first), kind, "1KB"), path)
+
+
+class CompareTest(unittest.TestCase):
+    def test_only_slowdowns_past_the_tolerance(self):
+        baseline = {"fast": {"ops_per_s": 100.0}, "slow": {"ops_per_s": 100.0}, "gone": {"ops_per_s": 1.0}}
+        results = {"fast": {"ops_per_s": 85.0}, "slow": {"ops_per_s": 70.0}, "new": {"ops_per_s": 1.0}}
+        self.assertEqual(compare(results, baseline, 0.2), ["slow: -30.0% ops/s"])
+
+
+class BenchAppTest(unittest.TestCase):
+    def test_user_settings_are_left_out(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.db")
+            replay = os.path.join(directory, "keys.txt")
+            Path(replay).write_text("9*9=")
+            environment = mock.patch.dict(os.environ, {
+                "KALKULATOR_HISTORY_DB": path,
+                "KALKULATOR_REPLAY": replay,
+                "XDG_CACHE_HOME": os.path.join(directory, "cache"),
+            })
+            with environment, redirect_stdout(io.StringIO()):
+                results = asyncio.run(bench_app(20))
+                self.assertEqual(os.environ["KALKULATOR_HISTORY_DB"], path)
+            self.assertIn("calculator/history_append", results)
+            self.assertFalse(os.path.exists(path))
+
+    def test_without_environment(self):
+        with mock.patch.dict(os.environ, {"KALKULATOR_TEST": "1"}):
+            with without_environment("KALKULATOR_TEST", "KALKULATOR_MISSING"):
+                self.assertNotIn("KALKULATOR_TEST", os.environ)
+            self.assertEqual(os.environ["KALKULATOR_TEST"], "1")
+            self.assertNotIn("KALKULATOR_MISSING", os.environ)
+
+
+class SoakTest(unittest.TestCase):
+    def test_parse_budget(self):
+        self.assertEqual(soak.parse_budget("rss_growth_mb=20"), ("rss_growth_mb", 20.0))
+        for text in ("rss_growth_mb", "rss_growth_mb=", "unknown=1"):
+            with self.subTest(text=text), self.assertRaises(argparse.ArgumentTypeError):
+                soak.parse_budget(text)
+
+    def test_check_budgets(self):
+        measured = {"frame_p99_ms": 120.0, "lag_p99_ms": 10.0}
+        self.assertEqual(
+            soak.check_budgets(measured, {"frame_p99_ms": 100.0, "lag_p99_ms": 10.0}),
+            ["frame_p99_ms: 120.0 > 100.0"],
+        )
+
+    def test_short_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            environment = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": os.path.join(directory, "cache")})
+            save = Path(directory) / "soak.json"
+            # Generous latency budgets, only a smoke test of the harness
+            budgets = [f"{name}=1e9" for name in soak.DEFAULT_BUDGETS if name != "history_entries"]
+            argv = [
+                "--duration", "2", "--warmup", "0", "--scenarios", "calculator", "timers",
+                "--countdowns", "2", "--save", str(save), *(f"--budget={budget}" for budget in budgets),
+            ]
+            with environment, redirect_stdout(io.StringIO()) as output, redirect_stderr(io.StringIO()):
+                self.assertEqual(soak.main(argv), 0)
+                # The run kept its cache in a directory of its own
+                self.assertFalse(os.path.exists(os.path.join(directory, "cache")))
+            report = json.loads(save.read_text())
+        self.assertEqual(report["scenarios"], ["calculator", "timers"])
+        self.assertTrue(report["samples"])
+        self.assertGreater(report["summary"]["counts"]["calculations"], 0)
+        self.assertIn("frame_p99_ms", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+from unittest import mock
+
+from textual.widget import Widget
+from textual.widgets import Digits, Input, Log, Select
+
+from main import MultifunctionApp
+from widgets import calculator as calculator_module
+from widgets.calculator import Calculator, NumberDisplay, parse_keys
+
+
+class CalculatorTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        environment = mock.patch.dict(os.environ, {
+            "XDG_CACHE_HOME": os.path.join(directory.name, "cache"),
+            "XDG_DATA_HOME": os.path.join(directory.name, "data"),
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        for name in ("KALKULATOR_HISTORY_DB", "KALKULATOR_REPLAY", "KALKULATOR_READING_SPEED"):
+            os.environ.pop(name, None)
+
+
+class BackendTest(CalculatorTestCase):
+    async def test_switching_backends(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            calculator = app.query_one(Calculator)
+            calculator.replay("1/3=")
+            self.assertEqual(calculator.left, Decimal(1) / 3)
+
+            app.query_one("#backend", Select).value = "fraction"
+            await pilot.pause()
+            self.assertEqual(calculator.backend.tag, "fraction")
+            self.assertIsInstance(calculator.left, Fraction)
+            self.assertTrue(app.query_one("#precision", Input).disabled)
+            calculator.replay("cc1/3*3=")
+            self.assertEqual(calculator.numbers, "1")
+            self.assertEqual(app.calc_history[-1].backend, "fraction")
+
+            app.query_one("#backend", Select).value = "decimal"
+            app.query_one("#precision", Input).value = "5"
+            await pilot.pause()
+            self.assertEqual(calculator.backend.tag, "decimal(prec=5, ROUND_HALF_EVEN)")
+            calculator.replay("cc2/3=")
+            self.assertEqual(calculator.numbers, "0.66667")
+
+            # An invalid precision keeps the last valid one
+            app.query_one("#precision", Input).value = "0"
+            await pilot.pause()
+            self.assertEqual(calculator.backend.tag, "decimal(prec=5, ROUND_HALF_EVEN)")
+
+    async def test_key_sequences_never_crash(self):
+        sequences = ["1/0=", "0/0=", "5_%=", ".=", "...5+.=", "9999999999*9999999999*9999999999=", "2%%%%%%%%%%", "1/3=*3="]
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            calculator = app.query_one(Calculator)
+            for kind in ("decimal", "float", "fraction"):
+                app.query_one("#backend", Select).value = kind
+                await pilot.pause()
+                for keys in sequences:
+                    with self.subTest(kind=kind, keys=keys):
+                        calculator.replay("cc" + keys)
+                        self.assertTrue(calculator.numbers)
+                        if keys == "1/0=":
+                            self.assertEqual(calculator.numbers, "Error")
+            await pilot.pause()
+
+    async def test_keypad_entry_stays_in_plain_decimals(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            calculator = app.query_one(Calculator)
+            app.query_one("#backend", Select).value = "float"
+            await pilot.pause()
+            calculator.replay("0.000001_")
+            self.assertEqual(calculator.value, "-0.000001")
+            app.query_one("#backend", Select).value = "fraction"
+            await pilot.pause()
+            calculator.replay("c25%")
+            self.assertEqual(calculator.value, "0.25")
+            # More digits can still be typed after it
+            calculator.replay("5")
+            self.assertEqual(calculator.numbers, "0.255")
+
+
+class NumberDisplayTest(CalculatorTestCase):
+    async def test_layout_only_when_the_size_follows_the_number(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            display = app.query_one("#numbers", NumberDisplay)
+            self.assertTrue(display.has_fixed_size)
+            size = display.size
+            with mock.patch.object(Digits, "refresh", autospec=True, side_effect=Widget.refresh) as refresh:
+                display.update("12345")
+            self.assertFalse(refresh.call_args.kwargs["layout"])
+            await pilot.pause()
+            self.assertEqual(display.size, size)
+
+            display.styles.width = "auto"
+            display.update("1")
+            await pilot.pause()
+            self.assertFalse(display.has_fixed_size)
+            width = display.size.width
+            display.update("123456")
+            await pilot.pause()
+            self.assertGreater(display.size.width, width)
+
+
+class ParseKeysTest(unittest.TestCase):
+    def test_parse_keys(self):
+        self.assertEqual(parse_keys("12 + 3.5\n="), [
+            "number-1", "number-2", "plus", "number-3", "point", "number-5", "equals",
+        ])
+        self.assertEqual(parse_keys("×÷±C"), ["multiply", "divide", "plus-minus", "clear"])
+        self.assertEqual(parse_keys(""), [])
+        with self.assertRaisesRegex(ValueError, "at position 2"):
+            parse_keys("1 x")
+
+
+class ReplayTest(CalculatorTestCase):
+    async def test_replay_matches_pressing_the_keys(self):
+        keys = "12+30=*2=_%c7-.5="
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            calculator = app.query_one(Calculator)
+            for button_id in parse_keys(keys):
+                calculator.press_key(button_id)
+            pressed = (calculator.numbers, calculator.left, [entry.row()[1:] for entry in app.calc_history])
+
+            calculator.replay("cc")
+            self.assertEqual(calculator.replay(keys), len(parse_keys(keys)))
+            await pilot.pause()
+            self.assertEqual(calculator.numbers, pressed[0])
+            self.assertEqual(calculator.left, pressed[1])
+            self.assertEqual([entry.row()[1:] for entry in app.calc_history], pressed[2])
+            # The display is caught up once at the end
+            self.assertEqual(str(app.query_one("#numbers", Digits).value), calculator.numbers)
+            entry = app.calc_history[-1]
+            self.assertEqual(app.query_one("#left_number", Log).lines[-2], f"{entry.expression} = {entry.result}")
+
+    async def test_log_keeps_the_last_lines(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            calculator = app.query_one(Calculator)
+            calculator.replay("cc" + "1+" * 49 + "1=")
+            await pilot.pause()
+            self.assertEqual(len(app.calc_history), 50)
+            lines = app.query_one("#left_number", Log).lines
+            self.assertLessEqual(len(lines), calculator_module.LOG_LINES)
+            self.assertEqual(lines[-2], "49 + 1 = 50")
+
+    async def test_replay_file_in_frames(self):
+        path = os.path.join(self.directory, "keys.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("2*" * 80 + "1=\n")
+        os.environ["KALKULATOR_REPLAY"] = path
+        # One key per frame
+        budget = mock.patch.object(calculator_module, "FRAME_BUDGET", 0)
+        budget.start()
+        self.addCleanup(budget.stop)
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            calculator = app.query_one(Calculator)
+            self.assertFalse(calculator.replaying)
+            self.assertEqual(calculator.left, Decimal(2) ** 80)
+            self.assertEqual(len(app.calc_history), 81)
+
+    async def test_bad_replays_are_reported(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            calculator = app.query_one(Calculator)
+            calculator.replay_file(os.path.join(self.directory, "missing.txt"))
+            calculator.replay_in_frames("1 + x")
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            messages = [notification.message for notification in app._notifications]
+            self.assertTrue(any(message.startswith("Cannot replay") for message in messages))
+            self.assertIn("Replay: Unknown key 'x' at position 4", messages)
+            self.assertEqual(calculator.numbers, "0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from textual.widgets import Input, TabbedContent
+
+from main import MultifunctionApp
+from widgets.calculator_history import PAGE_SIZE, HistoryTable
+from widgets.history_db import HistoryDatabase
+from widgets.history_store import HistoryStore
+
+
+class CalculatorHistoryTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        environment = mock.patch.dict(os.environ, {
+            "XDG_CACHE_HOME": os.path.join(directory.name, "cache"),
+            "XDG_DATA_HOME": os.path.join(directory.name, "data"),
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        for name in ("KALKULATOR_HISTORY_DB", "KALKULATOR_REPLAY", "KALKULATOR_READING_SPEED"):
+            os.environ.pop(name, None)
+
+    async def open_history(self, app, pilot) -> HistoryTable:
+        app.query_one(TabbedContent).active = "history"
+        await pilot.pause()
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        return app.query_one(HistoryTable)
+
+    async def test_rows_from_memory(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            for number in range(300):
+                app.add_calculation(Decimal(number), "plus", Decimal(1), Decimal(number + 1))
+            table = await self.open_history(app, pilot)
+            self.assertEqual(table.row_count, 300)
+            self.assertEqual(table.row(0), app.calc_history[0].row())
+
+            # Calculations made with the tab open are batched into the table
+            for number in range(5):
+                app.add_calculation(Decimal(number), "multiply", Decimal(2), Decimal(number * 2))
+            await pilot.pause(0.1)
+            self.assertEqual(table.row_count, 305)
+            self.assertEqual(table.row(304)[1:], ("4 × 2", "8"))
+            # Only the rows in view are drawn, the newest at the bottom
+            self.assertIn("4 × 2", table.render_line(table.size.height - 1).text)
+
+    async def test_calculations_while_the_tab_mounts(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            app.add_calculation(Decimal(1), "plus", Decimal(1), Decimal(2))
+            app.query_one("#history").mount(app._create_tab_content("history"))
+            # The widget exists but its mount has not been processed yet
+            app.add_calculation(Decimal(2), "plus", Decimal(2), Decimal(4))
+            app.clear_history()
+            app.add_calculation(Decimal(3), "plus", Decimal(3), Decimal(6))
+            table = await self.open_history(app, pilot)
+            self.assertEqual(table.row_count, 1)
+            self.assertEqual(table.row(0)[1:], ("3 + 3", "6"))
+
+    async def test_search(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            for number in range(50):
+                app.add_calculation(Decimal(number), "plus" if number % 2 else "minus", Decimal(1), Decimal(number))
+            table = await self.open_history(app, pilot)
+            search = app.query_one("#history-search", Input)
+            search.value = "op:+"
+            await pilot.pause()
+            self.assertEqual(table.row_count, 25)
+            self.assertTrue(all(table.row(index)[1].endswith("+ 1") for index in range(25)))
+            search.value = ""
+            await pilot.pause()
+            self.assertEqual(table.row_count, 50)
+
+    async def test_search_results_keep_what_the_history_holds(self):
+        app = MultifunctionApp(history_capacity=30)
+        async with app.run_test() as pilot:
+            table = await self.open_history(app, pilot)
+            search = app.query_one("#history-search", Input)
+            search.value = "op:+"
+            await pilot.pause()
+            for number in range(100):
+                app.add_calculation(Decimal(number), "plus" if number % 2 else "minus", Decimal(1), Decimal(number))
+            await pilot.pause(0.1)
+            self.assertEqual(table.row_count, 15)
+            self.assertEqual(table.matches, [entry for entry in app.calc_history if entry.operator == "plus"])
+
+            with mock.patch("widgets.calculator_history.DEFAULT_LIMIT", 5):
+                app.add_calculation(Decimal(1), "plus", Decimal(1), Decimal(2))
+                await pilot.pause(0.1)
+            self.assertEqual(table.row_count, 5)
+            self.assertEqual(table.row(4)[1:], ("1 + 1", "2"))
+
+    async def test_rows_from_the_database(self):
+        path = os.path.join(self.directory, "history.db")
+        database = HistoryDatabase(path)
+        store = HistoryStore()
+        for number in range(PAGE_SIZE * 3 + 10):
+            database.add(store.append(Decimal(number), "plus", Decimal(0), Decimal(number)))
+        database.close()
+
+        app = MultifunctionApp(history_db=path)
+        async with app.run_test() as pilot:
+            table = await self.open_history(app, pilot)
+            self.assertEqual(table.row_count, PAGE_SIZE * 3 + 10)
+            # Pages are loaded in a worker when they are first needed
+            self.assertEqual(table.row(PAGE_SIZE + 5), HistoryTable.LOADING_ROW)
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            self.assertEqual(table.row(PAGE_SIZE + 5)[1], f"{PAGE_SIZE + 5} + 0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from textual.app import App, ComposeResult
+from textual.widgets import Static
+
+from widgets import clock
+from widgets.clock import Clock
+
+
+class ClockApp(App):
+    def compose(self) -> ComposeResult:
+        yield Static("shown", id="shown")
+        yield Static("hidden", id="hidden")
+
+    def on_mount(self) -> None:
+        self.query_one("#hidden").display = False
+
+
+class ClockTest(unittest.IsolatedAsyncioTestCase):
+    async def test_visible_subscribers_tick_every_frame(self):
+        app = ClockApp()
+        async with app.run_test() as pilot:
+            shared = Clock.for_app(app)
+            self.assertIs(Clock.for_app(app), shared)
+            ticks = []
+            shared.subscribe(app.query_one("#shown"), ticks.append)
+            # Subscribing ticks at once
+            self.assertEqual(len(ticks), 1)
+            self.assertEqual(shared._interval, clock.FRAME)
+            await pilot.pause(0.2)
+            self.assertGreater(len(ticks), 3)
+            self.assertEqual(ticks, sorted(ticks))
+
+            shared.unsubscribe(app.query_one("#shown"))
+            self.assertIsNone(shared._timer)
+            count = len(ticks)
+            await pilot.pause(0.1)
+            self.assertEqual(len(ticks), count)
+
+    async def test_hidden_subscribers(self):
+        app = ClockApp()
+        async with app.run_test() as pilot:
+            shared = Clock.for_app(app)
+            hidden = app.query_one("#hidden")
+            ticks = []
+            shared.subscribe(hidden, ticks.append)
+            # Not ticked at all, the clock only idles to notice it being shown
+            self.assertEqual(ticks, [])
+            self.assertEqual(shared._interval, clock.IDLE_INTERVAL)
+
+            shared.subscribe(hidden, ticks.append, hidden_interval=0.05)
+            self.assertEqual(len(ticks), 1)
+            self.assertEqual(shared._interval, 0.05)
+            await pilot.pause(0.3)
+            self.assertGreater(len(ticks), 2)
+
+            hidden.display = True
+            await pilot.pause()
+            shared.wake()
+            self.assertEqual(shared._interval, clock.FRAME)
+
+    async def test_removed_owners_are_dropped(self):
+        app = ClockApp()
+        async with app.run_test() as pilot:
+            shared = Clock.for_app(app)
+            shown = app.query_one("#shown")
+            shared.subscribe(shown, lambda now: None)
+            await shown.remove()
+            shared.tick()
+            self.assertEqual(shared.subscriptions, {})
+            self.assertIsNone(shared._interval)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from widgets import analysis, compressed, parallel
+from widgets.analysis import StreamingAnalyzer, scan_file
+from widgets.compressed import detect, detect_file, open_stream
+
+from tests.test_analysis import TEXT, counts, reference
+
+DATA = (TEXT * 200).encode("utf-8")
+COMPRESSORS = {"gzip": gzip.compress, "bzip2": bz2.compress, "xz": lzma.compress}
+
+
+class CompressedTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as file:
+            file.write(data)
+        return path
+
+    def test_detect(self):
+        self.assertIsNone(detect(b"plain text"))
+        self.assertIsNone(detect(b""))
+        for name, compress in COMPRESSORS.items():
+            with self.subTest(name=name):
+                self.assertEqual(detect(compress(b"x")[:6]), name)
+        # By content, not by name
+        self.assertEqual(detect_file(self.write("misnamed.txt", gzip.compress(DATA))), "gzip")
+        self.assertIsNone(detect_file(self.write("plain.gz", DATA)))
+
+    def test_streams_equal_the_plain_text(self):
+        plain = self.write("plain.txt", DATA)
+        with open_stream(plain) as (raw, stream):
+            self.assertIs(raw, stream)
+            self.assertEqual(stream.read(), DATA)
+        for name, compress in COMPRESSORS.items():
+            path = self.write(f"text.{name}", compress(DATA))
+            with self.subTest(name=name), open_stream(path) as (raw, stream):
+                self.assertEqual(stream.read(), DATA)
+                self.assertEqual(raw.tell(), os.path.getsize(path))
+
+    def test_scan_matches_the_plain_text(self):
+        expected = reference(DATA.decode("utf-8"))
+        for name, compress in COMPRESSORS.items():
+            path = self.write(f"text.{name}", compress(DATA))
+            reports = []
+            # Chunks that cut multi-byte characters in half
+            with mock.patch.object(analysis, "CHUNK_SIZE", 333), mock.patch.object(analysis, "PROGRESS_INTERVAL", 0):
+                analyzer = scan_file(path, StreamingAnalyzer(), progress=reports.append)
+            with self.subTest(name=name):
+                self.assertEqual(counts(analyzer), expected)
+                # Progress counts the compressed bytes
+                self.assertEqual(reports[-1].bytes_read, os.path.getsize(path))
+                self.assertEqual(reports[-1].fraction, 1.0)
+
+    def test_truncated_archives_raise(self):
+        for name, compress in COMPRESSORS.items():
+            data = compress(DATA)
+            path = self.write(f"truncated.{name}", data[: len(data) // 2])
+            with self.subTest(name=name), self.assertRaises((OSError, *compressed.ERRORS)):
+                scan_file(path, StreamingAnalyzer())
+
+    @unittest.skipIf(compressed.zstd is not None or compressed.zstandard is not None, "zstd is available")
+    def test_zstd_without_a_decompressor(self):
+        path = self.write("text.zst", compressed.MAGIC["zstd"] + b"rest of the frame")
+        with self.assertRaises(compressed.UnsupportedCompression):
+            scan_file(path, StreamingAnalyzer())
+
+    def test_compressed_files_are_not_split(self):
+        path = self.write("text.gz", gzip.compress(DATA))
+        with mock.patch.object(parallel, "PARALLEL_THRESHOLD", 0), mock.patch.object(parallel, "available_cpus", return_value=4):
+            self.assertFalse(parallel.should_scan_in_parallel(path))
+            self.assertTrue(parallel.should_scan_in_parallel(self.write("text.txt", DATA)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import doctest
+import unittest
+from decimal import Decimal
+
+from widgets import expression
+from widgets.expression import ExpressionError, compile_expression, evaluate, evaluate_many
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(expression))
+    return tests
+
+
+class EvaluateTest(unittest.TestCase):
+    def test_precedence_and_associativity(self):
+        cases = {
+            "1 + 2 * 3": "7",
+            "(1 + 2) * 3": "9",
+            "10 - 4 - 3": "3",
+            "64 / 4 / 2": "8",
+            "2 ^ 3 ^ 2": "512",
+            "-2 ^ 2": "-4",
+            "2 ^ -1": "0.5",
+            "--3": "3",
+            "+4 - -1": "5",
+            "50%": "0.5",
+            "200 * 10%%": "0.2",
+            "2 × 3 ÷ 4 − 1": "0.5",
+            "2 ** 10": "1024",
+            "  7  ": "7",
+        }
+        for source, expected in cases.items():
+            with self.subTest(source=source):
+                self.assertEqual(evaluate(source), Decimal(expected))
+
+    def test_variables(self):
+        self.assertEqual(evaluate("x * y + 1", {"x": Decimal(6), "y": 7}), Decimal(43))
+        self.assertEqual(compile_expression("x * y + x").names, frozenset({"x", "y"}))
+        self.assertEqual(evaluate_many(["a", "a * 2"], {"a": Decimal("1.5")}), [Decimal("1.5"), Decimal(3)])
+
+    def test_precision(self):
+        self.assertEqual(evaluate("1 / 3", precision=5), Decimal("0.33333"))
+        # The global context is left alone
+        self.assertEqual(len(str(evaluate("1 / 3"))), 30)
+
+    def test_errors(self):
+        cases = {
+            "": None,
+            "1 +": 4,
+            "(1 + 2": 1,
+            "1 $ 2": 3,
+            "1 2": 3,
+            ")": 1,
+        }
+        for source, position in cases.items():
+            with self.subTest(source=source), self.assertRaises(ExpressionError) as raised:
+                evaluate(source)
+            if position is not None:
+                self.assertEqual(raised.exception.position + 1, position)
+
+    def test_evaluation_errors(self):
+        for source in ("1 / 0", "x + 1", "0 ^ -1"):
+            with self.subTest(source=source), self.assertRaises(ExpressionError):
+                evaluate(source)
+        # Past the range of a float is still finite
+        self.assertEqual(evaluate("10 ^ 400"), Decimal("1E+400"))
+        # Still a ValueError for callers that don't know the engine
+        self.assertRaises(ValueError, evaluate, "1 / 0")
+
+    def test_compiled_once(self):
+        self.assertIs(compile_expression("3 * (4 + 5)"), compile_expression("3 * (4 + 5)"))
+
+
+if __name__ == "__main__":
+    unittest.main()
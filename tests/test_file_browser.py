@@ -0,0 +1,137 @@
+import gzip
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from textual.app import App, ComposeResult
+
+from widgets import file_browser
+from widgets.file_browser import (
+    ListingCache, TextFileTree, format_size, is_text_file, list_directory, looks_like_text, walk_text_files,
+)
+
+
+def write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+class FileBrowserTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = os.path.realpath(directory.name)
+        write(os.path.join(self.root, "b.txt"), b"Some words.")
+        write(os.path.join(self.root, "A.md"), b"# Title")
+        write(os.path.join(self.root, "notes"), "Zażółć gęślą jaźń".encode())
+        write(os.path.join(self.root, "image.png"), b"plain text, but a png")
+        write(os.path.join(self.root, "data"), b"\0\1\2")
+        write(os.path.join(self.root, "packed.txt.gz"), gzip.compress(b"Packed words."))
+        write(os.path.join(self.root, "sub", "c.txt"), b"More words.")
+        write(os.path.join(self.root, "node_modules", "d.txt"), b"Skipped.")
+
+
+class ListingTest(FileBrowserTestCase):
+    def test_text_detection(self):
+        self.assertTrue(is_text_file(os.path.join(self.root, "notes"), "notes"))
+        self.assertFalse(is_text_file(os.path.join(self.root, "image.png"), "image.png"))
+        self.assertFalse(looks_like_text(os.path.join(self.root, "data")))
+        self.assertTrue(looks_like_text(os.path.join(self.root, "packed.txt.gz")))
+        self.assertFalse(looks_like_text(os.path.join(self.root, "missing")))
+        # A character cut off by SNIFF_BYTES is still text
+        path = os.path.join(self.root, "cut")
+        write(path, b"a" * (file_browser.SNIFF_BYTES - 1) + "ż".encode())
+        self.assertTrue(looks_like_text(path))
+
+    def test_list_directory(self):
+        listing = list_directory(self.root)
+        self.assertEqual([listed.name for listed in listing], ["sub", "A.md", "b.txt", "notes", "packed.txt.gz"])
+        self.assertEqual(listing[2].size, len(b"Some words."))
+        self.assertEqual(list_directory(os.path.join(self.root, "missing")), [])
+
+    def test_walk_text_files(self):
+        files = walk_text_files(self.root, limit=10)
+        self.assertEqual([os.path.relpath(path, self.root) for path in files], [
+            "A.md", "b.txt", "notes", "packed.txt.gz", os.path.join("sub", "c.txt"),
+        ])
+        # One more than the limit, so callers can tell there are more
+        self.assertEqual(len(walk_text_files(self.root, limit=2)), 3)
+
+    def test_listing_cache(self):
+        cache = ListingCache(max_listings=2)
+        cache.put("a", 1, [])
+        cache.put("b", 1, [])
+        self.assertEqual(cache.get("a", 1), [])
+        self.assertIsNone(cache.get("a", 2))
+        cache.put("c", 1, [])
+        # "b" was the least recently used
+        self.assertIsNone(cache.get("b", 1))
+        self.assertEqual(cache.get("a", 1), [])
+
+    def test_format_size(self):
+        self.assertEqual(format_size(512), "512 B")
+        self.assertEqual(format_size(1536), "1.5 KB")
+        self.assertEqual(format_size(3 * 1024 ** 4), "3,072.0 GB")
+
+
+class TreeApp(App):
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def compose(self) -> ComposeResult:
+        yield TextFileTree(self.path)
+
+
+class TextFileTreeTest(FileBrowserTestCase, unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        super().setUp()
+        TextFileTree.listings.clear()
+
+    async def load(self, app, pilot) -> TextFileTree:
+        tree = app.query_one(TextFileTree)
+        for _ in range(50):
+            await pilot.pause(0.02)
+            if tree.root.children:
+                break
+        return tree
+
+    async def test_only_text_files_are_shown(self):
+        app = TreeApp(self.root)
+        async with app.run_test() as pilot:
+            tree = await self.load(app, pilot)
+            names = [str(child.label) for child in tree.root.children]
+            self.assertEqual(names, ["sub", "A.md", "b.txt", "notes", "packed.txt.gz"])
+            label = tree.render_label(tree.root.children[2], tree.rich_style, tree.rich_style).plain
+            self.assertIn("b.txt  11 B", label)
+
+    async def test_nodes_are_added_without_a_stat(self):
+        checked = []
+        is_dir = Path.is_dir
+
+        def counting_is_dir(path, *args, **kwargs):
+            checked.append(path)
+            return is_dir(path, *args, **kwargs)
+
+        with mock.patch.object(Path, "is_dir", counting_is_dir):
+            app = TreeApp(self.root)
+            async with app.run_test() as pilot:
+                tree = await self.load(app, pilot)
+                self.assertEqual([child.allow_expand for child in tree.root.children], [True, False, False, False, False])
+        self.assertFalse([path for path in checked if str(path).startswith(self.root + os.sep)])
+
+    async def test_entries_past_the_limit_are_counted(self):
+        with mock.patch.object(file_browser, "MAX_ENTRIES", 2):
+            app = TreeApp(self.root)
+            async with app.run_test() as pilot:
+                tree = await self.load(app, pilot)
+                self.assertEqual(len(tree.root.children), 2)
+                label = tree.render_label(tree.root, tree.rich_style, tree.rich_style).plain
+                self.assertIn("… 3 more not shown", label)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+
+from widgets.history_db import HistoryDatabase
+from widgets.history_store import HistoryStore
+
+
+class HistoryDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "nested", "history.db")
+
+    def open(self, **kwargs) -> HistoryDatabase:
+        database = HistoryDatabase(self.path, **kwargs)
+        self.addCleanup(database.close)
+        return database
+
+    def test_round_trip(self):
+        database = HistoryDatabase(self.path)
+        store = HistoryStore()
+        entries = [
+            store.append(Decimal("1.5"), "plus", Decimal(2), Decimal("3.5")),
+            store.append(None, "expression", None, Fraction(1, 3), source="1 / 3", backend="fraction"),
+        ]
+        for entry in entries:
+            database.add(entry)
+        self.assertTrue(database.flush(timeout=5))
+        database.close()
+
+        reopened = self.open()
+        self.assertEqual(reopened.count(), 2)
+        self.assertEqual(reopened.next_id, 2)
+        rows = reopened.rows(0, 10)
+        self.assertEqual([row.row()[1:] for row in rows], [entry.row()[1:] for entry in entries])
+        self.assertEqual(rows[1].result, Fraction(1, 3))
+        self.assertEqual(rows[0].left, Decimal("1.5"))
+
+    def test_batches_and_paging(self):
+        database = self.open(flush_interval=0.01, batch_size=7)
+        store = HistoryStore(capacity=10)
+        for number in range(50):
+            database.add(store.append(Decimal(number), "plus", Decimal(0), Decimal(number)))
+        self.assertTrue(database.flush(timeout=5))
+        self.assertEqual(database.count(), 50)
+        self.assertEqual(database.newest_id(), 49)
+        self.assertEqual([row.sequence for row in database.rows(45, 10)], [45, 46, 47, 48, 49])
+        database.clear()
+        self.assertEqual(database.count(), 0)
+        self.assertEqual(database.newest_id(), -1)
+
+    def test_instances_sharing_a_file_keep_each_others_rows(self):
+        first, second = self.open(), self.open()
+        for database in (first, second):
+            store = HistoryStore(first_sequence=database.next_id)
+            for number in range(5):
+                database.add(store.append(Decimal(number), "plus", Decimal(0), Decimal(number)))
+            self.assertTrue(database.flush(timeout=5))
+        self.assertEqual(first.count(), 10)
+        self.assertEqual([row.sequence for row in first.rows(0, 10)], list(range(10)))
+
+    def test_failed_writes_are_dropped(self):
+        database = self.open()
+        store = HistoryStore()
+        with sqlite3.connect(self.path) as connection:
+            connection.execute("ALTER TABLE calculations RENAME TO moved")
+        connection.close()
+        database.add(store.append(Decimal(1), "plus", Decimal(1), Decimal(2)))
+        # The writer keeps going and waiters are still woken up
+        self.assertTrue(database.flush(timeout=5))
+        self.assertEqual(database.failed_rows, 1)
+        self.assertIsInstance(database.last_error, sqlite3.OperationalError)
+
+        with sqlite3.connect(self.path) as connection:
+            connection.execute("ALTER TABLE moved RENAME TO calculations")
+        connection.close()
+        database.add(store.append(Decimal(2), "plus", Decimal(2), Decimal(4)))
+        self.assertTrue(database.flush(timeout=5))
+        self.assertEqual(database.count(), 1)
+
+    def test_flush_after_close(self):
+        database = HistoryDatabase(self.path)
+        database.close()
+        self.assertFalse(database.flush())
+
+    def test_old_databases_get_the_backend_column(self):
+        os.makedirs(os.path.dirname(self.path))
+        with sqlite3.connect(self.path) as connection:
+            connection.execute(
+                "CREATE TABLE calculations (id INTEGER PRIMARY KEY, timestamp REAL NOT NULL, left TEXT, "
+                "operator TEXT NOT NULL, right TEXT, result TEXT NOT NULL, source TEXT)"
+            )
+            connection.execute("INSERT INTO calculations VALUES (4, 0, '1', 'plus', '1', '2', NULL)")
+        connection.close()
+        database = self.open()
+        self.assertEqual(database.next_id, 5)
+        (row,) = database.rows(0, 1)
+        self.assertEqual((row.sequence, row.backend, row.result), (4, "decimal", Decimal(2)))
+
+
+if __name__ == "__main__":
+    unittest.main()
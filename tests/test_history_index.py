@@ -0,0 +1,102 @@
+import random
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+from widgets.history_index import HistoryIndex, HistoryQuery
+from widgets.history_store import HistoryStore
+
+OPERATORS = ["plus", "minus", "multiply", "divide"]
+START = 1_700_000_000.0
+
+
+def add_random(store: HistoryStore, index: HistoryIndex, rng: random.Random, count: int) -> None:
+    for _ in range(count):
+        timestamp = START + store.next_sequence + rng.choice([0, 0, 0, -30])
+        if rng.random() < 0.2:
+            left, right = rng.randint(1, 99), rng.randint(1, 9)
+            entry = store.append(None, "expression", None, Decimal(left + right), source=f"({left} + {right})", timestamp=timestamp)
+        else:
+            left, right = Decimal(rng.randint(-50, 500)), Decimal(rng.randint(1, 99))
+            entry = store.append(left, rng.choice(OPERATORS), right, left * right, timestamp=timestamp)
+        index.add(entry)
+
+
+def random_query(rng: random.Random, store: HistoryStore) -> HistoryQuery:
+    query = HistoryQuery()
+    if rng.random() < 0.4:
+        query.operator = rng.choice(OPERATORS + ["expression"])
+    if rng.random() < 0.4:
+        low = Decimal(rng.randint(-1000, 20000))
+        query.min_result, query.max_result = rng.choice([(low, low + 5000), (low, None), (None, low)])
+    if rng.random() < 0.3:
+        query.since = START + rng.randint(0, store.next_sequence)
+    if rng.random() < 0.2:
+        query.until = START + rng.randint(0, store.next_sequence)
+    if rng.random() < 0.6:
+        query.text = rng.choice(["1", "7", "+ 1", "12", "× 3", "(4", "99", "-", "5 ÷", "zz"])
+    return query
+
+
+class HistoryIndexTest(unittest.TestCase):
+    def test_matches_brute_force_while_entries_are_dropped(self):
+        rng = random.Random(1)
+        store = HistoryStore(capacity=500)
+        index = HistoryIndex(store)
+        for _ in range(8):
+            add_random(store, index, rng, 400)
+            for _ in range(60):
+                query = random_query(rng, store)
+                expected = [entry for entry in store if query.matches(entry)]
+                with self.subTest(query=query):
+                    self.assertEqual(index.search(query, limit=None), expected)
+                    self.assertEqual(index.search(query, limit=3), expected[-3:])
+
+    def test_dropped_entries_are_swept_out(self):
+        rng = random.Random(2)
+        store = HistoryStore(capacity=200)
+        index = HistoryIndex(store)
+        add_random(store, index, rng, 200)
+        full = sum(map(len, index._grams.values()))
+        for _ in range(20):
+            add_random(store, index, rng, 200)
+            # Two rounds of the sweep at most are behind: postings never grow past that
+            self.assertLess(sum(map(len, index._grams.values())), 3 * full)
+            self.assertLessEqual(len(index._times), 2 * store.capacity)
+
+    def test_rebuild_and_clear(self):
+        rng = random.Random(3)
+        store = HistoryStore(capacity=100)
+        index = HistoryIndex(store)
+        add_random(store, index, rng, 250)
+        query = HistoryQuery(text="1")
+        found = index.search(query)
+        index.rebuild()
+        self.assertEqual(index.search(query), found)
+        store.clear()
+        index.clear()
+        self.assertEqual(index.search(query), [])
+
+
+class HistoryQueryTest(unittest.TestCase):
+    def test_parse(self):
+        now = datetime(2024, 5, 1, 15, 0).timestamp()
+        query = HistoryQuery.parse("op:× result:10..100 since:12:30 last:15m 5 +", now=now)
+        self.assertEqual(query.operator, "multiply")
+        self.assertEqual((query.min_result, query.max_result), (Decimal(10), Decimal(100)))
+        # The later of the two wins, they are applied in order
+        self.assertEqual(query.since, now - 15 * 60)
+        self.assertEqual(query.text, "5 +")
+        self.assertEqual(HistoryQuery.parse("result:>5").min_result, Decimal(5))
+        self.assertEqual(HistoryQuery.parse("result:<=5").max_result, Decimal(5))
+        self.assertEqual(HistoryQuery.parse("until:13:00:30", now=now).until, datetime(2024, 5, 1, 13, 0, 30).timestamp())
+        self.assertTrue(HistoryQuery.parse("   ").empty)
+
+    def test_parse_errors(self):
+        for source in ("op:pow", "result:abc", "last:5y", "since:25:00"):
+            with self.subTest(source=source), self.assertRaises(ValueError):
+                HistoryQuery.parse(source)
+
+
+if __name__ == "__main__":
+    unittest.main()
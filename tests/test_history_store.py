@@ -0,0 +1,56 @@
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+
+from widgets.history_store import HistoryStore
+
+
+def fill(store: HistoryStore, count: int) -> None:
+    for number in range(count):
+        store.append(Decimal(number), "plus", Decimal(1), Decimal(number + 1), timestamp=1000.0 + number)
+
+
+class HistoryStoreTest(unittest.TestCase):
+    def test_keeps_the_newest_entries(self):
+        store = HistoryStore(capacity=5)
+        fill(store, 12)
+        self.assertEqual(len(store), 5)
+        self.assertEqual([entry.sequence for entry in store], [7, 8, 9, 10, 11])
+        self.assertEqual(store[0].sequence, 7)
+        self.assertEqual(store[-1].sequence, 11)
+        self.assertEqual(store.next_sequence, 12)
+        with self.assertRaises(IndexError):
+            store[5]
+
+    def test_by_sequence(self):
+        store = HistoryStore(capacity=5, first_sequence=100)
+        fill(store, 8)
+        self.assertIsNone(store.by_sequence(102))
+        self.assertEqual(store.by_sequence(103).left, Decimal(3))
+        self.assertEqual(store.by_sequence(107).left, Decimal(7))
+        self.assertIsNone(store.by_sequence(108))
+
+    def test_clear_keeps_counting(self):
+        store = HistoryStore(capacity=3)
+        fill(store, 4)
+        store.clear()
+        self.assertEqual(len(store), 0)
+        self.assertEqual(list(store), [])
+        entry = store.append(None, "expression", None, Decimal(2), source="1 + 1")
+        self.assertEqual(entry.sequence, 4)
+        self.assertEqual(store.by_sequence(4), entry)
+
+    def test_rows(self):
+        store = HistoryStore()
+        keyed = store.append(Decimal(2), "multiply", Decimal(3), Decimal(6))
+        typed = store.append(None, "expression", None, Fraction(1, 3), source="1 / 3", backend="fraction")
+        self.assertEqual(keyed.row()[1:], ("2 × 3", "6"))
+        self.assertEqual(typed.row()[1:], ("1 / 3", "1/3 [fraction]"))
+
+    def test_rejects_empty_capacity(self):
+        with self.assertRaises(ValueError):
+            HistoryStore(capacity=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from textual.app import App, ComposeResult
+
+from widgets import instrumentation
+from widgets.dev_panel import DevPanel
+from widgets.instrumentation import Histogram, _bucket, _bucket_bounds
+
+
+class HistogramTest(unittest.TestCase):
+    def test_buckets_cover_their_values(self):
+        for ns in list(range(2000)) + [2 ** 20 - 1, 2 ** 20, 10 ** 9, 10 ** 12 + 7]:
+            low, high = _bucket_bounds(_bucket(ns))
+            with self.subTest(ns=ns):
+                self.assertLessEqual(low, ns)
+                self.assertLessEqual(ns, high)
+                # Within 12.5% of the bucket's values with SUB_BITS = 3
+                self.assertLessEqual(high - low, low / 8)
+
+    def test_percentiles_close_to_exact(self):
+        rng = random.Random(1)
+        values = [rng.lognormvariate(-7, 1.5) for _ in range(20000)]
+        samples = Histogram()
+        for value in values:
+            samples.record(value)
+        ordered = sorted(values)
+        for p in (50, 90, 99, 99.9):
+            exact = ordered[int(p / 100 * len(ordered)) - 1]
+            with self.subTest(p=p):
+                self.assertAlmostEqual(samples.percentile(p), exact, delta=exact / 8)
+        self.assertEqual(samples.count, len(values))
+        self.assertAlmostEqual(samples.mean, sum(values) / len(values), delta=1e-8)
+        self.assertAlmostEqual(samples.summary()["max"], max(values), delta=1e-8)
+        self.assertAlmostEqual(samples.summary()["min"], min(values), delta=1e-8)
+
+    def test_empty(self):
+        samples = Histogram()
+        self.assertEqual(samples.percentile(99), 0.0)
+        self.assertEqual(samples.mean, 0.0)
+
+
+class DisabledTest(unittest.TestCase):
+    def test_nothing_is_recorded_or_wrapped(self):
+        with mock.patch.object(instrumentation, "ENABLED", False):
+            def function():
+                return 1
+
+            self.assertIs(instrumentation.timed("test/disabled")(function), function)
+            instrumentation.record("test/disabled", 1.0)
+            with instrumentation.span("test/disabled"):
+                pass
+            instrumentation.trace("test", "message")
+        self.assertNotIn("test/disabled", instrumentation.histograms)
+
+
+class EnabledTest(unittest.TestCase):
+    def setUp(self):
+        enabled = mock.patch.object(instrumentation, "ENABLED", True)
+        enabled.start()
+        self.addCleanup(enabled.stop)
+        self.addCleanup(instrumentation.reset)
+        instrumentation.reset()
+
+    def test_timed_and_span(self):
+        @instrumentation.timed("test/timed")
+        def function(value):
+            return value * 2
+
+        self.assertEqual(function(4), 8)
+        self.assertEqual(function.__name__, "function")
+        with instrumentation.span("test/span"):
+            pass
+        self.assertEqual(instrumentation.histogram("test/timed").count, 1)
+        self.assertEqual(instrumentation.histogram("test/span").count, 1)
+        instrumentation.reset()
+        # The wrapper keeps recording into the emptied histogram
+        function(1)
+        self.assertEqual(instrumentation.histogram("test/timed").count, 1)
+
+    def test_trace_is_rate_limited(self):
+        for number in range(instrumentation.TRACE_BURST + 25):
+            instrumentation.trace("test", "message %d", number)
+        messages = [message for _, _, channel, message in instrumentation.events if channel == "test"]
+        self.assertEqual(messages[:2], ["message 0", "message 1"])
+        self.assertLessEqual(len(messages), instrumentation.TRACE_BURST + 1)
+        self.assertGreaterEqual(instrumentation.dropped()["test"], 24)
+
+    def test_dump(self):
+        instrumentation.record("test/dump", 0.002)
+        instrumentation.trace("test", "dumped")
+        with tempfile.TemporaryDirectory() as directory:
+            path = instrumentation.dump(os.path.join(directory, "profile.json"))
+            with open(path) as file:
+                data = json.load(file)
+        self.assertEqual(data["histograms"]["test/dump"]["count"], 1)
+        self.assertEqual(data["events"][-1]["message"], "dumped")
+
+
+    def test_recording_from_threads_while_reading(self):
+        stop = threading.Event()
+
+        def record(thread: int):
+            number = 0
+            while not stop.is_set():
+                number += 1
+                instrumentation.record(f"test/thread{thread}/{number % 50}", number * 1e-6)
+                instrumentation.trace(f"thread{thread}", "event %d", number)
+
+        threads = [threading.Thread(target=record, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        try:
+            for _ in range(300):
+                instrumentation.summaries()
+                instrumentation.recent_events()
+                instrumentation.dropped()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(instrumentation.summaries()), len(instrumentation.histograms))
+
+
+class PanelApp(App):
+    def compose(self) -> ComposeResult:
+        yield DevPanel()
+
+
+class DevPanelTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        enabled = mock.patch.object(instrumentation, "ENABLED", True)
+        enabled.start()
+        self.addCleanup(enabled.stop)
+        self.addCleanup(instrumentation.reset)
+        instrumentation.reset()
+
+    async def test_refresh_and_dump(self):
+        instrumentation.record("test/panel", 0.001)
+        instrumentation.trace("test", "shown in the panel")
+        app = PanelApp()
+        async with app.run_test() as pilot:
+            panel = app.query_one(DevPanel)
+            panel.refresh_stats()
+            self.assertIn("[test] shown in the panel", panel.query_one("#dev-events").lines)
+            with tempfile.TemporaryDirectory() as directory:
+                missing = os.path.join(directory, "missing", "profile.json")
+                with mock.patch.object(instrumentation, "DUMP_PATH", missing):
+                    panel.dump()
+                await pilot.pause()
+                self.assertFalse(os.path.exists(missing))
+            (notification,) = app._notifications
+            self.assertEqual(notification.severity, "error")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import csv
+import io
+import os
+import random
+import statistics
+import tempfile
+import unittest
+from unittest import mock
+
+from textual.widgets import TabbedContent
+
+from main import MultifunctionApp
+from widgets.laps import LapRecorder, P2Quantile
+from widgets.stopwatch import Stopwatch
+
+
+def nearest_rank(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p * (len(ordered) - 1)))]
+
+
+class P2QuantileTest(unittest.TestCase):
+    def test_exact_below_five_values(self):
+        quantile = P2Quantile(0.5)
+        self.assertIsNone(quantile.value)
+        for value in (3.0, 1.0, 2.0):
+            quantile.add(value)
+        self.assertEqual(quantile.value, 2.0)
+
+    def test_close_to_the_exact_quantile(self):
+        rng = random.Random(1)
+        for p in (0.5, 0.95):
+            for draw in (rng.random, lambda: rng.expovariate(1.0), lambda: rng.gauss(10, 2)):
+                values = [draw() for _ in range(5000)]
+                quantile = P2Quantile(p)
+                for value in values:
+                    quantile.add(value)
+                spread = nearest_rank(values, 0.99) - nearest_rank(values, 0.01)
+                with self.subTest(p=p, draw=draw):
+                    self.assertAlmostEqual(quantile.value, nearest_rank(values, p), delta=0.03 * spread)
+
+
+class LapRecorderTest(unittest.TestCase):
+    def test_statistics_match_the_laps(self):
+        rng = random.Random(2)
+        laps = LapRecorder()
+        durations = [rng.uniform(0.5, 3.0) for _ in range(200)]
+        split = 0.0
+        for duration in durations:
+            split += duration
+            self.assertAlmostEqual(laps.record(split), duration)
+        self.assertEqual(len(laps), 200)
+        self.assertAlmostEqual(laps.mean, statistics.fmean(durations))
+        self.assertAlmostEqual(laps.stddev, statistics.stdev(durations))
+        self.assertAlmostEqual(laps.minimum, min(durations))
+        self.assertAlmostEqual(laps.maximum, max(durations))
+        self.assertIn("Laps 200", laps.summary())
+
+    def test_reset(self):
+        laps = LapRecorder()
+        laps.record(1.0)
+        self.assertEqual(laps.stddev, 0.0)
+        laps.reset()
+        self.assertEqual(len(laps), 0)
+        self.assertEqual(laps.summary(), "No laps")
+
+    def test_write_csv(self):
+        laps = LapRecorder()
+        for split in (1.5, 4.0, 4.25):
+            laps.record(split)
+        file = io.StringIO()
+        laps.write_csv(file)
+        rows = list(csv.reader(io.StringIO(file.getvalue())))
+        self.assertEqual(rows[0], ["lap", "lap_seconds", "split_seconds"])
+        self.assertEqual(rows[1:], [
+            ["1", "1.500000", "1.500000"],
+            ["2", "2.500000", "4.000000"],
+            ["3", "0.250000", "4.250000"],
+        ])
+
+
+class StopwatchExportTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        environment = mock.patch.dict(os.environ, {
+            "XDG_CACHE_HOME": os.path.join(directory.name, "cache"),
+            "XDG_DATA_HOME": os.path.join(directory.name, "data"),
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        for name in ("KALKULATOR_HISTORY_DB", "KALKULATOR_REPLAY", "KALKULATOR_READING_SPEED"):
+            os.environ.pop(name, None)
+
+    async def test_export(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            app.query_one(TabbedContent).active = "timer"
+            await pilot.pause()
+            stopwatch = app.query(Stopwatch).first()
+            self.assertIsNone(stopwatch.export_laps(os.path.join(self.directory, "empty.csv")))
+
+            stopwatch.start_timer()
+            stopwatch.lap()
+            stopwatch.lap()
+            stopwatch.stop_timer()
+            path = stopwatch.export_laps(os.path.join(self.directory, "laps.csv"))
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual(len(list(csv.reader(file))), 3)
+
+            # A directory that doesn't exist is reported, not raised
+            missing = os.path.join(self.directory, "missing", "laps.csv")
+            self.assertIsNone(stopwatch.export_laps(missing))
+            self.assertFalse(os.path.exists(missing))
+
+    async def test_export_button_uses_the_default_name(self):
+        app = MultifunctionApp()
+        async with app.run_test() as pilot:
+            app.query_one(TabbedContent).active = "timer"
+            await pilot.pause()
+            stopwatch = app.query(Stopwatch).first()
+            stopwatch.start_timer()
+            stopwatch.lap()
+            # laps-<date>-<time>.csv goes to the working directory
+            self.addCleanup(os.chdir, os.getcwd())
+            os.chdir(self.directory)
+            await pilot.click("#timer-export")
+            await pilot.pause()
+            self.assertEqual(len([name for name in os.listdir(self.directory) if name.startswith("laps-")]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from decimal import Decimal, getcontext
+from fractions import Fraction
+
+from widgets import expression
+from widgets.expression import ExpressionError, evaluate
+from widgets.numeric import (
+    BACKENDS, DECIMAL, FLOAT, FRACTION, MAX_PRECISION, DecimalBackend, entry_text, parse_number,
+)
+
+
+class BackendTest(unittest.TestCase):
+    def test_number(self):
+        self.assertEqual(DECIMAL.number(0.1), Decimal("0.1"))
+        self.assertEqual(DECIMAL.number("2.50"), Decimal("2.50"))
+        self.assertEqual(DECIMAL.number(Fraction(1, 4)), Decimal("0.25"))
+        self.assertEqual(FLOAT.number(Decimal("0.5")), 0.5)
+        self.assertEqual(FRACTION.number("0.1"), Fraction(1, 10))
+        self.assertEqual(FRACTION.number(Decimal("1.5")), Fraction(3, 2))
+
+    def test_decimal_context_is_local(self):
+        backend = DecimalBackend(5, "ROUND_DOWN")
+        precision = getcontext().prec
+        with backend.context():
+            self.assertEqual(Decimal(2) / 3, Decimal("0.66666"))
+        self.assertEqual(getcontext().prec, precision)
+        self.assertEqual(backend.number(Fraction(2, 3)), Decimal("0.66666"))
+
+    def test_tags(self):
+        self.assertEqual([backend.tag for backend in BACKENDS.values()], ["decimal", "float", "fraction"])
+        self.assertEqual(DecimalBackend().tag, "decimal")
+        self.assertEqual(DecimalBackend(50, "ROUND_UP").tag, "decimal(prec=50, ROUND_UP)")
+        self.assertEqual(DecimalBackend(), DECIMAL)
+        self.assertEqual(len({DecimalBackend(), DECIMAL, FLOAT}), 2)
+
+    def test_invalid_settings(self):
+        for precision, rounding in ((0, "ROUND_UP"), (MAX_PRECISION + 1, "ROUND_UP"), (10, "ROUND_SIDEWAYS")):
+            with self.subTest(precision=precision, rounding=rounding), self.assertRaises(ValueError):
+                DecimalBackend(precision, rounding)
+
+
+class EntryTextTest(unittest.TestCase):
+    def test_keypad_digits(self):
+        self.assertEqual(entry_text(Fraction(1, 4)), "0.25")
+        self.assertEqual(entry_text(Fraction(1, 3), precision=5), "0.33333")
+        self.assertEqual(entry_text(1e-06), "0.000001")
+        self.assertEqual(entry_text(0.1), "0.1")
+        self.assertEqual(entry_text(Decimal("1E+3")), "1000")
+        self.assertEqual(entry_text(Decimal("-0.50")), "-0.50")
+
+    def test_parse_number(self):
+        self.assertEqual(parse_number("1/3"), Fraction(1, 3))
+        self.assertEqual(parse_number("0.5"), Decimal("0.5"))
+        self.assertIsInstance(parse_number("2"), Decimal)
+
+
+class BackendEvaluateTest(unittest.TestCase):
+    def test_results_per_backend(self):
+        self.assertEqual(evaluate("0.1 + 0.2", backend=FLOAT), 0.1 + 0.2)
+        self.assertEqual(evaluate("0.1 + 0.2", backend=FRACTION), Fraction(3, 10))
+        self.assertEqual(evaluate("1 / 3 * 3", backend=FRACTION), 1)
+        self.assertEqual(evaluate("2 ^ -2", backend=FRACTION), Fraction(1, 4))
+        self.assertEqual(evaluate("1 / 3", backend=DecimalBackend(3)), Decimal("0.333"))
+        # Non-integer powers of a Fraction are floats
+        self.assertIsInstance(evaluate("2 ^ 0.5", backend=FRACTION), float)
+        self.assertEqual(evaluate("10 ^ 400", backend=FRACTION), 10 ** 400)
+
+    def test_exact_powers_are_bounded(self):
+        with self.assertRaisesRegex(ExpressionError, f"over {expression.MAX_EXACT_DIGITS} digits"):
+            evaluate("10 ^ 5000", backend=FRACTION)
+        with self.assertRaises(ExpressionError):
+            evaluate("(1 / 7) ^ -5000", backend=FRACTION)
+
+    def test_errors_per_backend(self):
+        for backend in BACKENDS.values():
+            for source in ("1 / 0", "(-8) ^ (1 / 3)", "10 ^ 1000000"):
+                with self.subTest(backend=backend, source=source), self.assertRaises(ExpressionError):
+                    evaluate(source, backend=backend)
+
+
+if __name__ == "__main__":
+    unittest.main()
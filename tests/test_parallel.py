@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from widgets import parallel
+from widgets.analysis import SentenceReservoir, StreamingAnalyzer, scan_file
+from widgets.parallel import scan_file_parallel, split_ranges
+
+TEXT = "Zażółć gęślą jaźń. The quick brown fox jumps over the lazy dog! Did it? " * 200
+
+
+class SplitRangesTest(unittest.TestCase):
+    def test_ranges_cover_the_buffer_on_whitespace(self):
+        buffer = TEXT.encode("utf-8")
+        for step in (1, 10, 333, 4096):
+            with self.subTest(step=step), mock.patch.object(parallel, "MIN_RANGE_SIZE", step):
+                ranges = split_ranges(buffer, 8)
+                self.assertEqual(ranges[0][0], 0)
+                self.assertEqual(ranges[-1][1], len(buffer))
+                for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                    self.assertEqual(end, start)
+                    self.assertIn(buffer[start:start + 1], b" \t\n\r\f\v")
+                # Every range decodes on its own, no character was cut
+                self.assertEqual("".join(buffer[start:end].decode("utf-8") for start, end in ranges), TEXT)
+
+    def test_prefers_sentence_ends(self):
+        buffer = TEXT.encode("utf-8")
+        with mock.patch.object(parallel, "MIN_RANGE_SIZE", 500):
+            ranges = split_ranges(buffer, 4)
+        self.assertGreater(len(ranges), 1)
+        for start, _ in ranges[1:]:
+            self.assertIn(buffer[start - 1:start], b".!?")
+
+    def test_no_whitespace_is_one_range(self):
+        buffer = b"x" * 1000
+        with mock.patch.object(parallel, "MIN_RANGE_SIZE", 10):
+            self.assertEqual(split_ranges(buffer, 8), [(0, 1000)])
+
+
+class ScanFileParallelTest(unittest.TestCase):
+    def test_same_counts_as_scan_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "text.txt")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(TEXT)
+            expected = scan_file(path, StreamingAnalyzer())
+            with mock.patch.object(parallel, "MIN_RANGE_SIZE", 1000):
+                result = scan_file_parallel(path, StreamingAnalyzer(reservoir=SentenceReservoir(seed=1)), workers=2)
+        for name in ("word_count", "sentence_count", "char_count", "syllable_count", "polysyllable_count"):
+            self.assertEqual(getattr(result, name), getattr(expected, name), name)
+        pool = result.result().sample_pool
+        self.assertTrue(pool)
+        # Sentences that straddle two ranges are never sampled
+        whole = {sentence.strip() for sentence in TEXT.replace("!", ".").replace("?", ".").split(".")}
+        self.assertTrue(all(sentence.strip() in whole for sentence in pool))
+
+
+if __name__ == "__main__":
+    unittest.main()
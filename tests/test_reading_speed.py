@@ -0,0 +1,104 @@
+import json
+import os
+import statistics
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from widgets import reading_speed
+from widgets.reading_speed import Estimate, ReadingSpeedProfile, SpeedBucket, default_profile_path, grade_bucket
+
+
+class SpeedBucketTest(unittest.TestCase):
+    def test_exact_until_full(self):
+        values = [200.0, 250.0, 230.0, 310.0]
+        bucket = SpeedBucket()
+        for value in values:
+            bucket.record(value)
+        self.assertEqual(bucket.weight, 4)
+        self.assertAlmostEqual(bucket.mean, statistics.fmean(values))
+        self.assertAlmostEqual(bucket.variance, statistics.pvariance(values))
+
+    def test_follows_the_reader_once_full(self):
+        bucket = SpeedBucket()
+        for _ in range(reading_speed.MAX_BUCKET_WEIGHT * 3):
+            bucket.record(200.0)
+        for _ in range(reading_speed.MAX_BUCKET_WEIGHT * 3):
+            bucket.record(400.0)
+        self.assertEqual(bucket.weight, reading_speed.MAX_BUCKET_WEIGHT)
+        self.assertGreater(bucket.mean, 390.0)
+
+
+class ProfileTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "nested" / "reading_speed.json"
+
+    def test_grade_bucket(self):
+        self.assertEqual([grade_bucket(ari) for ari in (-3, 0.4, 7.6, 50)], [1, 1, 8, 20])
+
+    def test_estimates(self):
+        profile = ReadingSpeedProfile(self.path)
+        self.assertIsNone(profile.estimate(8))
+        self.assertFalse(profile.record(8, 5000))
+        self.assertFalse(profile.record(8, 10))
+        self.assertIsNone(profile.estimate(8))
+
+        for wpm in (250, 260, 240):
+            self.assertTrue(profile.record(8, wpm))
+        estimate = profile.estimate(8)
+        self.assertAlmostEqual(estimate.wpm, 250)
+        self.assertEqual(estimate.weight, 3)
+        self.assertTrue(estimate.confident)
+        # Further away, the same calibrations count for less
+        farther = profile.estimate(12)
+        self.assertAlmostEqual(farther.wpm, 250)
+        self.assertLess(farther.weight, 1)
+        self.assertFalse(farther.confident)
+
+        # Between two grades the nearer one weighs more
+        for _ in range(3):
+            profile.record(14, 150)
+        self.assertLess(profile.estimate(12).wpm, 200)
+        self.assertGreater(profile.estimate(10).wpm, 200)
+        self.assertEqual(profile.calibrations, 6)
+
+    def test_spread_blocks_confidence(self):
+        profile = ReadingSpeedProfile(self.path)
+        for wpm in (100, 400, 100, 400):
+            profile.record(5, wpm)
+        estimate = profile.estimate(5)
+        self.assertAlmostEqual(estimate.spread, 150 / 250)
+        self.assertFalse(estimate.confident)
+        self.assertAlmostEqual(Estimate(250, 4, 0).minutes(1000), 4)
+
+    def test_saved_and_loaded(self):
+        profile = ReadingSpeedProfile(self.path)
+        profile.record(6, 220)
+        profile.record(15, 180)
+        loaded = ReadingSpeedProfile(self.path)
+        self.assertEqual(loaded.calibrations, 2)
+        self.assertEqual(loaded.estimate(6), profile.estimate(6))
+        self.assertEqual(os.listdir(self.path.parent), ["reading_speed.json"])
+
+    def test_unreadable_files_are_empty_profiles(self):
+        self.path.parent.mkdir(parents=True)
+        for content in ("not json", json.dumps({"version": 99, "calibrations": 1, "buckets": {}}), "[]", '{"version": 1}'):
+            self.path.write_text(content)
+            with self.subTest(content=content):
+                profile = ReadingSpeedProfile(self.path)
+                self.assertEqual(profile.calibrations, 0)
+                self.assertIsNone(profile.estimate(5))
+
+    def test_paths(self):
+        with mock.patch.dict(os.environ, {"XDG_DATA_HOME": "/data", reading_speed.SPEED_ENV: ""}):
+            self.assertEqual(default_profile_path(), Path("/data/kalkulator-python/reading_speed.json"))
+            self.assertEqual(ReadingSpeedProfile.from_environment().path, default_profile_path())
+        with mock.patch.dict(os.environ, {reading_speed.SPEED_ENV: str(self.path)}):
+            self.assertEqual(ReadingSpeedProfile.from_environment().path, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from time import monotonic
+
+from widgets import scheduler
+from widgets.scheduler import DeadlineScheduler
+
+
+class DeadlineSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_runs_in_deadline_order(self):
+        deadlines = DeadlineScheduler()
+        now = monotonic()
+        fired = []
+        for owner, delay in (("c", 0.06), ("a", 0.02), ("b", 0.04)):
+            deadlines.schedule(owner, now + delay, lambda owner=owner: fired.append(owner))
+        self.assertEqual(len(deadlines), 3)
+        self.assertEqual(deadlines.deadline("a"), now + 0.02)
+        await asyncio.sleep(0.15)
+        self.assertEqual(fired, ["a", "b", "c"])
+        self.assertEqual(len(deadlines), 0)
+        self.assertIsNone(deadlines.deadline("a"))
+
+    async def test_cancel_and_replace(self):
+        deadlines = DeadlineScheduler()
+        now = monotonic()
+        fired = []
+        deadlines.schedule("a", now + 0.02, lambda: fired.append("a"))
+        deadlines.schedule("b", now + 0.02, lambda: fired.append("b"))
+        # Replaces the earlier deadline of "a"
+        deadlines.schedule("a", now + 0.05, lambda: fired.append("a later"))
+        deadlines.cancel("b")
+        deadlines.cancel("missing")
+        self.assertEqual(len(deadlines), 1)
+        await asyncio.sleep(0.1)
+        self.assertEqual(fired, ["a later"])
+
+        deadlines.schedule("c", monotonic() + 10, lambda: fired.append("c"))
+        deadlines.cancel("c")
+        # Nothing left, so no timer is kept on the loop
+        self.assertIsNone(deadlines._handle)
+
+    async def test_run_due(self):
+        deadlines = DeadlineScheduler()
+        now = monotonic()
+        fired = []
+        for number in range(5):
+            deadlines.schedule(number, now - number, lambda number=number: fired.append(number))
+        deadlines.schedule("later", now + 10, lambda: fired.append("later"))
+        self.assertEqual(deadlines.run_due(), 5)
+        self.assertEqual(fired, [4, 3, 2, 1, 0])
+        self.assertEqual(deadlines.run_due(), 0)
+        self.assertEqual(deadlines._armed_for, now + 10)
+        deadlines.cancel("later")
+
+    async def test_heap_is_rebuilt_after_many_cancels(self):
+        deadlines = DeadlineScheduler()
+        later = monotonic() + 10
+        for number in range(scheduler.MAX_CANCELLED * 3):
+            deadlines.schedule(number, later + number, lambda: None)
+        for number in range(scheduler.MAX_CANCELLED * 2):
+            deadlines.cancel(number)
+        self.assertLessEqual(len(deadlines._heap), len(deadlines) + scheduler.MAX_CANCELLED + 1)
+        for number in list(deadlines._entries):
+            deadlines.cancel(number)
+        self.assertEqual(len(deadlines), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from widgets import tail
+from widgets.analysis import AnalysisCancelled, analyze_text
+from widgets.tail import Checkpoints, FileCheckpoint
+
+from tests.test_analysis import TEXT
+
+
+def summary(result) -> tuple:
+    return result.word_count, result.sentence_count, result.char_count, result.syllable_count, result.polysyllable_count
+
+
+class FileCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(directory.name, "growing.txt")
+
+    def write(self, data: bytes, mode: str = "ab", path: str = None) -> None:
+        with open(path or self.path, mode) as file:
+            file.write(data)
+
+    def test_appends_only_read_the_tail(self):
+        data = (TEXT * 20).encode("utf-8")
+        checkpoint = FileCheckpoint(self.path)
+        written = 0
+        # Cuts in the middle of words and of multi-byte characters
+        with mock.patch.object(tail, "CHUNK_SIZE", 10):
+            for end in range(0, len(data) + 37, 37):
+                end = min(end, len(data))
+                self.write(data[written:end])
+                self.assertEqual(checkpoint.scan(), end - written)
+                written = end
+                self.assertEqual(summary(checkpoint.result()), summary(analyze_text(data[:end].decode("utf-8", "ignore"))))
+        self.assertEqual(checkpoint.scan(), 0)
+        self.assertEqual(checkpoint.rescans, 0)
+        # result() leaves the checkpoint open for more text
+        self.write(b" more words")
+        checkpoint.scan()
+        self.assertEqual(summary(checkpoint.result()), summary(analyze_text(data.decode("utf-8") + " more words")))
+
+    def test_rewritten_files_are_scanned_again(self):
+        checkpoint = FileCheckpoint(self.path)
+        self.write(b"First version of the file. ", "wb")
+        checkpoint.scan()
+
+        self.write(b"Short.", "wb")
+        self.assertEqual(checkpoint.scan(), len(b"Short."))
+        self.assertEqual(checkpoint.rescans, 1)
+        self.assertEqual(checkpoint.result().word_count, 1)
+
+        # Same size or longer, but the start is different
+        self.write(b"Other! text here", "wb")
+        checkpoint.scan()
+        self.assertEqual(checkpoint.rescans, 2)
+        self.assertEqual(checkpoint.result().word_count, 3)
+
+        # Replaced by another file
+        other = os.path.join(self.directory, "other.txt")
+        self.write(b"Other! text here and more", "wb", path=other)
+        os.replace(other, self.path)
+        checkpoint.scan()
+        self.assertEqual(checkpoint.rescans, 3)
+        self.assertEqual(checkpoint.result().word_count, 5)
+
+    def test_cancelled_scan_resumes(self):
+        data = (TEXT * 5).encode("utf-8")
+        self.write(data)
+        checkpoint = FileCheckpoint(self.path)
+        polls = []
+
+        def cancelled():
+            polls.append(None)
+            return len(polls) == 3
+
+        with mock.patch.object(tail, "CHUNK_SIZE", 16):
+            with self.assertRaises(AnalysisCancelled):
+                checkpoint.scan(cancelled=cancelled)
+            self.assertEqual(checkpoint.offset, 32)
+            self.assertEqual(checkpoint.scan(), len(data) - 32)
+        self.assertEqual(summary(checkpoint.result()), summary(analyze_text(data.decode("utf-8"))))
+
+
+class CheckpointsTest(unittest.TestCase):
+    def test_keeps_the_most_recent(self):
+        checkpoints = Checkpoints(max_checkpoints=2)
+        first = checkpoints.create("a")
+        checkpoints.create("b")
+        self.assertIs(checkpoints.get("a"), first)
+        checkpoints.create("c")
+        self.assertIsNone(checkpoints.get("b"))
+        self.assertIs(checkpoints.get("a"), first)
+        self.assertIsNone(checkpoints.get("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
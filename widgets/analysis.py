@@ -0,0 +1,567 @@
+import codecs
+import math
+import os
+import random
+import re
+import string
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import filterfalse
+from time import monotonic
+from typing import Callable, Optional
+
+from .compressed import open_stream
+
+# Sentences end in ?.! (a run of them counts as a single terminator)
+SENTENCE_END = re.compile(r"[.!?]+")
+# Everything str.isalnum() rejects: non-word characters and the underscore
+NON_ALNUM = re.compile(r"[\W_]+")
+# ASCII bytes that are not alphanumeric, deleted with bytes.translate on the fast path
+ASCII_NON_ALNUM = bytes(b for b in range(128) if not chr(b).isalnum())
+# Syllables are estimated from groups of vowels
+VOWELS = "aeiouyąęó"
+VOWEL_GROUP = re.compile(f"[{VOWELS}]+")
+# Words with at least this many syllables are polysyllables for SMOG
+POLYSYLLABLE = 3
+# Syllable counts remembered per distinct word, cleared when it grows past this
+SYLLABLE_CACHE_SIZE = 200_000
+# Syllables are counted over at most this many final characters of a word: longer
+# "words" (base64, minified code) are not prose, and the carried cut-off word stays small
+MAX_WORD_CHARS = 100
+
+# Bytes read from the file per chunk
+CHUNK_SIZE = 1024 * 1024
+# Minimum seconds between two progress reports
+PROGRESS_INTERVAL = 0.1
+
+# Sentences longer than this are still counted but never kept as sample text
+MAX_SENTENCE_CHARS = 2000
+
+# The calibration sample has at least SAMPLE_MIN_WORDS and fewer than SAMPLE_MAX_WORDS words
+SAMPLE_MIN_WORDS = 15
+SAMPLE_MAX_WORDS = 75
+# Sentences kept per file to build calibration samples from
+SAMPLE_POOL_SIZE = 64
+
+
+def count_alnum(text: str, words: Optional[list[str]] = None) -> int:
+    """Same as sum(c.isalnum() for c in text), done in C. words is text.split() if the caller has it."""
+    if text.isascii():
+        return len(text.encode("ascii").translate(None, ASCII_NON_ALNUM))
+    if words is None:
+        words = text.split()
+    # Whitespace is never alphanumeric, and most words are all alphanumeric:
+    # only the rest go through the (slow on non-ASCII text) regex
+    whole = sum(map(len, filter(str.isalnum, words)))
+    return whole + len(NON_ALNUM.sub("", "".join(filterfalse(str.isalnum, words))))
+
+
+# Syllables of each known word, plus POLYSYLLABLE_FLAG for a polysyllable, so a
+# single sum() over the words adds up both counts
+_syllables: dict[str, int] = {}
+POLYSYLLABLE_FLAG = 1 << 32
+
+
+def count_syllables(word: str) -> int:
+    """Vowel groups minus a silent final e / -es / -ed, at least 1."""
+    word = word[-MAX_WORD_CHARS:].lower().strip(string.punctuation)
+    count = len(VOWEL_GROUP.findall(word))
+    if count > 1 and len(word) > 2 and word[-2] not in VOWELS:
+        if word[-1] == "e" and word[-2] != "l":
+            count -= 1
+    if count > 1 and len(word) > 3 and word[-3] not in VOWELS:
+        if word.endswith("ed") and word[-3] not in "td":
+            count -= 1
+        elif word.endswith("es") and word[-3] not in "sxzcgh":
+            count -= 1
+    return max(1, count)
+
+
+def count_syllables_in(words: list[str]) -> tuple[int, int]:
+    """
+    (syllables, polysyllabic words) of a list of words. Each distinct word is
+    estimated once and remembered, so once the vocabulary of the text is known
+    the words are only looked up, in C.
+    """
+    if len(_syllables) > SYLLABLE_CACHE_SIZE:
+        _syllables.clear()
+    try:
+        packed = sum(map(_syllables.__getitem__, words))
+    except KeyError:
+        packed = 0
+        for word, count in Counter(words).items():
+            estimate = _syllables.get(word)
+            if estimate is None:
+                syllables = count_syllables(word)
+                estimate = syllables + (POLYSYLLABLE_FLAG if syllables >= POLYSYLLABLE else 0)
+                if len(word) <= MAX_WORD_CHARS:
+                    _syllables[word] = estimate
+            packed += estimate * count
+    polysyllables, syllables = divmod(packed, POLYSYLLABLE_FLAG)
+    return syllables, polysyllables
+
+
+def compute_ari(char_count: int, word_count: int, sentence_count: int) -> float:
+    """Automated readability index, clamped at 0."""
+    if word_count <= 0 or sentence_count <= 0:
+        return 0.0
+    ari_score = (
+        4.71 * (char_count / word_count) +
+        0.5 * (word_count / sentence_count) -
+        21.43
+    )
+    return max(0, ari_score)
+
+
+def compute_coleman_liau(char_count: int, word_count: int, sentence_count: int) -> float:
+    """Coleman-Liau index, with alphanumeric characters standing in for letters."""
+    if word_count <= 0:
+        return 0.0
+    letters = char_count / word_count * 100
+    sentences = sentence_count / word_count * 100
+    return 0.0588 * letters - 0.296 * sentences - 15.8
+
+
+def compute_flesch_reading_ease(word_count: int, sentence_count: int, syllable_count: int) -> float:
+    if word_count <= 0 or sentence_count <= 0:
+        return 0.0
+    return 206.835 - 1.015 * (word_count / sentence_count) - 84.6 * (syllable_count / word_count)
+
+
+def compute_flesch_kincaid(word_count: int, sentence_count: int, syllable_count: int) -> float:
+    """Flesch-Kincaid grade level."""
+    if word_count <= 0 or sentence_count <= 0:
+        return 0.0
+    return 0.39 * (word_count / sentence_count) + 11.8 * (syllable_count / word_count) - 15.59
+
+
+def compute_smog(sentence_count: int, polysyllable_count: int) -> float:
+    if sentence_count <= 0:
+        return 0.0
+    return 1.0430 * math.sqrt(polysyllable_count * 30 / sentence_count) + 3.1291
+
+
+@dataclass
+class AnalysisResult:
+    """Everything the reading tab needs to know about a file."""
+    word_count: int
+    sentence_count: int
+    char_count: int
+    ari: float
+    syllable_count: int = 0
+    polysyllable_count: int = 0
+    sample_pool: list[str] = field(default_factory=list)
+
+    @property
+    def coleman_liau(self) -> float:
+        return compute_coleman_liau(self.char_count, self.word_count, self.sentence_count)
+
+    @property
+    def flesch_reading_ease(self) -> float:
+        return compute_flesch_reading_ease(self.word_count, self.sentence_count, self.syllable_count)
+
+    @property
+    def flesch_kincaid(self) -> float:
+        return compute_flesch_kincaid(self.word_count, self.sentence_count, self.syllable_count)
+
+    @property
+    def smog(self) -> float:
+        return compute_smog(self.sentence_count, self.polysyllable_count)
+
+    def build_sample(self, rng: random.Random = random) -> str:
+        """Picks random sentences from the pool until the sample is long enough."""
+        pool = list(self.sample_pool)
+        rng.shuffle(pool)
+
+        sample_text_parts = []
+        current_sample_words = 0
+
+        for sentence in pool:
+            s_len = len(sentence.split())
+
+            if current_sample_words + s_len < SAMPLE_MAX_WORDS:
+                sample_text_parts.append(sentence)
+                current_sample_words += s_len
+
+            if current_sample_words >= SAMPLE_MIN_WORDS:
+                break
+
+        return ". ".join(sample_text_parts) + "."
+
+
+class SentenceReservoir:
+    """
+    Uniform random sample of up to `size` sentences from a stream of unknown length.
+    Uses Algorithm L: once the reservoir is full it computes the index of the next
+    sentence to keep, so the analyzer never has to build the text of the others.
+    Pass a seed for a reproducible sample.
+    """
+
+    def __init__(self, size: int = SAMPLE_POOL_SIZE, seed: Optional[int] = None):
+        self.size = size
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # (sentence index, text) pairs, text is None for sentences that can't be used
+        self.items: list[tuple[int, Optional[str]]] = []
+        # Index of the next sentence that has to be offered
+        self.next_index = 0
+        self._w = 1.0
+
+    def offer(self, index: int, sentence: Optional[str]) -> None:
+        """Takes sentence number `index`, which has to be next_index."""
+        if len(self.items) < self.size:
+            self.items.append((index, sentence))
+            self.next_index = index + 1
+            if len(self.items) < self.size:
+                return
+            self._w = math.exp(math.log(self._random()) / self.size)
+        else:
+            self.items[self.rng.randrange(self.size)] = (index, sentence)
+            self._w *= math.exp(math.log(self._random()) / self.size)
+        self.next_index = index + math.floor(math.log(self._random()) / math.log(1 - self._w)) + 1
+
+    def discard(self, index: int) -> None:
+        """Marks sentence number `index` as unusable if it was picked."""
+        self.items = [(i, None if i == index else s) for i, s in self.items]
+
+    def pool(self) -> list[str]:
+        """The sampled sentences that are short enough to ever fit in a sample."""
+        return [s for _, s in self.items if s is not None and len(s.split()) < SAMPLE_MAX_WORDS]
+
+    @classmethod
+    def combine(
+        cls,
+        parts: list[tuple["SentenceReservoir", int]],
+        size: int = SAMPLE_POOL_SIZE,
+        seed: Optional[int] = None,
+    ) -> "SentenceReservoir":
+        """
+        Uniform sample over several streams, given each stream's reservoir and how many
+        sentences it saw. Every slot goes to a stream with probability proportional to
+        its remaining population, then that many items are drawn from its reservoir.
+        """
+        combined = cls(size, seed)
+        remaining = [population for _, population in parts]
+        taken = [0] * len(parts)
+        for _ in range(min(size, sum(remaining))):
+            pick = combined.rng.randrange(sum(remaining))
+            for i, population in enumerate(remaining):
+                if pick < population:
+                    break
+                pick -= population
+            remaining[i] -= 1
+            taken[i] += 1
+        for (reservoir, _), count in zip(parts, taken):
+            combined.items.extend(combined.rng.sample(reservoir.items, count))
+        return combined
+
+    def _random(self) -> float:
+        # random() can return 0.0, log() can't take it
+        return self.rng.random() or 1e-300
+
+
+class StreamingAnalyzer:
+    """
+    Counts words, sentences, alphanumeric characters and syllables over text fed
+    in chunks. Only the state of the current word/sentence is carried between
+    chunks, so memory use does not depend on the size of the text.
+    The counts match text.split(), re.split(r'[.!?]+', text), str.isalnum() and
+    count_syllables() over the whole text.
+    With a reservoir, a random sample of the sentences is kept along the way.
+    """
+
+    def __init__(self, reservoir: Optional[SentenceReservoir] = None):
+        self.word_count = 0
+        self.sentence_count = 0
+        self.char_count = 0
+        self.syllable_count = 0
+        self.polysyllable_count = 0
+        # Whether the previous chunk ended in the middle of a word
+        self._in_word = False
+        # Syllables of a word are counted once it is complete: the word cut off at
+        # the end of the last chunk, and the first word if the text started inside
+        # one (it may continue the text of another analyzer, see merge())
+        self._word_carry = ""
+        self._head_word: Optional[str] = None
+        self._head_open = False
+        # Whether the open sentence has any non-whitespace text yet
+        self._sentence_has_text = False
+        # Edges of the text seen so far, needed to merge() two analyzers
+        self._started = False
+        self._starts_in_word = False
+        self._saw_terminator = False
+        self._head_has_text = False
+        # Text of the open sentence, only collected when the reservoir wants it
+        self.reservoir = reservoir
+        self._sentence_parts: list[str] = []
+        self._sentence_chars = 0
+
+    def feed(self, chunk: str) -> None:
+        if not chunk:
+            return
+        if not self._started:
+            self._started = True
+            self._starts_in_word = self._head_open = not chunk[0].isspace()
+
+        words = chunk.split()
+        self.char_count += count_alnum(chunk, words)
+        self.word_count += len(words)
+        # A word cut in half by the chunk boundary was counted twice
+        if self._in_word and not chunk[0].isspace():
+            self.word_count -= 1
+        self._count_syllables(chunk, words)
+        self._in_word = not chunk[-1].isspace()
+
+        text = "".join(words)
+        terminators = SENTENCE_END.subn("", text)[1] if text else 0
+        # The open sentence has index sentence_count and this chunk closes at most
+        # `terminators` sentences: unless the reservoir wants one of those, only count
+        if (
+            self.reservoir is None
+            or self.reservoir.next_index > self.sentence_count + terminators
+        ):
+            self._count_sentences(text, terminators)
+            return
+
+        parts = SENTENCE_END.split(chunk)
+        # parts[0] continues the open sentence, every following part starts a new one
+        self._extend_sentence(parts[0])
+        for part in parts[1:]:
+            if not self._saw_terminator:
+                self._saw_terminator = True
+                self._head_has_text = self._sentence_has_text
+            self._close_sentence()
+            self._extend_sentence(part)
+
+    def finish(self) -> None:
+        """Closes the trailing sentence, call once after the last chunk."""
+        self._close_sentence()
+        self._add_syllables([word for word in (self._head_word, self._word_carry) if word])
+        self._head_word = None
+        self._head_open = False
+        self._word_carry = ""
+        self._in_word = False
+
+    def merge(self, other: "StreamingAnalyzer") -> None:
+        """
+        Folds in the counts of an unfinished analyzer that read the text directly
+        following this one, as if this analyzer had been fed that text itself.
+        Reservoirs are not merged here, see SentenceReservoir.combine.
+        """
+        if not other._started:
+            return
+        was_started = self._started
+        if not self._started:
+            self._started = True
+            self._starts_in_word = other._starts_in_word
+
+        self.char_count += other.char_count
+        self.word_count += other.word_count
+        joined = self._in_word and other._starts_in_word
+        if joined:
+            self.word_count -= 1
+        self._merge_syllables(other, was_started, joined)
+        self._in_word = other._in_word
+
+        if not other._saw_terminator:
+            self._sentence_has_text = self._sentence_has_text or other._sentence_has_text
+            return
+        # The other's first sentence really continues our open one
+        joined_has_text = self._sentence_has_text or other._head_has_text
+        self.sentence_count += other.sentence_count - other._head_has_text + joined_has_text
+        if not self._saw_terminator:
+            self._saw_terminator = True
+            self._head_has_text = joined_has_text
+        self._sentence_has_text = other._sentence_has_text
+
+    @property
+    def ari(self) -> float:
+        return compute_ari(self.char_count, self.word_count, self.sentence_count)
+
+    def result(self) -> AnalysisResult:
+        sample_pool = self.reservoir.pool() if self.reservoir is not None else []
+        return AnalysisResult(
+            self.word_count,
+            self.sentence_count,
+            self.char_count,
+            self.ari,
+            self.syllable_count,
+            self.polysyllable_count,
+            sample_pool,
+        )
+
+    def _add_syllables(self, words: list[str]) -> None:
+        if words:
+            syllables, polysyllables = count_syllables_in(words)
+            self.syllable_count += syllables
+            self.polysyllable_count += polysyllables
+
+    def _complete_word(self, word: str) -> None:
+        """A word that has just been found to end, the first one is held back."""
+        if self._head_open:
+            self._head_word = word[-MAX_WORD_CHARS:]
+            self._head_open = False
+        else:
+            self._add_syllables([word])
+
+    def _count_syllables(self, chunk: str, words: list[str]) -> None:
+        """Counts the syllables of the complete words, keeping the cut-off ones for later."""
+        carry = self._word_carry
+        self._word_carry = ""
+        if not words:
+            if carry:
+                self._complete_word(carry)
+            return
+
+        first, last = 0, len(words)
+        # words is also used for the sentence count, so the joined word is kept apart
+        continues = self._in_word and not chunk[0].isspace()
+        head = carry + words[0] if continues else words[0]
+        if carry and not continues:
+            self._complete_word(carry)
+        if not chunk[-1].isspace():
+            # Only the end of the word counts, see count_syllables()
+            self._word_carry = (head if last == 1 else words[-1])[-MAX_WORD_CHARS:]
+            last -= 1
+        if first < last and (continues or self._head_open):
+            self._complete_word(head)
+            first = 1
+        if first < last:
+            self._add_syllables(words[first:last] if first or last < len(words) else words)
+
+    def _merge_syllables(self, other: "StreamingAnalyzer", was_started: bool, joined: bool) -> None:
+        self.syllable_count += other.syllable_count
+        self.polysyllable_count += other.polysyllable_count
+        if not was_started:
+            self._head_word = other._head_word
+            self._head_open = other._head_open
+            self._word_carry = other._word_carry
+            return
+        if joined:
+            if other._head_open:
+                # The other analyzer read only the middle of a word
+                self._word_carry = (self._word_carry + other._word_carry)[-MAX_WORD_CHARS:]
+                return
+            self._complete_word(self._word_carry + other._head_word)
+        else:
+            if self._word_carry:
+                self._complete_word(self._word_carry)
+            if other._head_word is not None:
+                self._add_syllables([other._head_word])
+            elif other._head_open:
+                # Other started in a word but ours had ended: that is a complete
+                # word, possibly still running at the end of other
+                self._word_carry = other._word_carry
+                return
+        self._word_carry = other._word_carry
+
+    def _count_sentences(self, text: str, terminators: int) -> None:
+        """Counts sentences in a chunk with its whitespace removed, without splitting it."""
+        if not text:
+            return
+        if terminators == 0:
+            self._sentence_has_text = True
+            return
+        if not self._saw_terminator:
+            self._saw_terminator = True
+            self._head_has_text = self._sentence_has_text or not SENTENCE_END.match(text)
+        # Every terminator closes a non-empty sentence, except a leading one
+        # closing a sentence that has no text yet
+        self.sentence_count += terminators
+        if not self._sentence_has_text and SENTENCE_END.match(text):
+            self.sentence_count -= 1
+        self._sentence_has_text = SENTENCE_END.fullmatch(text[-1]) is None
+
+    def _collecting(self) -> bool:
+        return self.reservoir is not None and self.reservoir.next_index == self.sentence_count
+
+    def _extend_sentence(self, part: str) -> None:
+        if not part:
+            return
+        if not self._sentence_has_text and not part.isspace():
+            self._sentence_has_text = True
+        if self._collecting() and self._sentence_chars <= MAX_SENTENCE_CHARS:
+            self._sentence_parts.append(part)
+            self._sentence_chars += len(part)
+
+    def _close_sentence(self) -> None:
+        if self._sentence_has_text:
+            if self._collecting():
+                sentence = None
+                # No parts: the text was read by another analyzer and merged in
+                if 0 < self._sentence_chars <= MAX_SENTENCE_CHARS:
+                    sentence = "".join(self._sentence_parts).strip()
+                self.reservoir.offer(self.sentence_count, sentence)
+            self.sentence_count += 1
+        self._sentence_has_text = False
+        self._sentence_parts.clear()
+        self._sentence_chars = 0
+
+
+class AnalysisCancelled(Exception):
+    """Raised by scan_file when the caller asked to stop."""
+
+
+@dataclass
+class ScanProgress:
+    bytes_read: int
+    total_bytes: int
+    word_count: int
+    elapsed: float
+
+    @property
+    def fraction(self) -> float:
+        if self.total_bytes <= 0:
+            return 1.0
+        return min(1.0, self.bytes_read / self.total_bytes)
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_read / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def scan_file(
+    file_path: str,
+    analyzer: StreamingAnalyzer,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> StreamingAnalyzer:
+    """
+    Feeds a UTF-8 file into the analyzer chunk by chunk. gzip, bzip2, xz and zstd
+    files are decompressed on the fly; progress then counts compressed bytes.
+    progress is called at most every PROGRESS_INTERVAL seconds (and once at the end),
+    cancelled is polled before every chunk and stops the scan with AnalysisCancelled.
+    """
+    total_bytes = os.path.getsize(file_path)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    started = last_report = monotonic()
+    bytes_read = 0
+
+    with open_stream(file_path) as (raw, stream):
+        while True:
+            if cancelled is not None and cancelled():
+                raise AnalysisCancelled(file_path)
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            bytes_read = raw.tell()
+            analyzer.feed(decoder.decode(chunk))
+
+            now = monotonic()
+            if progress is not None and now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                progress(ScanProgress(bytes_read, total_bytes, analyzer.word_count, now - started))
+
+    analyzer.feed(decoder.decode(b"", final=True))
+    analyzer.finish()
+    if progress is not None:
+        progress(ScanProgress(bytes_read, total_bytes, analyzer.word_count, monotonic() - started))
+    return analyzer
+
+
+def analyze_text(text: str) -> AnalysisResult:
+    """The same analysis for a string already in memory, e.g. a calibration sample."""
+    analyzer = StreamingAnalyzer()
+    analyzer.feed(text)
+    analyzer.finish()
+    return analyzer.result()
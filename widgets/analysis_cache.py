@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from .analysis import AnalysisResult
+
+# Entries kept in memory in front of the disk cache
+MEMORY_ENTRIES = 128
+# Size of the on-disk cache before the least recently used entries are deleted
+MAX_DISK_BYTES = 32 * 1024 * 1024
+# Part of max_disk_bytes the cache is trimmed down to, so the next entries don't trim it again
+TRIM_TO = 0.9
+# Part of every entry's file name, bumped when AnalysisResult changes so old entries are never read
+# (3: batch.py used to store results without a sentence sample)
+FORMAT_VERSION = 3
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "kalkulator-python" / "analysis"
+
+
+def file_key(file_path: str) -> tuple[str, int, int]:
+    """(path, size, mtime) - any change to the file gives a new key."""
+    path = os.path.realpath(file_path)
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+class AnalysisCache:
+    """
+    Analysis results keyed by path, size and mtime.
+    An LRU dict in memory sits in front of one JSON file per entry on disk;
+    the disk cache is trimmed to max_disk_bytes, dropping the least recently used files.
+    Its size is counted in memory (from one walk of the directory), so the directory
+    is only walked again when it is over the limit. Entries written by other processes
+    are only noticed then. Safe to use from the analysis worker threads.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        memory_entries: int = MEMORY_ENTRIES,
+        max_disk_bytes: int = MAX_DISK_BYTES,
+    ):
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[tuple, AnalysisResult] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bytes of entries on disk, None until the directory is first walked
+        self._disk_bytes: Optional[int] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def get(self, file_path: str) -> Optional[AnalysisResult]:
+        try:
+            key = file_key(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return result
+
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            result = AnalysisResult(**data["result"])
+            # Bump the mtime, eviction goes by it
+            os.utime(entry_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, result)
+        return result
+
+    def peek(self, key: tuple) -> Optional[AnalysisResult]:
+        """
+        Lookup by a key the caller already has (e.g. from a directory listing): no
+        stat, no stats counted and the LRU order is left alone.
+        """
+        with self._lock:
+            result = self._memory.get(key)
+        if result is not None:
+            return result
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                return AnalysisResult(**json.load(f)["result"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, file_path: str, result: AnalysisResult) -> None:
+        try:
+            key = file_key(file_path)
+        except OSError:
+            return
+
+        with self._lock:
+            self._remember(key, result)
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entry_path = self._entry_path(key)
+            # Write to a temp file first so a crash never leaves half an entry behind
+            tmp_path = entry_path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": list(key), "result": asdict(result)}, f)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = entry_path.stat().st_size
+            except OSError:
+                replaced = 0
+            # Taken before the entry is in place, the first call walks the directory
+            disk_size = self._disk_size()
+            os.replace(tmp_path, entry_path)
+            if disk_size + size - replaced > self.max_disk_bytes:
+                self._evict()
+            else:
+                with self._lock:
+                    self._disk_bytes += size - replaced
+        except OSError:
+            # The cache is only an optimization
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = None
+        for entry_path in self.directory.glob("*.json"):
+            try:
+                entry_path.unlink()
+            except OSError:
+                pass
+
+    def _remember(self, key: tuple, result: AnalysisResult) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _entry_path(self, key: tuple) -> Path:
+        digest = hashlib.sha1(repr((FORMAT_VERSION, key)).encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        """(mtime, size, path) of every entry on disk."""
+        entries = []
+        for entry_path in self.directory.glob("*.json"):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        return entries
+
+    def _disk_size(self) -> int:
+        if self._disk_bytes is None:
+            total = sum(size for _, size, _ in self._entries())
+            with self._lock:
+                if self._disk_bytes is None:
+                    self._disk_bytes = total
+        return self._disk_bytes
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_disk_bytes:
+            entries.sort()
+            for _, size, entry_path in entries:
+                if total <= self.max_disk_bytes * TRIM_TO:
+                    break
+                try:
+                    entry_path.unlink()
+                    total -= size
+                except OSError:
+                    pass
+        with self._lock:
+            self._disk_bytes = total
@@ -1,20 +1,91 @@
+import asyncio
+import os
+from collections import deque
 from decimal import Decimal
-from textual import events, on
+from time import perf_counter
+from typing import Iterable, Optional
+
+from textual import events, on, work
 from textual.app import ComposeResult
-from textual.containers import Container
+from textual.containers import Container, HorizontalGroup
 from textual.css.query import NoMatches
 from textual.reactive import var
-from textual.widgets import Button, Digits, Log
+from textual.widgets import Button, Digits, Input, Log, Select
+
+from .expression import ExpressionError, evaluate
+from .instrumentation import timed, trace
+from .numeric import (
+    BACKENDS,
+    DECIMAL,
+    DEFAULT_PRECISION,
+    ROUNDINGS,
+    DecimalBackend,
+    Number,
+    NumericBackend,
+    entry_text,
+)
+
+# File of keys replayed into the calculator when it is mounted
+REPLAY_ENV = "KALKULATOR_REPLAY"
+# Characters of a replayed sequence and the buttons they press, whitespace is skipped
+REPLAY_KEYS = {
+    **{str(digit): f"number-{digit}" for digit in range(10)},
+    "+": "plus", "-": "minus", "*": "multiply", "×": "multiply", "/": "divide", "÷": "divide",
+    "=": "equals", ".": "point", "%": "percent", "_": "plus-minus", "±": "plus-minus",
+    "c": "clear", "C": "clear",
+}
+# Seconds of replay between display refreshes, about one frame
+FRAME_BUDGET = 1 / 60
+LOG_LINES = 10
+
+
+def parse_keys(keys: str) -> list[str]:
+    """Button ids of a key sequence like "12+3=", ValueError on an unknown character."""
+    buttons = []
+    for position, key in enumerate(keys):
+        if key.isspace():
+            continue
+        button_id = REPLAY_KEYS.get(key)
+        if button_id is None:
+            raise ValueError(f"Unknown key {key!r} at position {position}")
+        buttons.append(button_id)
+    return buttons
+
+
+class NumberDisplay(Digits):
+    """
+    The calculator's display. While its cell in the grid sets its size, a number of
+    another length only needs a repaint - Digits would lay out the whole screen
+    again on almost every key press. A width or height that follows the content
+    still gets its layout.
+    """
+
+    def refresh(self, *regions, repaint: bool = True, layout: bool = False, recompose: bool = False):
+        if layout and self.has_fixed_size:
+            layout = False
+        return super().refresh(*regions, repaint=repaint, layout=layout, recompose=recompose)
+
+    @property
+    def has_fixed_size(self) -> bool:
+        """True when the styles size the display whatever it shows."""
+        styles = self.styles
+        return all(
+            scalar is not None and not scalar.is_auto
+            for scalar in (styles.width, styles.height)
+        )
+
 
 class Calculator(Container):
     """A working 'desktop' calculator widget."""
 
     numbers = var("0")
     show_ac = var(True)
-    left = var(Decimal("0"))
-    right = var(Decimal("0"))
+    # always_update: Fraction(1) == Decimal(1), a new backend's number must still replace the old one
+    left = var(Decimal("0"), always_update=True)
+    right = var(Decimal("0"), always_update=True)
     value = var("")
     operator = var("plus")
+    backend = var(DECIMAL)
     
     NAME_MAP = {
         "asterisk": "multiply",
@@ -29,10 +100,24 @@ class Calculator(Container):
         "c": "clear",      # Mapped 'c' key to our new single button
     }
 
+    # Set while a replay runs: watchers skip the display and log lines are buffered
+    batched = False
+    # Set for the whole replay, keys typed meanwhile are ignored
+    replaying = False
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Log lines written while batched and whether the log was cleared meanwhile
+        self._pending_log: deque[str] = deque(maxlen=LOG_LINES)
+        self._log_cleared = False
+
     # Watchers
     # Created using reactive var feature of Textual https://textual.textualize.io/guide/reactivity/ 
     # These methods are called automatically when the variable changes.
+    # While a replay is batched they do nothing, refresh_display() catches up afterwards.
     def watch_numbers(self, value: str) -> None:
+        if self.batched:
+            return
         try:
             self.query_one("#numbers", Digits).update(value)
         except NoMatches:
@@ -43,6 +128,8 @@ class Calculator(Container):
 
     def watch_show_ac(self, show_ac: bool) -> None:
         """Update the label of the clear button instead of swapping buttons."""
+        if self.batched:
+            return
         try:
             # FIX: Just change the text label. 
             # If show_ac is True, label is AC. If False, label is C.
@@ -50,10 +137,17 @@ class Calculator(Container):
         except NoMatches:
             pass
 
+    def watch_backend(self, old: NumericBackend, new: NumericBackend) -> None:
+        """Carries the operands over to the new number type."""
+        with new.context():
+            self.left = new.number(self.left)
+            self.right = new.number(self.right)
+        self.write_log(f"Backend: {new.tag}")
+
     def compose(self) -> ComposeResult:
         with Container(id="calculator-grid"):
             yield Log(id="left_number", max_lines=10, highlight=True, auto_scroll=True)
-            yield Digits(id="numbers")
+            yield NumberDisplay(id="numbers")
             yield Button("AC", id="clear", variant="primary", classes="calc-button") 
             yield Button("+/-", id="plus-minus", variant="primary", classes="calc-button")
             yield Button("%", id="percent", variant="primary", classes="calc-button")
@@ -73,43 +167,177 @@ class Calculator(Container):
             yield Button("0", id="number-0", classes="number calc-button")
             yield Button(".", id="point", classes="calc-button")
             yield Button("=", id="equals", classes="operation-button calc-button")
+        with HorizontalGroup(id="backend-bar"):
+            yield Select(
+                [("Decimal", "decimal"), ("Float", "float"), ("Fraction", "fraction")],
+                value="decimal", allow_blank=False, id="backend",
+            )
+            yield Input(str(DEFAULT_PRECISION), placeholder="Precision", type="integer", id="precision")
+            yield Select([(rounding, rounding) for rounding in ROUNDINGS], value=ROUNDINGS[0], allow_blank=False, id="rounding")
+        yield Input(placeholder="Expression, e.g. 2 * (3 + 4) ^ 2 - 50%", id="expression")
 
     def on_mount(self) -> None:
         self.query_one("#left_number", Log).write("Calculator Ready\n")
         self.query_one("#numbers", Digits).update(self.numbers)
         # Initialize the label
         self.watch_show_ac(self.show_ac)
+        replay_path = os.environ.get(REPLAY_ENV)
+        if replay_path:
+            self.replay_file(replay_path)
+
+    def write_log(self, line: str) -> None:
+        if self.batched:
+            self._pending_log.append(line)
+            return
+        try:
+            self.query_one("#left_number", Log).write(f"{line}\n")
+        except NoMatches:
+            pass
+
+    def clear_log(self) -> None:
+        if self.batched:
+            self._pending_log.clear()
+            self._log_cleared = True
+            return
+        self.query_one("#left_number", Log).clear()
+
+    def refresh_display(self) -> None:
+        """Shows the current state once, after keys were pressed with the watchers off."""
+        log = self.query_one("#left_number", Log)
+        if self._log_cleared:
+            log.clear()
+        if self._pending_log:
+            log.write("".join(f"{line}\n" for line in self._pending_log))
+        self._pending_log.clear()
+        self._log_cleared = False
+        self.query_one("#numbers", Digits).update(self.numbers)
+        self.watch_show_ac(self.show_ac)
 
     def on_key(self, event: events.Key) -> None:
-        def press(button_id: str) -> None:
+        if self.replaying:
+            return
+        key = event.key
+        if key.isdecimal():
+            button_id = f"number-{key}"
+        else:
+            button_id = self.NAME_MAP.get(key)
+        if button_id is not None:
+            # Through the button, so it flashes like when it is clicked
             try:
                 self.query_one(f"#{button_id}", Button).press()
             except NoMatches:
                 pass
 
-        key = event.key
-        if key.isdecimal():
-            press(f"number-{key}")
-        elif key == "c":
-            press("clear") # Press the single clear button
-        else:
-            button_id = self.NAME_MAP.get(key)
-            if button_id is not None:
-                press(button_id)
+    def on_paste(self, event: events.Paste) -> None:
+        """Pasted text outside the expression input is replayed as keys."""
+        if self.replaying or not event.text.strip():
+            return
+        event.stop()
+        self.replay_in_frames(event.text)
+
+    def replay_file(self, path: str) -> None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                keys = f.read()
+        except OSError as e:
+            self.notify(f"Cannot replay {path}: {e}", severity="error")
+            return
+        self.replay_in_frames(keys)
+
+    def press_key(self, button_id: str) -> None:
+        """One step of the state machine, what clicking the button with this id does."""
+        if button_id.startswith("number-"):
+            self.enter_digit(button_id[-1])
+        elif button_id in ("plus", "minus", "multiply", "divide"):
+            self.enter_operator(button_id)
+        elif button_id == "equals":
+            self.pressed_equals()
+        elif button_id == "point":
+            self.pressed_point()
+        elif button_id == "percent":
+            self.percent_pressed()
+        elif button_id == "plus-minus":
+            self.plus_minus_pressed()
+        elif button_id == "clear":
+            self.pressed_clear()
+
+    @timed("calculator/replay")
+    def replay(self, keys: str | Iterable[str]) -> int:
+        """
+        Presses a whole key sequence ("12+3=" or button ids) with the watchers off and
+        refreshes the display once at the end. Every result still goes to the history.
+        """
+        buttons = parse_keys(keys) if isinstance(keys, str) else list(keys)
+        self.batched = True
+        try:
+            for button_id in buttons:
+                self.press_key(button_id)
+        finally:
+            self.batched = False
+            self.refresh_display()
+        return len(buttons)
+
+    @work(exclusive=True, group="replay")
+    async def replay_in_frames(self, keys: str) -> None:
+        """Like replay(), for long sequences: refreshes and yields to the UI once per FRAME_BUDGET."""
+        try:
+            buttons = parse_keys(keys)
+        except ValueError as e:
+            self.notify(f"Replay: {e}", severity="error")
+            return
+        self.replaying = True
+        try:
+            position = 0
+            while position < len(buttons):
+                deadline = perf_counter() + FRAME_BUDGET
+                self.batched = True
+                try:
+                    # At least one key per frame, however slow the keys are
+                    while True:
+                        self.press_key(buttons[position])
+                        position += 1
+                        if position == len(buttons) or perf_counter() >= deadline:
+                            break
+                finally:
+                    self.batched = False
+                    self.refresh_display()
+                await asyncio.sleep(0)
+        finally:
+            self.replaying = False
+        trace("calculator", "Replayed %d keys", len(buttons))
 
     @on(Button.Pressed, ".number")
     def number_pressed(self, event: Button.Pressed) -> None:
         assert event.button.id is not None
-        number = event.button.id.partition("-")[-1]
-        self.numbers = self.value = self.value.lstrip("0") + number
+        self.enter_digit(event.button.id.partition("-")[-1])
+
+    def enter_digit(self, number: str) -> None:
+        # A lone zero is replaced, the one in "0.25" stays
+        value = "" if self.value == "0" else self.value
+        self.numbers = self.value = value + number
+
+    def entered_number(self) -> Optional[Number]:
+        """The number being typed in, None (and "Error" on the display) when it isn't one."""
+        try:
+            return self.backend.number(self.value or "0")
+        except (ValueError, ArithmeticError):
+            self.value = ""
+            self.numbers = "Error"
+            return None
 
     @on(Button.Pressed, "#plus-minus")
     def plus_minus_pressed(self) -> None:
-        self.numbers = self.value = str(Decimal(self.value or "0") * -1)
+        number = self.entered_number()
+        if number is not None:
+            with self.backend.context():
+                self.numbers = self.value = entry_text(number * -1)
 
     @on(Button.Pressed, "#percent")
     def percent_pressed(self) -> None:
-        self.numbers = self.value = str(Decimal(self.value or "0") / Decimal(100))
+        number = self.entered_number()
+        if number is not None:
+            with self.backend.context():
+                self.numbers = self.value = entry_text(number / 100)
 
     @on(Button.Pressed, "#point")
     def pressed_point(self) -> None:
@@ -123,17 +351,18 @@ class Calculator(Container):
         if self.show_ac:
             # AC Behavior
             self.value = ""
-            self.left = self.right = Decimal(0)
+            self.left = self.right = self.backend.number(0)
             self.operator = "plus"
             self.numbers = "0"
             self.app.clear_history()
-            self.query_one("#left_number", Log).clear()
-            self.query_one("#left_number", Log).write("Calculator Reset\n")
+            self.clear_log()
+            self.write_log("Calculator Reset")
         else:
             # C Behavior
             self.value = ""
             self.numbers = "0"
 
+    @timed("calculator/do_math")
     def _do_math(self) -> None:
         """Does the math: LEFT OPERATOR RIGHT"""
         try:
@@ -141,20 +370,22 @@ class Calculator(Container):
             current_left = self.left
             current_right = self.right
             current_op = self.operator
-            print(f"CALCulating: {current_left} {current_op} {current_right}")
-            if self.operator == "plus":
-                self.left += self.right
-            elif self.operator == "minus":
-                self.left -= self.right
-            elif self.operator == "divide":
-                self.left /= self.right
-            elif self.operator == "multiply":
-                self.left *= self.right
+            trace("calculator", "CALCulating: %s %s %s", current_left, current_op, current_right)
+            with self.backend.context():
+                if self.operator == "plus":
+                    self.left += self.right
+                elif self.operator == "minus":
+                    self.left -= self.right
+                elif self.operator == "divide":
+                    self.left /= self.right
+                elif self.operator == "multiply":
+                    self.left *= self.right
             
             self.numbers = str(self.left)
 
-            self.app.add_calculation(current_left, current_op, current_right, self.left)
-            self.query_one("#left_number", Log).write(f"{self.app.calc_history[-1][-2]} = {self.app.calc_history[-1][-1]}\n")
+            self.app.add_calculation(current_left, current_op, current_right, self.left, self.backend.tag)
+            entry = self.app.calc_history[-1]
+            self.write_log(f"{entry.expression} = {entry.result}")
 
             self.value = ""
         except Exception:
@@ -162,17 +393,70 @@ class Calculator(Container):
 
     @on(Button.Pressed, "#plus,#minus,#divide,#multiply")
     def pressed_op(self, event: Button.Pressed) -> None:
+        assert event.button.id is not None
+        self.enter_operator(event.button.id)
+
+    def enter_operator(self, operator: str) -> None:
         if not self.value:
-            self.operator = event.button.id  # Just change the operator
-            print(f"CALC Operator changed to: {self.operator}")
+            self.operator = operator  # Just change the operator
+            trace("calculator", "Operator changed to: %s", self.operator)
             return
-        self.right = Decimal(self.value or "0")
+        right = self.entered_number()
+        if right is None:
+            return
+        self.right = right
         self._do_math()
-        assert event.button.id is not None
-        self.operator = event.button.id
+        self.operator = operator
 
     @on(Button.Pressed, "#equals")
     def pressed_equals(self) -> None:
         if self.value:
-            self.right = Decimal(self.value)
+            right = self.entered_number()
+            if right is None:
+                return
+            self.right = right
         self._do_math()
+
+    @on(Input.Submitted, "#expression")
+    def expression_submitted(self, event: Input.Submitted) -> None:
+        """Evaluates a whole expression (precedence, parentheses, ^, %) at once."""
+        source = event.value.strip()
+        if not source:
+            return
+        log = self.query_one("#left_number", Log)
+        try:
+            result = evaluate(source, backend=self.backend)
+            # Python refuses to write out ints of more than 4300 digits
+            text = str(result)
+        except (ExpressionError, ValueError, OverflowError) as e:
+            self.numbers = "Error"
+            log.write(f"{e}\n")
+            return
+
+        # The result becomes the left operand, like after pressing =
+        self.left = result
+        self.value = ""
+        self.numbers = text
+        self.app.add_expression(source, result, self.backend.tag)
+        log.write(f"{source} = {result}\n")
+        event.input.clear()
+
+    @on(Select.Changed, "#backend")
+    @on(Select.Changed, "#rounding")
+    @on(Input.Changed, "#precision")
+    def backend_changed(self) -> None:
+        kind = self.query_one("#backend", Select).value
+        precision_input = self.query_one("#precision", Input)
+        rounding = self.query_one("#rounding", Select)
+        precision_input.disabled = rounding.disabled = kind != "decimal"
+        if kind != "decimal":
+            self.backend = BACKENDS[kind]
+            return
+        try:
+            backend = DecimalBackend(int(precision_input.value or DEFAULT_PRECISION), rounding.value)
+        except ValueError as e:
+            # Keep computing with the last valid precision
+            precision_input.tooltip = str(e)
+            return
+        precision_input.tooltip = None
+        self.backend = backend
@@ -1,27 +1,285 @@
+from bisect import bisect_left
+from collections import OrderedDict
+from operator import attrgetter
+from time import monotonic
+
+from rich.segment import Segment
+from rich.style import Style
+from textual import log, on, work
 from textual.app import ComposeResult
 from textual.containers import Container
-from textual.widgets import DataTable
+from textual.geometry import Size
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets import Input
+
+from .history_index import DEFAULT_LIMIT, HistoryQuery
+
+# Rows per page when the history comes from the database
+PAGE_SIZE = 200
+# Pages of database rows kept in memory
+CACHED_PAGES = 32
+# New rows are collected for this long and then added in one go
+FRAME = 1 / 60
+
+TIME_WIDTH = 10
+HEADER = ("Time", "Expression", "Result")
+
+
+class HistoryTable(ScrollView):
+    """
+    Virtualized history table: only the rows in view are formatted and drawn.
+    Rows come from the app's in-memory history, from database pages that are
+    loaded in a worker when they scroll into view, or from search results.
+    """
+
+    DEFAULT_CSS = """
+    HistoryTable {
+        overflow-x: hidden;
+    }
+    """
+
+    HEADER_STYLE = Style(bold=True, reverse=True)
+    ODD_STYLE = Style(dim=True)
+    LOADING_ROW = ("", "…", "")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.row_count = 0
+        # page number -> list of row tuples, least recently used first
+        self.pages: OrderedDict[int, list[tuple[str, str, str]]] = OrderedDict()
+        self.requested_pages: set[int] = set()
+        # Rows of the whole history, row_count is less while search results are shown
+        self.history_rows = 0
+        # Entries found by a search, None shows the whole history
+        self.matches = None
+
+    @property
+    def database(self):
+        return getattr(self.app, "history_db", None)
+
+    def set_row_count(self, row_count: int) -> None:
+        at_end = self.scroll_y >= self.max_scroll_y
+        self.row_count = row_count
+        # One extra line for the header
+        self.virtual_size = Size(self.size.width, row_count + 1)
+        self.refresh()
+        # Follow the newest rows, unless the user scrolled up to read older ones
+        if at_end:
+            self.call_after_refresh(self.scroll_end, animate=False)
+
+    def row(self, index: int) -> tuple[str, str, str]:
+        if self.matches is not None:
+            return self.matches[index].row()
+        if self.database is None:
+            history = self.app.calc_history
+            return history[index].row() if index < len(history) else self.LOADING_ROW
+
+        page_number, offset = divmod(index, PAGE_SIZE)
+        page = self.pages.get(page_number)
+        if page is None or offset >= len(page):
+            self.request_page(page_number)
+            return self.LOADING_ROW
+        self.pages.move_to_end(page_number)
+        return page[offset]
+
+    def set_history_rows(self, history_rows: int) -> None:
+        self.history_rows = history_rows
+        if self.matches is None:
+            self.set_row_count(history_rows)
+
+    def show_matches(self, matches) -> None:
+        """Shows only these entries, None goes back to the whole history."""
+        self.matches = matches
+        self.scroll_to(y=0, animate=False, immediate=True)
+        self.set_row_count(self.history_rows if matches is None else len(matches))
+
+    def append_rows(self, entries: list, query: HistoryQuery) -> None:
+        """Adds rows that were just calculated, keeps the last cached page complete."""
+        if self.database is not None:
+            for entry in entries:
+                page_number, offset = divmod(self.history_rows, PAGE_SIZE)
+                page = self.pages.get(page_number)
+                if page is None and offset == 0:
+                    page = self.pages[page_number] = []
+                if page is not None and len(page) == offset:
+                    page.append(entry.row())
+                self.history_rows += 1
+        else:
+            self.history_rows = len(self.app.calc_history)
+
+        if self.matches is None:
+            self.set_row_count(self.history_rows)
+        else:
+            # The whole history grows behind the search results. Like a new search
+            # they keep only what the history still holds, DEFAULT_LIMIT at most
+            matches = self.matches
+            matches.extend(entry for entry in entries if query.matches(entry))
+            history = self.app.calc_history
+            oldest = history.next_sequence - len(history)
+            dropped = max(
+                bisect_left(matches, oldest, key=attrgetter("sequence")),
+                len(matches) - DEFAULT_LIMIT,
+            )
+            del matches[:dropped]
+            self.set_row_count(len(matches))
+
+    def clear(self) -> None:
+        self.pages.clear()
+        if self.matches is not None:
+            self.matches.clear()
+        self.history_rows = 0
+        self.set_row_count(0)
+
+    def request_page(self, page_number: int) -> None:
+        if page_number not in self.requested_pages:
+            self.requested_pages.add(page_number)
+            self.load_page(page_number)
+
+    @work(thread=True, group="history-page")
+    def load_page(self, page_number: int) -> None:
+        database = self.database
+        # Rows still waiting in the write queue belong on the page too. If the
+        # writer is stuck, page_loaded() fills the page from memory instead
+        if not database.flush():
+            log.warning("History page loaded before the database writer caught up")
+        entries = database.rows(page_number * PAGE_SIZE, PAGE_SIZE)
+        self.app.call_from_thread(self.page_loaded, page_number, entries)
+
+    def page_loaded(self, page_number: int, entries: list) -> None:
+        self.requested_pages.discard(page_number)
+        rows = [entry.row() for entry in entries]
+        # Calculations made while the page was loading are only in memory yet
+        expected = min(PAGE_SIZE, self.history_rows - page_number * PAGE_SIZE)
+        if len(rows) < expected:
+            newest = entries[-1].sequence if entries else -1
+            for entry in self.app.calc_history:
+                if entry.sequence > newest and len(rows) < expected:
+                    rows.append(entry.row())
+        self.pages[page_number] = rows
+        while len(self.pages) > CACHED_PAGES:
+            self.pages.popitem(last=False)
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        width = self.size.width
+        if y == 0:
+            return self._format(HEADER, width, self.HEADER_STYLE)
+        index = int(self.scroll_offset.y) + y - 1
+        if index >= self.row_count:
+            return Strip.blank(width)
+        return self._format(self.row(index), width, self.ODD_STYLE if index % 2 else None)
+
+    def _format(self, row: tuple[str, str, str], width: int, style) -> Strip:
+        time_text, expression, result = row
+        result_width = max(8, (width - TIME_WIDTH) // 3)
+        expression_width = max(0, width - TIME_WIDTH - result_width)
+        text = (
+            time_text[:TIME_WIDTH - 1].ljust(TIME_WIDTH)
+            + expression[:expression_width - 1].ljust(expression_width)
+            + result[:result_width].rjust(result_width)
+        )
+        return Strip([Segment(text[:width], style)], min(len(text), width))
 
 
 class CalculatorHistory(Container):
+    """
+    History tab. New rows are queued and added at most once per frame, so bursts of
+    calculations cost one table update. With a database nothing is read before
+    the tab is shown for the first time.
+    The search bar filters through the app's history index (see history_index).
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Set here rather than in on_mount: the app passes calculations on as soon as
+        # the widget exists, which can be before its mount has been processed
+        self.search_query = HistoryQuery()
+        self.pending = []
+        self.flush_scheduled = False
+        self.loaded = False
+
     def compose(self) -> ComposeResult:
+        yield Input(placeholder="Search: 5 +  op:×  result:10..100  since:12:00  until:13:00  last:15m", id="history-search")
         # Create a table to hold the history
-        yield DataTable()
+        yield HistoryTable()
 
     def on_mount(self) -> None:
-        """Setup the table columns and load initial data."""
-        table = self.query_one(DataTable)
-        table.add_columns("Time", "Expression", "Result")
-        
-        # Load existing history from the App (if any exists)
-        # We access the main app using 'self.app'
-        if hasattr(self.app, "calc_history"):
-            for row in self.app.calc_history:
-                table.add_row(*row)
-
-    def add_line(self, row_data):
-        """Helper to add a line dynamically."""
-        table = self.query_one(DataTable)
-        table.add_row(*row_data)
-        # Scroll to the bottom so the newest is visible
-        table.scroll_end(animate=False)
\ No newline at end of file
+        if self.database is None:
+            # Load existing history from the App (if any exists)
+            self.loaded = True
+            self.query_one(HistoryTable).set_history_rows(len(self.app.calc_history))
+
+    @property
+    def database(self):
+        return getattr(self.app, "history_db", None)
+
+    def on_show(self) -> None:
+        # The database is only read once somebody looks at the history
+        if not self.loaded:
+            self.loaded = True
+            self.load_row_count()
+
+    @work(thread=True, group="history-page")
+    def load_row_count(self) -> None:
+        database = self.database
+        # Unwritten rows are added from memory in row_count_loaded()
+        if not database.flush():
+            log.warning("History counted before the database writer caught up")
+        row_count, newest = database.count(), database.newest_id()
+        self.app.call_from_thread(self.row_count_loaded, row_count, newest)
+
+    def row_count_loaded(self, row_count: int, newest: int) -> None:
+        # Rows added while counting are not in the count yet
+        row_count += sum(1 for entry in self.app.calc_history if entry.sequence > newest)
+        self.pending.clear()
+        self.query_one(HistoryTable).set_history_rows(row_count)
+
+    def add_line(self, entry):
+        """Queues a new row, the table is updated once per frame."""
+        if not self.loaded:
+            # Counted when the tab is first shown
+            return
+        self.pending.append(entry)
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.set_timer(FRAME, self.flush_pending)
+
+    def flush_pending(self) -> None:
+        self.flush_scheduled = False
+        entries, self.pending = self.pending, []
+        if entries:
+            self.query_one(HistoryTable).append_rows(entries, self.search_query)
+
+    @on(Input.Changed, "#history-search")
+    def search_changed(self, event: Input.Changed) -> None:
+        try:
+            query = HistoryQuery.parse(event.value)
+        except ValueError as e:
+            event.input.border_subtitle = str(e)
+            return
+        # Rows queued so far still belong to the previous results
+        self.flush_pending()
+        self.search_query = query
+        table = self.query_one(HistoryTable)
+        if query.empty:
+            event.input.border_subtitle = None
+            table.show_matches(None)
+            return
+        started = monotonic()
+        matches = self.app.history_index.search(query)
+        took = (monotonic() - started) * 1000
+        subtitle = f"{len(matches)} found in {took:.1f} ms"
+        if len(matches) == DEFAULT_LIMIT:
+            subtitle = f"newest {len(matches)} shown, {took:.1f} ms"
+        if self.database is not None:
+            # Only the calculations still kept in memory are indexed
+            subtitle += ", recent calculations only"
+        event.input.border_subtitle = subtitle
+        table.show_matches(matches)
+
+    def clear(self) -> None:
+        self.pending.clear()
+        # Not mounted yet, the table reads the (now empty) history when it is
+        if self.is_mounted:
+            self.query_one(HistoryTable).clear()
@@ -0,0 +1,105 @@
+from time import monotonic
+from typing import Callable, Optional
+from weakref import WeakKeyDictionary
+
+from textual.app import App
+from textual.timer import Timer
+from textual.widget import Widget
+
+from . import instrumentation
+
+# Tick rate while a subscribed widget is on screen
+FRAME = 1 / 60
+# Tick rate when nothing subscribed is visible, only to notice it being shown again
+IDLE_INTERVAL = 0.25
+
+_clocks: "WeakKeyDictionary[App, Clock]" = WeakKeyDictionary()
+
+
+class _Subscription:
+    __slots__ = ("callback", "hidden_interval", "last_tick")
+
+    def __init__(self, callback: Callable[[float], None], hidden_interval: Optional[float]):
+        self.callback = callback
+        self.hidden_interval = hidden_interval
+        self.last_tick = 0.0
+
+
+class Clock:
+    """
+    One timer per app driving every running stopwatch and countdown.
+    Subscribers get callback(now) once per frame while they are on screen. Hidden
+    ones are ticked every `hidden_interval` seconds, or not at all when it is None,
+    and the clock slows down to the rate the visible subscribers need.
+    """
+
+    def __init__(self, app: App):
+        self.app = app
+        self.subscriptions: dict[Widget, _Subscription] = {}
+        self._timer: Optional[Timer] = None
+        self._interval: Optional[float] = None
+        # Last call from the interval timer, for measuring how late the next one is
+        self._last_timer_call: Optional[float] = None
+
+    @classmethod
+    def for_app(cls, app: App) -> "Clock":
+        clock = _clocks.get(app)
+        if clock is None:
+            clock = _clocks[app] = cls(app)
+        return clock
+
+    def subscribe(
+        self,
+        owner: Widget,
+        callback: Callable[[float], None],
+        hidden_interval: Optional[float] = None,
+    ) -> None:
+        self.subscriptions[owner] = _Subscription(callback, hidden_interval)
+        self.wake()
+
+    def unsubscribe(self, owner: Widget) -> None:
+        self.subscriptions.pop(owner, None)
+        if not self.subscriptions:
+            self._set_interval(None)
+
+    def wake(self) -> None:
+        """Ticks now and picks the rate again, e.g. when a subscriber is shown."""
+        if self.subscriptions:
+            self.tick()
+
+    def tick(self) -> None:
+        now = monotonic()
+        interval = IDLE_INTERVAL
+        for owner, subscription in list(self.subscriptions.items()):
+            if not owner.is_attached:
+                del self.subscriptions[owner]
+                continue
+            if owner.screen.is_current and owner.is_on_screen:
+                interval = FRAME
+            elif subscription.hidden_interval is None:
+                continue
+            else:
+                interval = min(interval, subscription.hidden_interval)
+                if now - subscription.last_tick < subscription.hidden_interval:
+                    continue
+            subscription.last_tick = now
+            subscription.callback(now)
+        self._set_interval(interval if self.subscriptions else None)
+
+    def _timer_tick(self) -> None:
+        now = monotonic()
+        if instrumentation.ENABLED and self._last_timer_call is not None:
+            instrumentation.record("clock/lateness", now - self._last_timer_call - self._interval)
+        self._last_timer_call = now
+        self.tick()
+
+    def _set_interval(self, interval: Optional[float]) -> None:
+        if interval == self._interval:
+            return
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        self._interval = interval
+        self._last_timer_call = None
+        if interval is not None:
+            self._timer = self.app.set_interval(interval, self._timer_tick, name="clock")
@@ -0,0 +1,82 @@
+"""
+Reading gzip, bzip2, xz and zstd files as a stream of decompressed bytes.
+The format is detected from the first bytes of the file, not its name. zstd
+needs either Python 3.14's compression.zstd or the zstandard package.
+"""
+import bz2
+import gzip
+import lzma
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "bzip2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+EXTENSIONS = {".gz": "gzip", ".bz2": "bzip2", ".xz": "xz", ".zst": "zstd"}
+
+# Raised for broken or truncated archives, on top of OSError
+ERRORS: tuple[type[Exception], ...] = (EOFError, lzma.LZMAError)
+if zstd is not None:
+    ERRORS += (zstd.ZstdError,)
+if zstandard is not None:
+    ERRORS += (zstandard.ZstdError,)
+
+
+class UnsupportedCompression(OSError):
+    """The file is compressed with a format this Python can't decompress."""
+
+
+def detect(head: bytes) -> Optional[str]:
+    """Compression format of a file starting with `head`, None for plain files."""
+    for name, magic in MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def detect_file(file_path: str) -> Optional[str]:
+    with open(file_path, "rb") as f:
+        return detect(f.read(6))
+
+
+def _decompressor(name: str, raw: BinaryIO) -> BinaryIO:
+    if name == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if name == "bzip2":
+        return bz2.BZ2File(raw, "rb")
+    if name == "xz":
+        return lzma.LZMAFile(raw, "rb")
+    if zstd is not None:
+        return zstd.ZstdFile(raw, "rb")
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    raise UnsupportedCompression(f"{raw.name}: zstd files need Python 3.14+ or the zstandard package")
+
+
+@contextmanager
+def open_stream(file_path: str) -> Iterator[tuple[BinaryIO, BinaryIO]]:
+    """
+    (raw, stream): read() the decompressed bytes from stream, raw.tell() is how far
+    into the file on disk the decompressor got. Both are the same file when it is
+    not compressed. The decompressors only buffer a block at a time.
+    """
+    with open(file_path, "rb") as raw:
+        name = detect(raw.read(6))
+        raw.seek(0)
+        if name is None:
+            yield raw, raw
+            return
+        with _decompressor(name, raw) as stream:
+            yield raw, stream
@@ -0,0 +1,81 @@
+from textual import on
+from textual.app import ComposeResult
+from textual.containers import Container, HorizontalGroup
+from textual.widgets import Button, DataTable, Label, Log
+
+from . import instrumentation
+
+# Seconds between refreshes while the tab is visible
+REFRESH_INTERVAL = 1.0
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:,.3f}"
+
+
+class DevPanel(Container):
+    """
+    Dev tab: timing histograms and the trace messages recorded by the
+    instrumentation module, refreshed only while the tab is visible.
+    """
+
+    def compose(self) -> ComposeResult:
+        with HorizontalGroup(id="dev-toolbar"):
+            yield Button("Dump JSON", id="dev-dump", variant="primary")
+            yield Button("Reset", id="dev-reset")
+            yield Label(id="dev-status")
+        yield DataTable(id="dev-histograms", cursor_type="row")
+        yield Log(id="dev-events", max_lines=instrumentation.EVENT_BUFFER)
+
+    def on_mount(self) -> None:
+        table = self.query_one("#dev-histograms", DataTable)
+        table.add_columns("Name", "Count", "Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms")
+        # Number of the last trace event written to the log
+        self.last_event = -1
+        self.refresh_timer = self.set_interval(REFRESH_INTERVAL, self.refresh_stats, pause=True)
+
+    def on_show(self) -> None:
+        self.refresh_stats()
+        self.refresh_timer.resume()
+
+    def on_hide(self) -> None:
+        self.refresh_timer.pause()
+
+    def refresh_stats(self) -> None:
+        table = self.query_one("#dev-histograms", DataTable)
+        table.clear()
+        for name, summary in instrumentation.summaries().items():
+            if not summary["count"]:
+                continue
+            table.add_row(
+                name,
+                f"{summary['count']:,}",
+                *(_ms(summary[key]) for key in ("mean", "p50", "p95", "p99", "max")),
+            )
+
+        log = self.query_one("#dev-events", Log)
+        for number, _, channel, message in instrumentation.recent_events(self.last_event):
+            log.write_line(f"[{channel}] {message}")
+            self.last_event = number
+
+        dropped = instrumentation.dropped()
+        if dropped:
+            self.query_one("#dev-status", Label).update(
+                "Dropped: " + ", ".join(f"{channel} {count}" for channel, count in dropped.items())
+            )
+
+    @on(Button.Pressed, "#dev-dump")
+    def dump(self) -> None:
+        try:
+            path = instrumentation.dump()
+        except OSError as e:
+            self.notify(f"Could not save the profile: {e}", severity="error")
+            return
+        self.notify(f"Profile saved to {path}")
+
+    @on(Button.Pressed, "#dev-reset")
+    def reset(self) -> None:
+        instrumentation.reset()
+        self.query_one("#dev-events", Log).clear()
+        self.query_one("#dev-status", Label).update("")
+        self.refresh_stats()
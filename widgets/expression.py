@@ -0,0 +1,281 @@
+"""
+Expression engine for the calculator.
+
+Expressions are parsed once into postfix bytecode and cached by their source string,
+so re-evaluating the same formula (or the same formula with other variables) skips
+the parser. Expressions are evaluated with Decimal unless another numeric
+backend is passed (see numeric.py).
+
+    >>> evaluate("2 * (3 + 4) ^ 2 - 50%")
+    Decimal('97.5')
+    >>> evaluate_many(["1 + 1", "x * 2"], {"x": Decimal(21)})
+    [Decimal('2'), Decimal('42')]
+    >>> evaluate("1 / 3", backend=FRACTION)
+    Fraction(1, 3)
+"""
+import math
+import re
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+from functools import lru_cache
+from typing import Iterable, Mapping, Optional
+
+from .numeric import DECIMAL, FRACTION, DecimalBackend, NumericBackend, Number
+
+# Compiled expressions kept in the cache
+CACHE_SIZE = 1024
+# Digits an exact power may have: bigger ones take seconds (or forever) to compute,
+# and Python won't turn more than 4300 digits into a string anyway
+MAX_EXACT_DIGITS = 4000
+
+# Instruction opcodes
+PUSH_CONST = 0
+PUSH_NAME = 1
+ADD = 2
+SUB = 3
+MUL = 4
+DIV = 5
+POW = 6
+NEG = 7
+PERCENT = 8
+
+BINARY_OPS = {"+": ADD, "-": SUB, "*": MUL, "/": DIV, "^": POW}
+# Precedence and right-associativity of binary operators, unary minus sits between * and ^
+PRECEDENCE = {ADD: 1, SUB: 1, MUL: 2, DIV: 2, POW: 4}
+UNARY_PRECEDENCE = 3
+RIGHT_ASSOCIATIVE = {POW}
+
+# Symbols the calculator buttons and keyboards use for the same operators
+SYMBOLS = {"×": "*", "÷": "/", "**": "^", "−": "-"}
+
+WHITESPACE = re.compile(r"\s*")
+TOKEN = re.compile(
+    r"(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[A-Za-z_]\w*)"
+    r"|(?P<op>\*\*|[-+*/^%()×÷−])"
+)
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that can't be parsed or evaluated."""
+
+    def __init__(self, message: str, position: Optional[int] = None):
+        self.position = position
+        if position is not None:
+            message = f"{message} (at {position + 1})"
+        super().__init__(message)
+
+
+def tokenize(source: str) -> list[tuple[str, str, int]]:
+    """(kind, text, position) tuples, kind is 'number', 'name' or 'op'."""
+    tokens = []
+    position = WHITESPACE.match(source).end()
+    while position < len(source):
+        match = TOKEN.match(source, position)
+        if match is None:
+            raise ExpressionError(f"Unexpected character {source[position]!r}", position)
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "op":
+            text = SYMBOLS.get(text, text)
+        tokens.append((kind, text, position))
+        position = WHITESPACE.match(source, match.end()).end()
+    return tokens
+
+
+def check_exact_power(base: Fraction, exponent: Number, source: str) -> None:
+    """ExpressionError when an integer power of a Fraction would have too many digits."""
+    if isinstance(exponent, float) or exponent != int(exponent):
+        # Not exact, computed as a float
+        return
+    digits = abs(exponent) * math.log10(max(abs(base.numerator), base.denominator))
+    if digits > MAX_EXACT_DIGITS:
+        raise ExpressionError(f"Cannot evaluate {source!r}: result over {MAX_EXACT_DIGITS} digits")
+
+
+class Program:
+    """A compiled expression: postfix instructions for a small stack machine."""
+
+    __slots__ = ("source", "code", "names", "_converted")
+
+    def __init__(self, source: str, code: tuple, names: frozenset):
+        self.source = source
+        self.code = code
+        self.names = names
+        # Code with the constants converted for each other backend kind
+        self._converted: dict[str, tuple] = {}
+
+    def __repr__(self) -> str:
+        return f"Program({self.source!r})"
+
+    def code_for(self, backend: NumericBackend) -> tuple:
+        if backend.kind == DECIMAL.kind:
+            return self.code
+        code = self._converted.get(backend.kind)
+        if code is None:
+            code = self._converted[backend.kind] = tuple(
+                (op, backend.number(arg) if op == PUSH_CONST else arg) for op, arg in self.code
+            )
+        return code
+
+    def evaluate(
+        self,
+        variables: Optional[Mapping[str, Number]] = None,
+        backend: NumericBackend = DECIMAL,
+    ) -> Number:
+        """Runs the code with `backend`'s numbers, call it inside backend.context()."""
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        number = backend.number
+        try:
+            for op, arg in self.code_for(backend):
+                if op == PUSH_CONST:
+                    push(arg)
+                elif op == PUSH_NAME:
+                    if variables is None or arg not in variables:
+                        raise ExpressionError(f"Unknown variable {arg!r}")
+                    push(number(variables[arg]))
+                elif op == NEG:
+                    stack[-1] = -stack[-1]
+                elif op == PERCENT:
+                    stack[-1] = stack[-1] / 100
+                else:
+                    right = pop()
+                    left = stack[-1]
+                    if op == ADD:
+                        stack[-1] = left + right
+                    elif op == SUB:
+                        stack[-1] = left - right
+                    elif op == MUL:
+                        stack[-1] = left * right
+                    elif op == DIV:
+                        stack[-1] = left / right
+                    else:
+                        if isinstance(left, Fraction):
+                            check_exact_power(left, right, self.source)
+                        stack[-1] = left ** right
+        except (ArithmeticError, InvalidOperation) as e:
+            raise ExpressionError(f"Cannot evaluate {self.source!r}: {type(e).__name__}") from e
+        if isinstance(stack[0], complex):
+            # A float power of a negative float
+            raise ExpressionError(f"Cannot evaluate {self.source!r}: complex result")
+        result = stack[0]
+        # 0 ^ -1 is Infinity for Decimal (it raises for the other backends), float overflows to inf.
+        # Not math.isfinite(): it turns a Decimal or Fraction past 1e308 into a float first
+        infinite = result.is_infinite() if isinstance(result, Decimal) else isinstance(result, float) and math.isinf(result)
+        if infinite:
+            raise ExpressionError(f"Cannot evaluate {self.source!r}: infinite result")
+        return result
+
+    def evaluate_bindings(
+        self,
+        bindings: Iterable[Mapping[str, Number]],
+        backend: NumericBackend = DECIMAL,
+    ) -> list[Number]:
+        """Evaluates the same expression once per set of variables."""
+        with backend.context():
+            return [self.evaluate(variables, backend) for variables in bindings]
+
+
+class _Parser:
+    """Precedence-climbing parser emitting postfix code."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.index = 0
+        self.code = []
+        self.names = set()
+
+    def parse(self) -> Program:
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        self.expression(0)
+        if self.index < len(self.tokens):
+            _, text, position = self.tokens[self.index]
+            raise ExpressionError(f"Unexpected {text!r}", position)
+        return Program(self.source, tuple(self.code), frozenset(self.names))
+
+    def peek(self) -> Optional[tuple[str, str, int]]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def expression(self, min_precedence: int) -> None:
+        self.unary()
+        while True:
+            token = self.peek()
+            if token is None or token[0] != "op" or token[1] not in BINARY_OPS:
+                return
+            op = BINARY_OPS[token[1]]
+            precedence = PRECEDENCE[op]
+            if precedence < min_precedence:
+                return
+            self.index += 1
+            self.expression(precedence if op in RIGHT_ASSOCIATIVE else precedence + 1)
+            self.code.append((op, None))
+
+    def unary(self) -> None:
+        token = self.peek()
+        if token is not None and token[0] == "op" and token[1] in "+-":
+            self.index += 1
+            # -2^2 is -(2^2), but 2^-1 works too
+            self.expression(UNARY_PRECEDENCE)
+            if token[1] == "-":
+                self.code.append((NEG, None))
+            return
+        self.postfix()
+
+    def postfix(self) -> None:
+        self.primary()
+        while (token := self.peek()) is not None and token[1] == "%":
+            self.index += 1
+            self.code.append((PERCENT, None))
+
+    def primary(self) -> None:
+        token = self.peek()
+        if token is None:
+            raise ExpressionError("Unexpected end of expression", len(self.source))
+        kind, text, position = token
+        self.index += 1
+        if kind == "number":
+            self.code.append((PUSH_CONST, Decimal(text)))
+        elif kind == "name":
+            self.names.add(text)
+            self.code.append((PUSH_NAME, text))
+        elif text == "(":
+            self.expression(0)
+            closing = self.peek()
+            if closing is None or closing[1] != ")":
+                raise ExpressionError("Missing ')'", position)
+            self.index += 1
+        else:
+            raise ExpressionError(f"Unexpected {text!r}", position)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(source: str) -> Program:
+    """Parses the expression, repeated sources come from the cache."""
+    return _Parser(source).parse()
+
+
+def evaluate(
+    source: str,
+    variables: Optional[Mapping[str, Number]] = None,
+    precision: Optional[int] = None,
+    backend: Optional[NumericBackend] = None,
+) -> Number:
+    """precision is a shortcut for backend=DecimalBackend(precision)."""
+    if backend is None:
+        backend = DECIMAL if precision is None else DecimalBackend(precision)
+    with backend.context():
+        return compile_expression(source).evaluate(variables, backend)
+
+
+def evaluate_many(
+    sources: Iterable[str],
+    variables: Optional[Mapping[str, Number]] = None,
+    backend: NumericBackend = DECIMAL,
+) -> list[Number]:
+    """Evaluates many expressions without touching any widget."""
+    with backend.context():
+        return [compile_expression(source).evaluate(variables, backend) for source in sources]
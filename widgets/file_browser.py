@@ -0,0 +1,298 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+from rich.style import Style
+from rich.text import Text
+from textual.widgets import DirectoryTree
+from textual.widgets.directory_tree import DirEntry
+from textual.widgets.tree import TreeNode
+from textual.worker import get_current_worker
+
+from . import compressed
+from .analysis import AnalysisResult
+from .analysis_cache import AnalysisCache
+from .instrumentation import span
+
+# Directories never worth reading: VCS data, dependencies and build output
+SKIPPED_DIRECTORIES = frozenset({
+    ".git", ".hg", ".svn", ".tox", ".nox", ".venv", "venv", "env", "node_modules",
+    "__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".cache",
+    "build", "dist", "target", ".idea", ".vscode", ".gradle",
+})
+TEXT_EXTENSIONS = frozenset({
+    ".txt", ".text", ".md", ".markdown", ".rst", ".adoc", ".org", ".tex", ".csv", ".tsv",
+    ".log", ".json", ".yaml", ".yml", ".toml", ".ini", ".cfg", ".conf", ".xml", ".html",
+    ".htm", ".srt", ".vtt", ".py", ".js", ".ts", ".c", ".h", ".cpp", ".java", ".go",
+    ".rs", ".sh", ".sql", ".css", ".tcss",
+})
+BINARY_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".pdf", ".zip", ".tar",
+    ".7z", ".rar", ".jar", ".whl", ".exe", ".dll", ".so", ".dylib", ".o", ".a", ".pyc",
+    ".pyo", ".class", ".bin", ".dat", ".db", ".sqlite", ".mp3", ".mp4", ".wav", ".ogg",
+    ".flac", ".avi", ".mkv", ".mov", ".ttf", ".otf", ".woff", ".woff2", ".iso", ".img",
+})
+# Bytes read from files with an unknown extension to decide whether they are text
+SNIFF_BYTES = 2048
+# Entries shown per directory, the number of the others is shown next to it
+MAX_ENTRIES = 2000
+# Directory listings kept in memory
+CACHED_LISTINGS = 512
+# Directories whose file sizes and results the tree keeps for its labels
+DETAILED_DIRECTORIES = 128
+
+
+class Listed(NamedTuple):
+    name: str
+    is_dir: bool
+    size: int
+    mtime_ns: int
+
+
+def looks_like_text(path: str) -> bool:
+    """
+    No NUL bytes and valid UTF-8 (a character cut off at the end is fine),
+    compressed files are checked after decompression.
+    """
+    try:
+        with compressed.open_stream(path) as (_, stream):
+            head = stream.read(SNIFF_BYTES)
+    except (OSError, *compressed.ERRORS):
+        return False
+    if b"\0" in head:
+        return False
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return e.start >= len(head) - 3 and e.reason == "unexpected end of data"
+    return True
+
+
+def is_text_file(path: str, name: str) -> bool:
+    extension = os.path.splitext(name)[1].lower()
+    if extension in compressed.EXTENSIONS:
+        # notes.txt.gz goes by .txt, archive.tar.gz by .tar
+        extension = os.path.splitext(name[: -len(extension)])[1].lower()
+    if extension in TEXT_EXTENSIONS:
+        return True
+    if extension in BINARY_EXTENSIONS:
+        return False
+    return looks_like_text(path)
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+class ListingCache:
+    """
+    Filtered directory listings keyed by path. A listing is reused as long as the
+    directory's mtime has not changed, which happens whenever an entry is added,
+    removed or renamed; file sizes shown from it can lag until then.
+    """
+
+    def __init__(self, max_listings: int = CACHED_LISTINGS):
+        self.max_listings = max_listings
+        self._listings: OrderedDict[str, tuple[int, list[Listed]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, directory: str, mtime_ns: int) -> Optional[list[Listed]]:
+        with self._lock:
+            cached = self._listings.get(directory)
+            if cached is None or cached[0] != mtime_ns:
+                return None
+            self._listings.move_to_end(directory)
+            return cached[1]
+
+    def put(self, directory: str, mtime_ns: int, listing: list[Listed]) -> None:
+        with self._lock:
+            self._listings[directory] = (mtime_ns, listing)
+            self._listings.move_to_end(directory)
+            while len(self._listings) > self.max_listings:
+                self._listings.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._listings.clear()
+
+
+def list_directory(directory: str, cancelled=lambda: False) -> list[Listed]:
+    """Subdirectories and likely-text files, directories first, both sorted by name."""
+    listing = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if cancelled():
+                    break
+                try:
+                    if entry.is_dir():
+                        if entry.name not in SKIPPED_DIRECTORIES:
+                            listing.append(Listed(entry.name, True, 0, 0))
+                    elif entry.is_file() and is_text_file(entry.path, entry.name):
+                        stat = entry.stat()
+                        listing.append(Listed(entry.name, False, stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    listing.sort(key=lambda listed: (not listed.is_dir, listed.name.lower()))
+    return listing
+
+
+def walk_text_files(directory: str, limit: int, cancelled=lambda: False) -> list[str]:
+    """
+    Likely-text files in the directory and below it, as list_directory() filters
+    them, in tree order. Stops after limit + 1 files, so a caller can tell there are more.
+    """
+    files = []
+    pending = [directory]
+    while pending and len(files) <= limit and not cancelled():
+        current = pending.pop()
+        listing = list_directory(current, cancelled)
+        files.extend(os.path.join(current, listed.name) for listed in listing if not listed.is_dir)
+        # Reversed, so subdirectories are visited in name order
+        pending.extend(os.path.join(current, listed.name) for listed in reversed(listing) if listed.is_dir)
+    return files[: limit + 1]
+
+
+class FileDetails(NamedTuple):
+    size: int
+    result: Optional[AnalysisResult]
+
+
+class DirectoryDetails(NamedTuple):
+    files: dict[str, FileDetails]
+    # Entries past MAX_ENTRIES that are not shown
+    hidden: int
+    subdirectories: frozenset[str]
+
+
+NO_DETAILS = DirectoryDetails({}, 0, frozenset())
+
+
+class TextFileTree(DirectoryTree):
+    """
+    DirectoryTree for the reading tab: listing, type checks and sniffing all run in
+    the loader thread (in filter_paths), listings are cached until the directory
+    changes, only likely-text files are shown, and files carry their size plus the
+    word count and ARI when an analysis of them is cached. Whether an entry is a
+    directory comes from the listing too, so adding the nodes stats nothing.
+    """
+
+    listings = ListingCache()
+
+    def __init__(self, path: str | Path, *, cache: Optional[AnalysisCache] = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.cache = cache
+        # Sizes and cached results of the files of the last DETAILED_DIRECTORIES
+        # directories loaded, how many entries each could not show and its subdirectories
+        self.details: OrderedDict[str, DirectoryDetails] = OrderedDict()
+        self._details_lock = threading.Lock()
+
+    def filter_paths(self, paths: Iterable[Path]) -> Iterable[Path]:
+        """Replaces the listing of one directory with the cached, filtered one."""
+        first = next(iter(paths), None)
+        if first is None:
+            return []
+        directory = str(first.parent)
+        worker = get_current_worker()
+        with span("reading/list_directory"):
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                return []
+            listing = self.listings.get(directory, mtime_ns)
+            if listing is None:
+                listing = list_directory(directory, lambda: worker.is_cancelled)
+                if worker.is_cancelled:
+                    return []
+                self.listings.put(directory, mtime_ns, listing)
+
+        shown = listing[:MAX_ENTRIES]
+        files = {}
+        subdirectories = []
+        for listed in shown:
+            if listed.is_dir:
+                subdirectories.append(listed.name)
+            else:
+                path = os.path.join(directory, listed.name)
+                result = self.cache.peek((path, listed.size, listed.mtime_ns)) if self.cache is not None else None
+                files[listed.name] = FileDetails(listed.size, result)
+        with self._details_lock:
+            self.details[directory] = DirectoryDetails(files, len(listing) - len(shown), frozenset(subdirectories))
+            self.details.move_to_end(directory)
+            while len(self.details) > DETAILED_DIRECTORIES:
+                self.details.popitem(last=False)
+        return [self.PATH(os.path.join(directory, listed.name)) for listed in shown]
+
+    def _safe_is_dir(self, path: Path) -> bool:
+        """
+        Looked up in the listing filter_paths() made, DirectoryTree would stat every
+        entry on the UI thread when it adds the nodes (and once more to sort them).
+        """
+        directory, name = os.path.split(str(path))
+        with self._details_lock:
+            details = self.details.get(directory)
+        if details is None:
+            # Not listed by this tree (the root) or no longer remembered
+            return super()._safe_is_dir(path)
+        return name in details.subdirectories
+    def directory_node(self, directory: str) -> Optional[TreeNode[DirEntry]]:
+        """The node of a directory (given as a resolved path) if it is in the tree."""
+        try:
+            parts = Path(directory).relative_to(self.root.data.path.expanduser().resolve()).parts
+        except ValueError:
+            return None
+        node = self.root
+        for part in parts:
+            node = next((child for child in node.children if child.data and child.data.path.name == part), None)
+            if node is None:
+                return None
+        return node
+
+    def annotate(self, file_path: str, result: AnalysisResult) -> None:
+        """Shows the results of a finished analysis next to the file."""
+        self.annotate_many([(file_path, result)])
+
+    def annotate_many(self, results: Iterable[tuple[str, AnalysisResult]]) -> None:
+        by_directory: dict[str, dict[str, AnalysisResult]] = {}
+        for file_path, result in results:
+            directory, name = os.path.split(os.path.realpath(file_path))
+            by_directory.setdefault(directory, {})[name] = result
+        for directory, named in by_directory.items():
+            with self._details_lock:
+                files = self.details.get(directory, NO_DETAILS).files
+                for name, result in named.items():
+                    if name in files:
+                        files[name] = files[name]._replace(result=result)
+            node = self.directory_node(directory)
+            if node is not None:
+                for child in node.children:
+                    if child.data and child.data.path.name in named:
+                        child.refresh()
+
+    def render_label(self, node: TreeNode[DirEntry], base_style: Style, style: Style) -> Text:
+        label = super().render_label(node, base_style, style)
+        if node.data is None:
+            return label
+        # Only the root's path is not resolved already
+        path = str(node.data.path.expanduser().resolve() if node is self.root else node.data.path)
+        if node.allow_expand:
+            hidden = self.details.get(path, NO_DETAILS).hidden
+            if hidden:
+                label.append(f"  … {hidden:,} more not shown", style="dim")
+            return label
+        directory, name = os.path.split(path)
+        details = self.details.get(directory, NO_DETAILS).files.get(name)
+        if details is None:
+            return label
+        text = format_size(details.size)
+        if details.result is not None:
+            text += f" · {details.result.word_count:,} words · ARI {details.result.ari:.1f}"
+        label.append(f"  {text}", style="dim")
+        return label
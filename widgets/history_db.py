@@ -0,0 +1,206 @@
+import os
+import queue
+import sqlite3
+import threading
+from time import monotonic
+from typing import Optional
+
+from textual import log
+
+from .history_store import HistoryEntry, Number
+from .numeric import parse_number
+
+# Environment variable with the database path, persistence is off without it
+HISTORY_DB_ENV = "KALKULATOR_HISTORY_DB"
+# The writer commits at least this often while calculations keep coming
+FLUSH_INTERVAL = 0.5
+# Most rows written in one transaction
+BATCH_SIZE = 1000
+# Seconds flush() waits for the writer by default
+FLUSH_TIMEOUT = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    left TEXT,
+    operator TEXT NOT NULL,
+    right TEXT,
+    result TEXT NOT NULL,
+    source TEXT,
+    backend TEXT NOT NULL DEFAULT 'decimal'
+)
+"""
+
+_STOP = object()
+
+
+def _number(value: Optional[str]) -> Optional[Number]:
+    return None if value is None else parse_number(value)
+
+
+class HistoryDatabase:
+    """
+    Calculator history persisted to SQLite (WAL mode).
+    add() only puts the entry on a queue; a writer thread commits the queue in
+    batches, so the UI never waits for the disk. Reads use their own connection
+    and can run in worker threads while the writer is busy.
+    Rows are stored under their sequence number; when another app instance sharing
+    the file has taken those ids, the batch is added after its rows instead.
+    A batch that fails to commit (locked or read-only file, full disk) is logged
+    and dropped, the writer carries on with the next one.
+    """
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL, batch_size: int = BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(SCHEMA)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(calculations)")}
+            if "backend" not in columns:
+                # Databases from before numeric backends, all of those rows were Decimal
+                connection.execute("ALTER TABLE calculations ADD COLUMN backend TEXT NOT NULL DEFAULT 'decimal'")
+        self._reader = self._connect(check_same_thread=False)
+        self._reader_lock = threading.Lock()
+        # Entries are stored under their sequence number, new ones continue after the last row
+        last_id = self._reader.execute("SELECT MAX(id) FROM calculations").fetchone()[0]
+        self.next_id = 0 if last_id is None else last_id + 1
+        # Last error of the writer, rows of failed batches are not stored
+        self.last_error: Optional[sqlite3.Error] = None
+        self.failed_rows = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="history-db-writer", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def from_environment(cls) -> Optional["HistoryDatabase"]:
+        path = os.environ.get(HISTORY_DB_ENV)
+        return cls(path) if path else None
+
+    def add(self, entry: HistoryEntry) -> None:
+        """Queues the entry for writing under its sequence number, never blocks."""
+        self.next_id = entry.sequence + 1
+        self._queue.put_nowait((
+            entry.sequence,
+            entry.timestamp,
+            None if entry.left is None else str(entry.left),
+            entry.operator,
+            None if entry.right is None else str(entry.right),
+            str(entry.result),
+            entry.source,
+            entry.backend,
+        ))
+
+    def flush(self, timeout: Optional[float] = FLUSH_TIMEOUT) -> bool:
+        """
+        Waits until everything queued so far has been written (or has failed to be),
+        False when the writer did not get there within `timeout` seconds.
+        """
+        if not self._writer.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put_nowait(done)
+        return done.wait(timeout)
+
+    def count(self) -> int:
+        with self._reader_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM calculations").fetchone()[0]
+
+    def newest_id(self) -> int:
+        """Id of the newest stored row, -1 for an empty table."""
+        with self._reader_lock:
+            last_id = self._reader.execute("SELECT MAX(id) FROM calculations").fetchone()[0]
+        return -1 if last_id is None else last_id
+
+    def rows(self, offset: int, limit: int) -> list[HistoryEntry]:
+        """
+        `limit` entries, oldest first, skipping the `offset` oldest ones.
+        rows(0, 100) is the first hundred calculations.
+        """
+        with self._reader_lock:
+            rows = self._reader.execute(
+                "SELECT id, timestamp, left, operator, right, result, source, backend FROM calculations "
+                "ORDER BY id LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [
+            HistoryEntry(row_id, timestamp, _number(left), operator, _number(right), parse_number(result), source, backend)
+            for row_id, timestamp, left, operator, right, result, source, backend in rows
+        ]
+
+    def clear(self) -> None:
+        if not self.flush():
+            log.warning(f"History database {self.path}: writer is behind, rows queued now may be kept")
+        with self._reader_lock:
+            with self._reader:
+                self._reader.execute("DELETE FROM calculations")
+
+    def close(self) -> None:
+        self._queue.put_nowait(_STOP)
+        self._writer.join()
+        with self._reader_lock:
+            self._reader.close()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, check_same_thread=check_same_thread)
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        connection.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while True:
+                item = self._queue.get()
+                # Take whatever else arrives until the deadline, up to batch_size rows
+                deadline = monotonic() + self.flush_interval
+                batch = []
+                waiters = []
+                stop = False
+                while True:
+                    if item is _STOP:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if stop or len(batch) >= self.batch_size:
+                        break
+                    # Somebody is waiting for a flush: only take what is queued already
+                    timeout = 0 if waiters else max(0.0, deadline - monotonic())
+                    try:
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                try:
+                    if batch:
+                        self._write(connection, batch)
+                finally:
+                    for waiter in waiters:
+                        waiter.set()
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def _write(self, connection: sqlite3.Connection, batch: list[tuple]) -> None:
+        insert = (
+            "INSERT INTO calculations (id, timestamp, left, operator, right, result, source, backend) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        try:
+            try:
+                with connection:
+                    connection.executemany(insert, batch)
+            except sqlite3.IntegrityError:
+                # The ids are taken by another instance: never overwrite its rows, SQLite picks new ids
+                with connection:
+                    connection.executemany(insert, [(None, *row[1:]) for row in batch])
+        except sqlite3.Error as e:
+            self.last_error = e
+            self.failed_rows += len(batch)
+            log.error(f"History database {self.path}: {len(batch)} rows not saved: {e}")
@@ -0,0 +1,379 @@
+"""
+Search index over the calculator history.
+
+Every calculation is added to a few small indexes when it is recorded:
+
+* operator -> sequence numbers
+* result value -> sequence numbers, in a bucketed sorted list
+* timestamp -> sequence numbers
+* characters, pairs and trigrams of characters in the expression text -> sequence numbers
+
+A query takes its candidates from the most selective index and checks the rest of
+the conditions on those entries only, so nothing walks the whole history.
+
+    index = HistoryIndex(store)        # then index.add(entry) for every new entry
+    index.search(HistoryQuery.parse("op:+ result:10..100 last:1h 5 +"))
+"""
+import re
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import takewhile
+from typing import Iterable, Optional
+
+from .history_store import OP_SYMBOLS, HistoryEntry, HistoryStore
+
+# Largest bucket of the sorted value index before it is split in two
+BUCKET_SIZE = 1000
+# Matches returned by a search when no limit is given
+DEFAULT_LIMIT = 10_000
+# Text postings lists cleared of dropped entries per step of HistoryIndex.sweep()
+SWEEP_POSTINGS = 8
+
+# Operator names accepted by op:, besides the names the calculator stores
+OPERATOR_ALIASES = {symbol: name for name, symbol in OP_SYMBOLS.items()}
+OPERATOR_ALIASES.update({"*": "multiply", "x": "multiply", "/": "divide", "expr": "expression", "=": "expression"})
+
+DURATION = re.compile(r"(\d+(?:\.\d+)?)([smhd])")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def grams(text: str, size: int) -> set[str]:
+    text = text.lower()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class SortedKeys:
+    """
+    Sorted (key, sequence) pairs kept in buckets of at most BUCKET_SIZE, so an insert
+    is a binary search plus a short list insert instead of moving the whole list.
+    """
+
+    def __init__(self):
+        self._buckets: list[list[tuple[float, int]]] = []
+        # Last key of every bucket, for finding the bucket to use
+        self._maxes: list[tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets)
+
+    @property
+    def bucket_count(self) -> int:
+        return len(self._buckets)
+
+    def add(self, key: float, sequence: int) -> None:
+        item = (key, sequence)
+        if not self._buckets:
+            self._buckets.append([item])
+            self._maxes.append(item)
+            return
+        position = min(bisect_left(self._maxes, item), len(self._buckets) - 1)
+        bucket = self._buckets[position]
+        insort(bucket, item)
+        self._maxes[position] = bucket[-1]
+        if len(bucket) > BUCKET_SIZE:
+            half = len(bucket) // 2
+            self._buckets[position:position + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[position:position + 1] = [bucket[half - 1], bucket[-1]]
+
+    def prune(self, position: int, oldest: int) -> int:
+        """
+        Drops sequences below `oldest` from the bucket at `position` (wrapping
+        around), returns the position of the bucket to prune next.
+        """
+        if not self._buckets:
+            return 0
+        position %= len(self._buckets)
+        bucket = [item for item in self._buckets[position] if item[1] >= oldest]
+        if bucket:
+            self._buckets[position] = bucket
+            self._maxes[position] = bucket[-1]
+            return position + 1
+        del self._buckets[position]
+        del self._maxes[position]
+        return position
+
+    def _span(self, low: Optional[float], high: Optional[float]) -> tuple[int, int]:
+        first = 0 if low is None else bisect_left(self._maxes, (low, -1))
+        last = len(self._buckets) if high is None else bisect_right(self._maxes, (high, float("inf"))) + 1
+        return first, min(last, len(self._buckets))
+
+    def estimate(self, low: Optional[float], high: Optional[float]) -> int:
+        """Upper bound of the matches, counted in whole buckets."""
+        first, last = self._span(low, high)
+        return sum(len(bucket) for bucket in self._buckets[first:last])
+
+    def sequences(self, low: Optional[float], high: Optional[float]) -> list[int]:
+        """Sequence numbers with low <= key <= high, in ascending order."""
+        first, last = self._span(low, high)
+        return sorted(
+            sequence
+            for bucket in self._buckets[first:last]
+            for key, sequence in bucket
+            if (low is None or low <= key) and (high is None or key <= high)
+        )
+
+
+@dataclass
+class HistoryQuery:
+    """Conditions of a history search, None means any."""
+
+    operator: Optional[str] = None
+    min_result: Optional[Decimal] = None
+    max_result: Optional[Decimal] = None
+    since: Optional[float] = None
+    until: Optional[float] = None
+    text: Optional[str] = None
+
+    @classmethod
+    def parse(cls, source: str, now: Optional[float] = None) -> "HistoryQuery":
+        """
+        Parses the search bar syntax, words without a prefix search the expression:
+        op:+  result:10..100  result:>5  since:12:30  until:13:00  last:15m
+        """
+        now = time.time() if now is None else now
+        query = cls()
+        words = []
+        for word in source.split():
+            prefix, _, value = word.partition(":")
+            prefix = prefix.lower()
+            if not value or prefix not in ("op", "result", "since", "until", "last"):
+                words.append(word)
+            elif prefix == "op":
+                operator = OPERATOR_ALIASES.get(value.lower(), value.lower())
+                if operator not in OP_SYMBOLS and operator != "expression":
+                    raise ValueError(f"Unknown operator {value!r}")
+                query.operator = operator
+            elif prefix == "result":
+                query.min_result, query.max_result = _parse_range(value)
+            elif prefix == "last":
+                match = DURATION.fullmatch(value.lower())
+                if match is None:
+                    raise ValueError(f"Bad duration {value!r}, use e.g. 30s, 15m, 2h, 1d")
+                query.since = now - float(match.group(1)) * DURATION_UNITS[match.group(2)]
+            else:
+                moment = _parse_clock(value, now)
+                if prefix == "since":
+                    query.since = moment
+                else:
+                    query.until = moment
+        if words:
+            query.text = " ".join(words)
+        return query
+
+    @property
+    def empty(self) -> bool:
+        return self == HistoryQuery()
+
+    def matches(self, entry: HistoryEntry) -> bool:
+        if self.operator is not None and entry.operator != self.operator:
+            return False
+        if self.min_result is not None or self.max_result is not None:
+            try:
+                if self.min_result is not None and entry.result < self.min_result:
+                    return False
+                if self.max_result is not None and entry.result > self.max_result:
+                    return False
+            except InvalidOperation:
+                # NaN results are in no range
+                return False
+        if self.since is not None and entry.timestamp < self.since:
+            return False
+        if self.until is not None and entry.timestamp > self.until:
+            return False
+        if self.text is not None and self.text.lower() not in entry.expression.lower():
+            return False
+        return True
+
+
+def _parse_range(value: str) -> tuple[Optional[Decimal], Optional[Decimal]]:
+    """'1..5', '>=2', '>2', '<5', '<=5' or '3' (exactly)."""
+    try:
+        if ".." in value:
+            low, high = value.split("..", 1)
+            return (Decimal(low) if low else None), (Decimal(high) if high else None)
+        # '>' and '>=' are the same for filtering, results are compared inclusively
+        if value[0] == ">":
+            return Decimal(value.lstrip(">=")), None
+        if value[0] == "<":
+            return None, Decimal(value.lstrip("<="))
+        exact = Decimal(value)
+        return exact, exact
+    except (InvalidOperation, IndexError):
+        raise ValueError(f"Bad result range {value!r}, use e.g. 10..100, >5 or 42") from None
+
+
+def _parse_clock(value: str, now: float) -> float:
+    """HH:MM or HH:MM:SS today."""
+    for clock_format in ("%H:%M", "%H:%M:%S"):
+        try:
+            clock = datetime.strptime(value, clock_format).time()
+        except ValueError:
+            continue
+        return datetime.combine(datetime.fromtimestamp(now).date(), clock).timestamp()
+    raise ValueError(f"Bad time {value!r}, use HH:MM or HH:MM:SS")
+
+
+def _float_key(value) -> Optional[float]:
+    try:
+        key = float(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    # NaN can't be ordered
+    return None if key != key else key
+
+
+class HistoryIndex:
+    """
+    Indexes the entries of a HistoryStore. add() is O(log n); entries the store has
+    already dropped are skipped by searches and swept out a little on every add.
+    """
+
+    def __init__(self, store: HistoryStore):
+        self.store = store
+        self.clear()
+
+    def clear(self) -> None:
+        self._operators: dict[str, array] = {}
+        self._values = SortedKeys()
+        self._times: list[float] = []
+        self._time_sequences: list[int] = []
+        # Whether _time_sequences is still ascending, i.e. the clock never went back
+        self._times_ascending = True
+        self._grams: dict[str, array] = {}
+        # Where sweep() is: text postings and value buckets left in this round,
+        # the next value bucket, and adds until its next step
+        self._sweep_grams: list[str] = []
+        self._sweep_buckets = 0
+        self._sweep_bucket = 0
+        self._sweep_every = 1
+        self._sweep_countdown = 1
+
+    def add(self, entry: HistoryEntry) -> None:
+        sequence = entry.sequence
+        self._operators.setdefault(entry.operator, array("q")).append(sequence)
+
+        key = _float_key(entry.result)
+        if key is not None:
+            self._values.add(key, sequence)
+
+        # Timestamps only go backwards when the system clock is changed
+        if not self._times or entry.timestamp >= self._times[-1]:
+            self._times.append(entry.timestamp)
+            self._time_sequences.append(sequence)
+        else:
+            position = bisect_right(self._times, entry.timestamp)
+            self._times_ascending = False
+            self._times.insert(position, entry.timestamp)
+            self._time_sequences.insert(position, sequence)
+
+        expression = entry.expression
+        for gram in grams(expression, 1) | grams(expression, 2) | grams(expression, 3):
+            self._grams.setdefault(gram, array("q")).append(sequence)
+
+        self.sweep()
+
+    def sweep(self) -> None:
+        """
+        Once the store is full every add drops its oldest entry. Instead of
+        rebuilding the index, adds clear it of dropped entries a step at a time: a
+        few text postings lists or one bucket of the value index per step, paced so
+        that a round through all of them takes about half the store's capacity in
+        adds. The operator and time indexes are cleared at the start of a round.
+        Postings are ascending, so a list is cut with one bisect.
+        """
+        oldest = self.store.next_sequence - len(self.store)
+        if oldest <= 0:
+            return
+        self._sweep_countdown -= 1
+        if self._sweep_countdown > 0:
+            return
+        if not self._sweep_grams and self._sweep_buckets <= 0:
+            for postings in self._operators.values():
+                del postings[:bisect_left(postings, oldest)]
+            if self._times_ascending:
+                stale = bisect_left(self._time_sequences, oldest)
+            else:
+                stale = len(list(takewhile(oldest.__gt__, self._time_sequences)))
+            del self._times[:stale]
+            del self._time_sequences[:stale]
+            self._sweep_grams = list(self._grams)
+            self._sweep_buckets = self._values.bucket_count
+            steps = -(-len(self._sweep_grams) // SWEEP_POSTINGS) + self._sweep_buckets
+            self._sweep_every = max(1, self.store.capacity // 2 // max(1, steps))
+        self._sweep_countdown = self._sweep_every
+
+        if self._sweep_grams:
+            for _ in range(min(SWEEP_POSTINGS, len(self._sweep_grams))):
+                gram = self._sweep_grams.pop()
+                postings = self._grams.get(gram)
+                if postings is None:
+                    continue
+                stale = bisect_left(postings, oldest)
+                if stale == len(postings):
+                    del self._grams[gram]
+                elif stale:
+                    del postings[:stale]
+        else:
+            self._sweep_bucket = self._values.prune(self._sweep_bucket, oldest)
+            self._sweep_buckets -= 1
+
+    def rebuild(self) -> None:
+        entries = list(self.store)
+        self.clear()
+        for entry in entries:
+            self.add(entry)
+
+    def search(self, query: HistoryQuery, limit: Optional[int] = DEFAULT_LIMIT) -> list[HistoryEntry]:
+        """The newest `limit` matching entries, oldest first."""
+        store = self.store
+        oldest = store.next_sequence - len(store)
+        candidates = self._candidates(query)
+        if candidates is None:
+            candidates = range(oldest, store.next_sequence)
+
+        matches = []
+        # Newest first, so a limit stops the search early
+        for position in range(len(candidates) - 1, -1, -1):
+            sequence = candidates[position]
+            if sequence < oldest:
+                break
+            entry = store.by_sequence(sequence)
+            if entry is not None and query.matches(entry):
+                matches.append(entry)
+                if limit is not None and len(matches) >= limit:
+                    break
+        matches.reverse()
+        return matches
+
+    def _candidates(self, query: HistoryQuery) -> Optional[Iterable[int]]:
+        """Ascending sequence numbers from the smallest index that applies, None for all."""
+        options = []
+        if query.operator is not None:
+            operators = self._operators.get(query.operator, ())
+            options.append((len(operators), lambda: operators))
+
+        if query.text is not None:
+            # Every match contains all characters, pairs or trigrams of the text, take the rarest one
+            size = min(3, len(query.text))
+            postings = min((self._grams.get(gram, ()) for gram in grams(query.text, size)), key=len)
+            options.append((len(postings), lambda: postings))
+
+        if query.since is not None or query.until is not None:
+            first = 0 if query.since is None else bisect_left(self._times, query.since)
+            last = len(self._times) if query.until is None else bisect_right(self._times, query.until)
+            # Almost always sorted already, sorting is then linear
+            options.append((max(0, last - first), lambda: sorted(self._time_sequences[first:last])))
+
+        if query.min_result is not None or query.max_result is not None:
+            low = _float_key(query.min_result)
+            high = _float_key(query.max_result)
+            options.append((self._values.estimate(low, high), lambda: self._values.sequences(low, high)))
+
+        if not options:
+            return None
+        _, load = min(options, key=lambda option: option[0])
+        return load()
@@ -0,0 +1,145 @@
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+from typing import Iterator, Optional, Union
+
+# Calculations kept by default before the oldest ones are dropped
+DEFAULT_CAPACITY = 10_000
+
+# Map operator words to symbols
+OP_SYMBOLS = {
+    "plus": "+", "minus": "-", "multiply": "×", "divide": "÷",
+    "plus-minus": "±", "percent": "%"
+}
+
+Number = Union[Decimal, Fraction, int, float]
+
+
+class HistoryEntry:
+    """
+    One calculation. Values are kept raw (epoch seconds, Decimals) and only
+    turned into strings when a row is displayed.
+    """
+
+    __slots__ = ("sequence", "timestamp", "left", "operator", "right", "result", "source", "backend")
+
+    def __init__(
+        self,
+        sequence: int,
+        timestamp: float,
+        left: Optional[Number],
+        operator: str,
+        right: Optional[Number],
+        result: Number,
+        source: Optional[str] = None,
+        backend: str = "decimal",
+    ):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.left = left
+        self.operator = operator
+        self.right = right
+        self.result = result
+        # Typed expressions keep their text instead of left/operator/right
+        self.source = source
+        # NumericBackend.tag of the numbers the result was computed with
+        self.backend = backend
+
+    @property
+    def expression(self) -> str:
+        if self.source is not None:
+            return self.source
+        op_symbol = OP_SYMBOLS.get(self.operator, self.operator)
+        # Format the expression string (e.g., "5 + 5")
+        return f"{self.left} {op_symbol} {self.right}"
+
+    @property
+    def time_text(self) -> str:
+        return datetime.fromtimestamp(self.timestamp).strftime("%H:%M:%S")
+
+    def row(self) -> tuple[str, str, str]:
+        """(time, expression, result) strings for the history table."""
+        result = str(self.result)
+        if self.backend != "decimal":
+            result += f" [{self.backend}]"
+        return self.time_text, self.expression, result
+
+
+class HistoryStore:
+    """
+    Calculator history with a fixed capacity: a ring buffer where appending to a
+    full store overwrites the oldest entry. Appends and indexed reads are O(1);
+    index 0 is the oldest entry still kept, -1 the newest.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, first_sequence: int = 0):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._entries: list[Optional[HistoryEntry]] = [None] * capacity
+        self._start = 0
+        self._length = 0
+        # Sequence number of the next entry
+        self.next_sequence = first_sequence
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> HistoryEntry:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("history index out of range")
+        return self._entries[(self._start + index) % self.capacity]
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        for index in range(self._length):
+            yield self._entries[(self._start + index) % self.capacity]
+
+    def by_sequence(self, sequence: int) -> Optional[HistoryEntry]:
+        """The entry with this sequence number, None once it was dropped."""
+        index = sequence - (self.next_sequence - self._length)
+        if not 0 <= index < self._length:
+            return None
+        return self._entries[(self._start + index) % self.capacity]
+
+    def append(
+        self,
+        left: Optional[Number],
+        operator: str,
+        right: Optional[Number],
+        result: Number,
+        source: Optional[str] = None,
+        timestamp: Optional[float] = None,
+        backend: str = "decimal",
+    ) -> HistoryEntry:
+        entry = HistoryEntry(
+            self.next_sequence,
+            time.time() if timestamp is None else timestamp,
+            left, operator, right, result, source, backend,
+        )
+        if self._length < self.capacity:
+            self._entries[(self._start + self._length) % self.capacity] = entry
+            self._length += 1
+        else:
+            self._entries[self._start] = entry
+            self._start = (self._start + 1) % self.capacity
+        self.next_sequence += 1
+        return entry
+
+    def clear(self) -> None:
+        self._entries = [None] * self.capacity
+        self._start = 0
+        self._length = 0
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes used by the store and the entries in it."""
+        size = sys.getsizeof(self) + sys.getsizeof(self._entries)
+        for entry in self:
+            size += sys.getsizeof(entry)
+            for value in (entry.left, entry.right, entry.result, entry.source):
+                if value is not None:
+                    size += sys.getsizeof(value)
+        return size
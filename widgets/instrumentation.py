@@ -0,0 +1,255 @@
+"""
+Opt-in timing of the app's hot paths.
+
+Enabled with KALKULATOR_PROFILE=1 (or a path ending in .json, the samples are then
+dumped there when the app exits). When it is off, @timed returns the function
+unchanged and span()/trace() return at once, so there is nothing to pay for.
+
+    @timed("calculator/do_math")
+    def _do_math(self): ...
+
+    with span("reading/scan"):
+        scan_file(...)
+
+    trace("calculator", "operator changed to %s", operator)
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from itertools import count
+from time import perf_counter
+from typing import Callable, Optional
+
+from textual import log
+
+PROFILE_ENV = "KALKULATOR_PROFILE"
+ENABLED = os.environ.get(PROFILE_ENV, "") not in ("", "0")
+DUMP_PATH = os.environ.get(PROFILE_ENV) if os.environ.get(PROFILE_ENV, "").endswith(".json") else None
+
+# Sub-buckets per power of two, 3 bits keep every bucket within 12.5% of its values
+SUB_BITS = 3
+# Trace messages kept for the dev tab
+EVENT_BUFFER = 500
+# Trace messages allowed per channel: a burst of TRACE_BURST, then TRACE_RATE per second
+TRACE_RATE = 20.0
+TRACE_BURST = 50
+
+
+# Samples come from worker threads too (analysis, history pages, directory listings)
+# while the dev tab reads them on the UI thread: every change and read of the
+# histograms, events and channels holds it
+_lock = threading.Lock()
+
+
+def _bucket(ns: int) -> int:
+    shift = max(0, ns.bit_length() - SUB_BITS - 1)
+    return (shift << SUB_BITS) + (ns >> shift)
+
+
+def _bucket_bounds(index: int) -> tuple[int, int]:
+    """Smallest and largest nanosecond value falling into the bucket."""
+    if index < 2 << SUB_BITS:
+        return index, index
+    shift = (index >> SUB_BITS) - 1
+    low = (index - (shift << SUB_BITS)) << shift
+    return low, low + (1 << shift) - 1
+
+
+class Histogram:
+    """
+    Log-linear histogram of durations (HDR style): recording is a bit_length and a
+    dict increment, percentiles are read from the buckets.
+    """
+
+    __slots__ = ("count", "total", "minimum", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.minimum = 0
+        self.maximum = 0
+        self.buckets: dict[int, int] = {}
+
+    def record(self, seconds: float) -> None:
+        ns = max(0, int(seconds * 1e9))
+        index = _bucket(ns)
+        with _lock:
+            if not self.count or ns < self.minimum:
+                self.minimum = ns
+            if ns > self.maximum:
+                self.maximum = ns
+            self.count += 1
+            self.total += ns
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, p: float) -> float:
+        """Seconds, within one bucket of the exact value."""
+        with _lock:
+            count, minimum, maximum = self.count, self.minimum, self.maximum
+            buckets = sorted(self.buckets.items())
+        if not count:
+            return 0.0
+        rank = p / 100 * count
+        seen = 0
+        for index, bucket_count in buckets:
+            seen += bucket_count
+            if seen >= rank:
+                low, high = _bucket_bounds(index)
+                middle = (low + high) / 2
+                return min(max(middle, minimum), maximum) / 1e9
+        return maximum / 1e9
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count / 1e9 if self.count else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.minimum / 1e9,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.maximum / 1e9,
+        }
+
+
+class _Channel:
+    """Token bucket of one trace channel."""
+
+    __slots__ = ("tokens", "updated", "dropped")
+
+    def __init__(self):
+        self.tokens = float(TRACE_BURST)
+        self.updated = time.monotonic()
+        self.dropped = 0
+
+
+histograms: dict[str, Histogram] = {}
+# (number, time, channel, message), numbers keep growing when old events are dropped
+events: deque = deque(maxlen=EVENT_BUFFER)
+_event_numbers = count()
+_channels: dict[str, _Channel] = {}
+
+
+def histogram(name: str) -> Histogram:
+    found = histograms.get(name)
+    if found is None:
+        with _lock:
+            found = histograms.setdefault(name, Histogram())
+    return found
+
+
+def record(name: str, seconds: float) -> None:
+    if ENABLED:
+        histogram(name).record(seconds)
+
+
+def timed(name: str) -> Callable:
+    """Decorator recording every call's duration under `name`."""
+
+    def decorate(function: Callable) -> Callable:
+        if not ENABLED:
+            return function
+        samples = histogram(name)
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                samples.record(perf_counter() - started)
+
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def _span(name: str):
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        histogram(name).record(perf_counter() - started)
+
+
+def span(name: str):
+    """Context manager recording the duration of its block under `name`."""
+    return _span(name) if ENABLED else nullcontext()
+
+
+def trace(channel: str, message: str, *args) -> None:
+    """
+    Rate-limited debug message. `message` is only %-formatted with `args` when it
+    is kept, so callers in hot paths don't pay for formatting dropped messages.
+    """
+    if not ENABLED:
+        return
+    now = time.monotonic()
+    with _lock:
+        state = _channels.get(channel)
+        if state is None:
+            state = _channels[channel] = _Channel()
+        state.tokens = min(TRACE_BURST, state.tokens + (now - state.updated) * TRACE_RATE)
+        state.updated = now
+        if state.tokens < 1:
+            state.dropped += 1
+            return
+        state.tokens -= 1
+    text = message % args if args else message
+    with _lock:
+        events.append((next(_event_numbers), time.time(), channel, text))
+    log.debug(f"[{channel}] {text}")
+
+
+def summaries() -> dict[str, dict]:
+    """Histogram.summary() of every histogram, by name."""
+    with _lock:
+        found = sorted(histograms.items())
+    return {name: samples.summary() for name, samples in found}
+
+
+def recent_events(after: int = -1) -> list[tuple]:
+    """(number, time, channel, message) of the events kept, numbered above `after`."""
+    with _lock:
+        return [event for event in events if event[0] > after]
+
+
+def dropped() -> dict[str, int]:
+    with _lock:
+        return {channel: state.dropped for channel, state in _channels.items() if state.dropped}
+
+
+def snapshot() -> dict:
+    return {
+        "histograms": summaries(),
+        "events": [
+            {"time": timestamp, "channel": channel, "message": message}
+            for _, timestamp, channel, message in recent_events()
+        ],
+        "dropped_events": dropped(),
+    }
+
+
+def dump(path: Optional[str] = None) -> str:
+    """Writes snapshot() as JSON, by default to profile-<date>-<time>.json. OSError if it can't."""
+    path = path or DUMP_PATH or time.strftime("profile-%Y%m%d-%H%M%S.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(snapshot(), file, indent=2, ensure_ascii=False)
+    return path
+
+
+def reset() -> None:
+    with _lock:
+        # @timed wrappers keep their Histogram, so empty them in place
+        for samples in histograms.values():
+            samples.__init__()
+        events.clear()
+        _channels.clear()
@@ -0,0 +1,139 @@
+import csv
+import math
+from array import array
+from bisect import insort
+from typing import Optional, TextIO
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate with the P² algorithm (Jain & Chlamtac): five
+    markers are moved towards their ideal positions on every value, so memory and
+    time per value are constant no matter how many values come in.
+    """
+
+    __slots__ = ("p", "heights", "positions", "desired", "increments")
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights: list[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, value: float) -> None:
+        heights = self.heights
+        if len(heights) < 5:
+            # The first five values are kept sorted and used as the markers
+            insort(heights, value)
+            return
+
+        positions = self.positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    @property
+    def value(self) -> Optional[float]:
+        heights = self.heights
+        if not heights:
+            return None
+        if len(heights) < 5:
+            # Exact (nearest rank) while there are too few values for the markers
+            return heights[min(len(heights) - 1, round(self.p * (len(heights) - 1)))]
+        return heights[2]
+
+
+class LapRecorder:
+    """
+    Laps of a stopwatch. Split times are kept in a float64 array and the lap
+    statistics are updated per lap in O(1): count, mean and standard deviation
+    (Welford), min/max and p50/p95 estimates (P²).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        # Stopwatch time at the end of every lap
+        self.splits = array("d")
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.p50 = P2Quantile(0.5)
+        self.p95 = P2Quantile(0.95)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, split: float) -> float:
+        """Ends a lap at stopwatch time `split`, returns how long the lap took."""
+        lap = split - (self.splits[-1] if self.splits else 0.0)
+        self.splits.append(split)
+
+        self.count += 1
+        delta = lap - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (lap - self.mean)
+        self.minimum = min(self.minimum, lap)
+        self.maximum = max(self.maximum, lap)
+        self.p50.add(lap)
+        self.p95.add(lap)
+        return lap
+
+    @property
+    def stddev(self) -> float:
+        """Sample standard deviation, 0 below two laps."""
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def summary(self) -> str:
+        if not self.count:
+            return "No laps"
+        return (
+            f"Laps {self.count}  mean {self.mean:.3f}s  min {self.minimum:.3f}s  max {self.maximum:.3f}s  "
+            f"σ {self.stddev:.3f}s  p50 {self.p50.value:.3f}s  p95 {self.p95.value:.3f}s"
+        )
+
+    def write_csv(self, file: TextIO) -> None:
+        writer = csv.writer(file)
+        writer.writerow(["lap", "lap_seconds", "split_seconds"])
+        previous = 0.0
+        for number, split in enumerate(self.splits, 1):
+            writer.writerow([number, f"{split - previous:.6f}", f"{split:.6f}"])
+            previous = split
@@ -0,0 +1,113 @@
+"""
+Number types the calculator can compute with.
+
+    decimal   Decimal under a local context with the chosen precision and rounding
+    float     binary floats, the fastest and the least exact
+    fraction  fractions.Fraction, exact for + - × ÷ (non-integer powers give a float)
+
+Every backend converts inputs with number() and runs its arithmetic inside
+context(), so the global decimal context is never changed.
+"""
+from contextlib import nullcontext
+from decimal import ROUND_HALF_EVEN, Decimal, localcontext
+from fractions import Fraction
+from typing import ContextManager, Union
+
+Number = Union[Decimal, float, Fraction]
+
+DEFAULT_PRECISION = 28
+MAX_PRECISION = 10_000
+ROUNDINGS = [
+    "ROUND_HALF_EVEN", "ROUND_HALF_UP", "ROUND_HALF_DOWN", "ROUND_UP", "ROUND_DOWN",
+    "ROUND_CEILING", "ROUND_FLOOR", "ROUND_05UP",
+]
+
+
+class NumericBackend:
+    kind = ""
+
+    def number(self, value) -> Number:
+        raise NotImplementedError
+
+    def context(self) -> ContextManager:
+        return nullcontext()
+
+    @property
+    def tag(self) -> str:
+        """Recorded with every calculation, "decimal" for the default settings."""
+        return self.kind
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, NumericBackend) and self.tag == other.tag
+
+    def __hash__(self) -> int:
+        return hash(self.tag)
+
+    def __repr__(self) -> str:
+        return f"<{self.tag}>"
+
+
+class DecimalBackend(NumericBackend):
+    kind = "decimal"
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, rounding: str = ROUND_HALF_EVEN):
+        if not 1 <= precision <= MAX_PRECISION:
+            raise ValueError(f"precision must be between 1 and {MAX_PRECISION}")
+        if rounding not in ROUNDINGS:
+            raise ValueError(f"unknown rounding {rounding!r}")
+        self.precision = precision
+        self.rounding = rounding
+
+    def number(self, value) -> Decimal:
+        if isinstance(value, Fraction):
+            with self.context():
+                return Decimal(value.numerator) / value.denominator
+        # str() keeps 0.1 as 0.1 instead of the float's exact binary value
+        return Decimal(str(value) if isinstance(value, float) else value)
+
+    def context(self) -> ContextManager:
+        return localcontext(prec=self.precision, rounding=self.rounding)
+
+    @property
+    def tag(self) -> str:
+        if self.precision == DEFAULT_PRECISION and self.rounding == ROUND_HALF_EVEN:
+            return self.kind
+        return f"decimal(prec={self.precision}, {self.rounding})"
+
+
+class FloatBackend(NumericBackend):
+    kind = "float"
+
+    def number(self, value) -> float:
+        return float(value)
+
+
+class FractionBackend(NumericBackend):
+    kind = "fraction"
+
+    def number(self, value) -> Fraction:
+        return Fraction(value)
+
+
+DECIMAL = DecimalBackend()
+FLOAT = FloatBackend()
+FRACTION = FractionBackend()
+BACKENDS = {backend.kind: backend for backend in (DECIMAL, FLOAT, FRACTION)}
+
+
+def entry_text(value: Number, precision: int = DEFAULT_PRECISION) -> str:
+    """
+    A number as keypad digits: "0.25" rather than "1/4", "0.000001" rather than
+    "1e-06", so more digits can be typed after it. Fractions are rounded to precision.
+    """
+    if isinstance(value, Fraction):
+        with localcontext(prec=precision):
+            value = Decimal(value.numerator) / value.denominator
+    elif isinstance(value, float):
+        value = Decimal(repr(value))
+    return format(value, "f")
+
+
+def parse_number(text: str) -> Number:
+    """Reads back a stored result: "1/3" is a Fraction, anything else a Decimal."""
+    return Fraction(text) if "/" in text else Decimal(text)
@@ -0,0 +1,146 @@
+import codecs
+import mmap
+import multiprocessing
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import monotonic
+from typing import Callable, Optional
+
+from .analysis import (
+    CHUNK_SIZE,
+    AnalysisCancelled,
+    ScanProgress,
+    SentenceReservoir,
+    StreamingAnalyzer,
+    scan_file,
+)
+from .compressed import detect_file
+
+# Files at least this big are split across processes
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+# Smallest byte range handed to one process
+MIN_RANGE_SIZE = 8 * 1024 * 1024
+# How far past the nominal split point to look for a sentence end
+BOUNDARY_WINDOW = 64 * 1024
+
+SENTENCE_BOUNDARY = re.compile(rb"[.!?][ \t\n\r\f\v]")
+WHITESPACE = re.compile(rb"[ \t\n\r\f\v]")
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (can be fewer than os.cpu_count() in containers)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def should_scan_in_parallel(file_path: str) -> bool:
+    """Big plain files only, a compressed stream can't be split into byte ranges."""
+    return (
+        available_cpus() > 1
+        and os.path.getsize(file_path) >= PARALLEL_THRESHOLD
+        and detect_file(file_path) is None
+    )
+
+
+def split_ranges(buffer, parts: int) -> list[tuple[int, int]]:
+    """
+    Splits the buffer into about `parts` byte ranges.
+    Every range but the first starts on an ASCII whitespace byte, preferably right
+    after a sentence end, so no word or UTF-8 character is cut in half.
+    """
+    size = len(buffer)
+    step = max(MIN_RANGE_SIZE, size // max(parts, 1))
+    ranges = []
+    start = 0
+    while size - start > step:
+        nominal = start + step
+        match = SENTENCE_BOUNDARY.search(buffer, nominal, nominal + BOUNDARY_WINDOW)
+        if match is not None:
+            split = match.start() + 1
+        else:
+            match = WHITESPACE.search(buffer, nominal)
+            if match is None:
+                break
+            split = match.start()
+        ranges.append((start, split))
+        start = split
+    ranges.append((start, size))
+    return ranges
+
+
+def scan_range(
+    file_path: str, start: int, end: int, seed: Optional[int] = None
+) -> StreamingAnalyzer:
+    """Runs in a worker process: analyzes one byte range without finishing it."""
+    analyzer = StreamingAnalyzer(reservoir=SentenceReservoir(seed=seed))
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for offset in range(start, end, CHUNK_SIZE):
+            analyzer.feed(decoder.decode(buffer[offset:min(offset + CHUNK_SIZE, end)]))
+    analyzer.feed(decoder.decode(b"", final=True))
+    # The first sentence of a later range is only the tail of a real sentence
+    if start > 0 and analyzer._head_has_text:
+        analyzer.reservoir.discard(0)
+    return analyzer
+
+
+def scan_file_parallel(
+    file_path: str,
+    analyzer: StreamingAnalyzer,
+    progress: Optional[Callable[[ScanProgress], None]] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+    workers: Optional[int] = None,
+) -> StreamingAnalyzer:
+    """
+    Same result as scan_file, computed over memory-mapped byte ranges in a process pool.
+    The reservoirs of the ranges are combined into a new reservoir on the analyzer;
+    sentences that straddle two ranges are never sampled.
+    """
+    workers = workers or available_cpus()
+    seed = analyzer.reservoir.seed if analyzer.reservoir is not None else None
+    total_bytes = os.path.getsize(file_path)
+    if total_bytes == 0:
+        return scan_file(file_path, analyzer, progress, cancelled)
+
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        # A few ranges per process keep the progress updates flowing
+        ranges = split_ranges(buffer, workers * 4)
+
+    started = monotonic()
+    results = {}
+    bytes_read = 0
+    # spawn: forking a process that runs the UI threads is not safe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context) as pool:
+        futures = {
+            pool.submit(scan_range, file_path, start, end, None if seed is None else seed + index): index
+            for index, (start, end) in enumerate(ranges)
+        }
+        pending = set(futures)
+        while pending:
+            if cancelled is not None and cancelled():
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise AnalysisCancelled(file_path)
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                results[index] = future.result()
+                start, end = ranges[index]
+                bytes_read += end - start
+            if done and progress is not None:
+                words = sum(partial.word_count for partial in results.values())
+                progress(ScanProgress(bytes_read, total_bytes, words, monotonic() - started))
+
+    partials = [results[index] for index in range(len(ranges))]
+    for partial in partials:
+        analyzer.merge(partial)
+    analyzer.finish()
+    if analyzer.reservoir is not None:
+        analyzer.reservoir = SentenceReservoir.combine(
+            [(partial.reservoir, partial.sentence_count) for partial in partials],
+            analyzer.reservoir.size,
+            seed,
+        )
+    return analyzer
@@ -1,18 +1,82 @@
 import math
-import random
-import re
+import os
+from typing import Optional
 
 from textual.app import ComposeResult
 from textual.containers import Container, HorizontalGroup, VerticalGroup
-from textual.widgets import Button, DirectoryTree, Label, Static
-from textual import on
+from textual.widgets import Button, Checkbox, DirectoryTree, Label, Static
+from textual import on, work
+from textual.message import Message
+from textual.worker import get_current_worker
+from rich.markup import escape
 
 
 from textual.screen import ModalScreen
 from textual.widgets import Label, Static, Button
 from textual.containers import Container, Vertical
 
+from . import compressed
+from .analysis import (
+    AnalysisCancelled,
+    AnalysisResult,
+    ScanProgress,
+    SentenceReservoir,
+    StreamingAnalyzer,
+    analyze_text,
+    scan_file,
+)
+from .analysis_cache import AnalysisCache
+from .compressed import detect_file
+from .file_browser import TextFileTree, walk_text_files
+from .instrumentation import span, timed
+from .parallel import scan_file_parallel, should_scan_in_parallel
+from .reading_speed import DEFAULT_WPM, Estimate, ReadingSpeedProfile
 from .stopwatch import Stopwatch
+from .tail import Checkpoints
+
+MB = 1024 * 1024
+PROGRESS_BAR_WIDTH = 30
+# Seconds between checks of a watched file
+WATCH_INTERVAL = 1.0
+# Files estimated at most by "Estimate folder"
+MAX_FOLDER_FILES = 500
+# Lowest Flesch Reading Ease score of each band
+EASE_BANDS = [
+    (90, "Very Easy"),
+    (80, "Easy"),
+    (70, "Fairly Easy"),
+    (60, "Standard"),
+    (50, "Fairly Difficult"),
+    (30, "Difficult"),
+]
+
+
+def grade_name(score: float) -> str:
+    """School grade of a grade-level score (ARI, Coleman-Liau, Flesch-Kincaid, SMOG)."""
+    grade_level = math.ceil(score)
+    if grade_level > 14:
+        return "College"
+    elif grade_level > 12:
+        return "High School"
+    elif grade_level < 1:
+        return "Kindergarten"
+    return f"Grade {grade_level}"
+
+
+def ease_name(score: float) -> str:
+    for lowest, name in EASE_BANDS:
+        if score >= lowest:
+            return name
+    return "Very Confusing"
+
+
+def format_minutes(minutes: float) -> str:
+    if minutes < 1:
+        return "<1 min"
+    if minutes < 60:
+        return f"{minutes:.0f} min"
+    hours, minutes = divmod(round(minutes), 60)
+    return f"{hours} h {minutes:02d} min"
 
 class CalibrationScreen(ModalScreen[float]):
     """Screen to calibrate reading speed using a stopwatch and sample text.
@@ -55,113 +119,335 @@ class CalibrationScreen(ModalScreen[float]):
 
 class FileOperator(VerticalGroup):
     """
-    Handles file loading, ARI calculation, and reading analysis synchronously.
+    Handles file loading, ARI calculation, and reading analysis.
+    Files are scanned in a background thread so the UI keeps running.
     """
+
+    class Progress(Message):
+        """Sent from the analysis worker while a file is being scanned."""
+        def __init__(self, job: int, progress: ScanProgress) -> None:
+            self.job = job
+            self.progress = progress
+            super().__init__()
+
+    # Incremented for every selected file, results of older jobs are dropped
+    job = 0
+    # Shared by all FileOperators, so results survive switching tabs
+    cache = AnalysisCache()
+    checkpoints = Checkpoints()
+    speed = ReadingSpeedProfile.from_environment()
+
     def compose(self):
-        yield DirectoryTree("./", id="file-tree")
+        yield TextFileTree("./", id="file-tree", cache=self.cache)
+        with HorizontalGroup(id="reading-controls"):
+            yield Checkbox("Watch file", id="watch-file")
+            yield Button("Calibrate", id="calibrate", disabled=True)
+            yield Button("Estimate folder", id="estimate-folder")
         yield Static("Select a file to begin...", id="analysis-results")
 
     @on(DirectoryTree.FileSelected)
     def on_file_selected(self, event: DirectoryTree.FileSelected) -> None:
+        self.directory = os.path.dirname(str(event.path))
         self.load_and_process_file(str(event.path))
 
+    @on(DirectoryTree.DirectorySelected)
+    def on_directory_selected(self, event: DirectoryTree.DirectorySelected) -> None:
+        self.directory = str(event.path)
+
+    def on_mount(self) -> None:
+        # Selected file, its (size, mtime) when it was last scanned, and the
+        # latest result and speed to refresh the report with (with the profile's
+        # estimate it came from, None when it was calibrated on this file)
+        self.file_path: Optional[str] = None
+        self.seen: Optional[tuple[int, int]] = None
+        self.result: Optional[AnalysisResult] = None
+        self.wpm: Optional[float] = None
+        self.estimate: Optional[Estimate] = None
+        # ARI of the sample on the calibration screen, the calibration is recorded at it
+        self.sample_ari: Optional[float] = None
+        # Folder for "Estimate folder": the last one selected, or the selected file's
+        self.directory = "./"
+        self.scanning = False
+        self.watching = False
+        self.watch_timer = self.set_interval(WATCH_INTERVAL, self.check_watched, pause=True)
+
+    @on(Checkbox.Changed, "#watch-file")
+    def toggle_watch(self, event: Checkbox.Changed) -> None:
+        self.watching = event.value
+        if event.value:
+            self.watch_timer.resume()
+        else:
+            self.watch_timer.pause()
+
+    @timed("reading/load_and_process_file")
     def load_and_process_file(self, file_path: str) -> None:
         """
-        Reads file in chunks (sync), calculates stats, and triggers calibration.
+        Starts streaming the file in a worker, replacing any analysis still in flight.
         """
-        results_widget = self.query_one("#analysis-results", Static)
-        results_widget.update("Processing file...")
+        self.job += 1
+        self.file_path = file_path
+        self.result = None
+        self.wpm = None
+        self.estimate = None
+        self.query_one("#calibrate", Button).disabled = True
+        self.query_one("#analysis-results", Static).update("Processing file...")
+        self.start_scan(refresh=False)
 
+    def check_watched(self) -> None:
+        """Runs every WATCH_INTERVAL while watching: re-analyzes the file when it changed."""
+        if self.file_path is None or self.scanning:
+            return
         try:
-            full_content = []
-            
-            with open(file_path, "r", encoding="utf-8") as f:
-                while True:
-                    chunk = f.read(4096)
-                    if not chunk:
-                        break
-                    full_content.append(chunk)
-            
-            text = "".join(full_content)
+            stat = os.stat(self.file_path)
+        except OSError:
+            return
+        if (stat.st_size, stat.st_mtime_ns) != self.seen:
+            self.start_scan(refresh=True)
 
-            sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
-            words = text.split()
-            
-            word_count = len(words)
-            sentence_count = len(sentences)
+    def start_scan(self, refresh: bool) -> None:
+        try:
+            stat = os.stat(self.file_path)
+            self.seen = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            self.seen = None
+        self.scanning = True
+        self.run_analysis(self.file_path, self.job, refresh)
 
-            if sentence_count < 5 or word_count < 15:
-                self.notify("File too short (needs 5+ sentences & 15+ words).", severity="error")
-                results_widget.update("Analysis failed: File too short.")
-                return
+    # exclusive=True cancels the previous worker of the group when a new file is picked
+    @work(thread=True, exclusive=True, group="file-analysis")
+    def run_analysis(self, file_path: str, job: int, refresh: bool = False) -> None:
+        worker = get_current_worker()
+        with span("reading/cache_lookup"):
+            result = self.cache.get(file_path)
+        if result is not None:
+            self.app.call_from_thread(self.analysis_finished, job, file_path, result, refresh)
+            return
 
-            char_count = sum(c.isalnum() for c in text)
-            
-            ari_score = 0.0
-            if word_count > 0 and sentence_count > 0:
-                ari_score = (
-                    4.71 * (char_count / word_count) + 
-                    0.5 * (word_count / sentence_count) - 
-                    21.43
+        try:
+            with span("reading/scan"):
+                result = self.scan(
+                    file_path,
+                    # A refresh replaces the report when it is done instead of showing progress
+                    progress=None if refresh else lambda progress: self.post_message(self.Progress(job, progress)),
+                    cancelled=lambda: worker.is_cancelled,
                 )
-                ari_score = max(0, ari_score)
+        except AnalysisCancelled:
+            return
+        except Exception as e:
+            if not worker.is_cancelled:
+                self.app.call_from_thread(self.analysis_failed, job, e)
+            return
 
-            random.shuffle(sentences)
-            
-            sample_text_parts = []
-            current_sample_words = 0
-            
-            for sentence in sentences:
-                s_len = len(sentence.split())
-                
-                if current_sample_words + s_len < 75:
-                    sample_text_parts.append(sentence)
-                    current_sample_words += s_len
-                
-                if current_sample_words >= 15:
-                    break
-            
-            final_sample = ". ".join(sample_text_parts) + "."
+        with span("reading/cache_store"):
+            self.cache.put(file_path, result)
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self.analysis_finished, job, file_path, result, refresh)
 
-            self.app.push_screen(
-                CalibrationScreen(final_sample),
-                lambda wpm: self.analyze_file(word_count, ari_score, wpm)
-            )
+    def scan(self, file_path: str, progress, cancelled) -> AnalysisResult:
+        """
+        Plain files are analyzed through a checkpoint, so a file analyzed before only
+        has its appended bytes read. Compressed files, and big files that are not
+        being watched, are scanned whole (in parallel when it pays off).
+        """
+        checkpoint = self.checkpoints.get(file_path)
+        if checkpoint is None:
+            parallel = should_scan_in_parallel(file_path)
+            if (parallel and not self.watching) or detect_file(file_path):
+                analyzer = StreamingAnalyzer(reservoir=SentenceReservoir())
+                scan = scan_file_parallel if parallel else scan_file
+                scan(file_path, analyzer, progress=progress, cancelled=cancelled)
+                return analyzer.result()
+            checkpoint = self.checkpoints.create(file_path)
+        checkpoint.scan(progress=progress, cancelled=cancelled)
+        return checkpoint.result()
 
-        except Exception as e:
-            self.notify(f"Error processing file: {e}", severity="error")
-            results_widget.update(f"Error: {e}")
+    @on(Progress)
+    def show_progress(self, message: Progress) -> None:
+        if message.job != self.job:
+            return
+        progress = message.progress
+        filled = round(progress.fraction * PROGRESS_BAR_WIDTH)
+        bar = "█" * filled + "░" * (PROGRESS_BAR_WIDTH - filled)
+        self.query_one("#analysis-results", Static).update(
+            f"Processing file... {bar} {progress.fraction:.0%}\n"
+            f"{progress.bytes_read / MB:,.1f} / {progress.total_bytes / MB:,.1f} MB"
+            f" | {progress.word_count:,} words"
+            f" | {progress.bytes_per_second / MB:,.1f} MB/s"
+        )
+
+    def analysis_failed(self, job: int, error: Exception) -> None:
+        if job != self.job:
+            return
+        self.scanning = False
+        self.notify(f"Error processing file: {error}", severity="error")
+        self.query_one("#analysis-results", Static).update(f"Error: {error}")
+
+    def analysis_finished(self, job: int, file_path: str, result: AnalysisResult, refresh: bool = False) -> None:
+        """
+        Checks the stats of a finished scan and reports it with the profile's speed
+        at its ARI, or triggers calibration with a random sample when the profile
+        is not sure about it yet. A refresh of a watched file only updates the report.
+        """
+        self.query_one(TextFileTree).annotate(file_path, result)
+        if job != self.job:
+            return
+        self.scanning = False
+        self.result = result
+        results_widget = self.query_one("#analysis-results", Static)
+
+        if refresh:
+            if self.wpm:
+                self.analyze_file(result, self.wpm, self.estimate)
+            else:
+                results_widget.update(
+                    f"Watching... {result.word_count:,} words | ARI {result.ari:.1f}"
+                    f" | {result.sentence_count:,} sentences"
+                )
+            return
 
-    def analyze_file(self, total_words: int, ari: float, wpm: float) -> None:
+        too_short = result.sentence_count < 5 or result.word_count < 15
+        self.query_one("#calibrate", Button).disabled = too_short
+        estimate = self.speed.estimate(result.ari)
+        if estimate is not None and estimate.confident:
+            self.wpm = estimate.wpm
+            self.estimate = estimate
+            self.analyze_file(result, estimate.wpm, estimate)
+            return
+
+        if too_short:
+            self.notify("File too short (needs 5+ sentences & 15+ words).", severity="error")
+            results_widget.update("Analysis failed: File too short.")
+            return
+        self.calibrate()
+
+    @on(Button.Pressed, "#calibrate")
+    def calibrate(self) -> None:
+        with span("reading/build_sample"):
+            sample = self.result.build_sample()
+        self.sample_ari = analyze_text(sample).ari
+        self.app.push_screen(
+            CalibrationScreen(sample),
+            self.calibrated,
+        )
+
+    def calibrated(self, wpm: float) -> None:
+        if wpm and wpm > 0 and not self.speed.record(self.sample_ari, wpm):
+            self.notify(f"{wpm:.0f} WPM looks like a mistake, it was not added to your profile.", severity="warning")
+        # A watched file may have grown while the calibration screen was up
+        self.wpm = wpm
+        self.estimate = None
+        self.analyze_file(self.result, wpm)
+
+    @timed("reading/analyze_file")
+    def analyze_file(self, result: AnalysisResult, wpm: float, estimate: Optional[Estimate] = None) -> None:
         """
-        Called after calibration completes.
+        Reports the file, read at the calibrated speed or at the profile's estimate.
         """
         if not wpm or wpm <= 0:
             self.query_one("#analysis-results", Static).update("Analysis Cancelled.")
             return
 
-        est_minutes = total_words / wpm
-        
-        grade_level = math.ceil(ari)
-        if grade_level > 14:
-            grade_str = "College"
-        elif grade_level > 12:
-            grade_str = "High School"
-        elif grade_level < 1:
-            grade_str = "Kindergarten"
+        est_minutes = result.word_count / wpm
+        if estimate is None:
+            source = "calibrated"
         else:
-            grade_str = f"Grade {grade_level}"
+            source = f"{estimate.weight:.1f} calibrations at this level, ±{estimate.spread:.0%}"
 
         report = (
             f"## Analysis Complete\n\n"
-            f"**Total Words:** {total_words:,}\n"
-            f"**Readability (ARI):** {ari:.1f} ({grade_str})\n"
-            f"**Your Speed:** {wpm:.0f} WPM\n"
+            f"**Total Words:** {result.word_count:,}\n"
+            f"**Readability (ARI):** {result.ari:.1f} ({grade_name(result.ari)})\n"
+            f"**Coleman-Liau:** {result.coleman_liau:.1f} ({grade_name(result.coleman_liau)})\n"
+            f"**Flesch-Kincaid:** {result.flesch_kincaid:.1f} ({grade_name(result.flesch_kincaid)})\n"
+            f"**SMOG:** {result.smog:.1f} ({grade_name(result.smog)})\n"
+            f"**Flesch Reading Ease:** {result.flesch_reading_ease:.1f} ({ease_name(result.flesch_reading_ease)})\n"
+            f"**Your Speed:** {wpm:.0f} WPM ({source})\n"
             f"**Time to Finish:** {est_minutes:.1f} minutes"
         )
         
         self.query_one("#analysis-results", Static).update(report)
 
+    @on(Button.Pressed, "#estimate-folder")
+    def estimate_folder(self) -> None:
+        """Time to read every text file in the folder and below, without calibrating."""
+        # Takes over the report from the selected file, like selecting another one
+        self.job += 1
+        self.file_path = None
+        self.scanning = False
+        self.query_one("#calibrate", Button).disabled = True
+        self.query_one("#analysis-results", Static).update(f"Estimating {self.directory}...")
+        self.run_folder_estimate(self.directory, self.job)
+
+    @work(thread=True, exclusive=True, group="file-analysis")
+    def run_folder_estimate(self, directory: str, job: int) -> None:
+        worker = get_current_worker()
+        cancelled = lambda: worker.is_cancelled
+        with span("reading/folder_walk"):
+            paths = walk_text_files(directory, MAX_FOLDER_FILES, cancelled)
+        results = []
+        failed = 0
+        for path in paths[:MAX_FOLDER_FILES]:
+            result = self.cache.get(path)
+            if result is None:
+                try:
+                    # The sentence sample goes into the cache too, for a calibration on the file later
+                    analyzer = StreamingAnalyzer(reservoir=SentenceReservoir())
+                    result = scan_file(path, analyzer, cancelled=cancelled).result()
+                except AnalysisCancelled:
+                    return
+                except (OSError, UnicodeDecodeError, *compressed.ERRORS):
+                    failed += 1
+                    continue
+                self.cache.put(path, result)
+            results.append((path, result))
+        if not worker.is_cancelled:
+            truncated = len(paths) > MAX_FOLDER_FILES
+            self.app.call_from_thread(self.folder_estimated, job, directory, results, failed, truncated)
+
+    def folder_estimated(
+        self,
+        job: int,
+        directory: str,
+        results: list[tuple[str, AnalysisResult]],
+        failed: int,
+        truncated: bool,
+    ) -> None:
+        self.query_one(TextFileTree).annotate_many(results)
+        if job != self.job:
+            return
+
+        # Files the profile is not sure about are read at the last calibrated speed (or an average one)
+        fallback = self.wpm if self.wpm and self.estimate is None else DEFAULT_WPM
+        lines = []
+        total_words = 0
+        total_minutes = 0.0
+        uncertain = 0
+        for path, result in results:
+            estimate = self.speed.estimate(result.ari)
+            sure = estimate is not None and estimate.confident
+            wpm = estimate.wpm if sure else fallback
+            minutes = result.word_count / wpm
+            total_words += result.word_count
+            total_minutes += minutes
+            uncertain += not sure
+            lines.append(
+                f"{format_minutes(minutes):>12}{' ' if sure else '*'}"
+                f" | {result.word_count:>9,} words | ARI {result.ari:4.1f} | {escape(os.path.relpath(path, directory))}"
+            )
+
+        report = [
+            f"## {escape(directory)}\n",
+            f"**{len(results):,} files, {total_words:,} words, {format_minutes(total_minutes)} to read**\n",
+            *lines,
+        ]
+        if uncertain:
+            report.append(f"\n* {uncertain:,} at a speed the profile is not sure about, calibrate on one to improve it")
+        if failed:
+            report.append(f"{failed:,} files could not be analyzed")
+        if truncated:
+            report.append(f"Only the first {MAX_FOLDER_FILES:,} files were estimated")
+        self.query_one("#analysis-results", Static).update("\n".join(report))
+
 
 class ReadingPredictor(Container):
     """
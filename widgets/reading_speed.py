@@ -0,0 +1,155 @@
+"""
+The reader's calibrated speed as a function of how hard the text is.
+
+Every calibration is recorded in the bucket of its sample's ARI grade as a
+running mean and variance of WPM. An estimate for a text combines the buckets
+around its grade, nearer ones weighing more, and is confident once enough
+calibrations close to that grade agree. The profile is a small JSON file in
+$XDG_DATA_HOME/kalkulator-python, or wherever KALKULATOR_READING_SPEED points.
+"""
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+SPEED_ENV = "KALKULATOR_READING_SPEED"
+FORMAT_VERSION = 1
+# Average silent reading speed of an adult, when there is nothing better to go by
+DEFAULT_WPM = 238.0
+# Calibrations outside this range are mistakes (or skimming) and are not recorded
+MIN_WPM = 50.0
+MAX_WPM = 1500.0
+LOWEST_GRADE = 1
+HIGHEST_GRADE = 20
+# Calibrations a bucket counts in full, older ones then fade out so the profile follows the reader
+MAX_BUCKET_WEIGHT = 20
+# Standard deviation in ARI grades of the weight given to neighbouring buckets
+KERNEL_WIDTH = 2.0
+# An estimate is confident with this much (distance-weighted) calibration around its grade...
+MIN_CONFIDENT_WEIGHT = 3.0
+# ...that agrees to within this relative standard deviation
+MAX_CONFIDENT_SPREAD = 0.25
+
+
+def default_profile_path() -> Path:
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return Path(base) / "kalkulator-python" / "reading_speed.json"
+
+
+def grade_bucket(ari: float) -> int:
+    return min(HIGHEST_GRADE, max(LOWEST_GRADE, round(ari)))
+
+
+class SpeedBucket:
+    """Exponentially weighted mean and variance of the WPM calibrated at one grade."""
+
+    __slots__ = ("weight", "mean", "variance")
+
+    def __init__(self, weight: float = 0.0, mean: float = 0.0, variance: float = 0.0):
+        self.weight = weight
+        self.mean = mean
+        self.variance = variance
+
+    def record(self, wpm: float) -> None:
+        # 1/n until the bucket is full: the exact mean and (population) variance
+        self.weight = min(self.weight + 1, MAX_BUCKET_WEIGHT)
+        alpha = 1 / self.weight
+        delta = wpm - self.mean
+        self.mean += alpha * delta
+        self.variance = (1 - alpha) * (self.variance + alpha * delta * delta)
+
+
+class Estimate(NamedTuple):
+    wpm: float
+    # Calibrations behind the estimate, the ones at other grades count less
+    weight: float
+    # Relative standard deviation of those calibrations
+    spread: float
+
+    @property
+    def confident(self) -> bool:
+        return self.weight >= MIN_CONFIDENT_WEIGHT and self.spread <= MAX_CONFIDENT_SPREAD
+
+    def minutes(self, word_count: int) -> float:
+        return word_count / self.wpm
+
+
+class ReadingSpeedProfile:
+    """
+    Calibrations by ARI grade, saved after every one of them.
+    A missing or unreadable file is an empty profile. Safe to use from worker threads.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else default_profile_path()
+        self.buckets: dict[int, SpeedBucket] = {}
+        self.calibrations = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def from_environment(cls) -> "ReadingSpeedProfile":
+        path = os.environ.get(SPEED_ENV)
+        return cls(Path(path) if path else None)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+                return
+            buckets = {int(grade): SpeedBucket(*values) for grade, values in data["buckets"].items()}
+            calibrations = int(data["calibrations"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        with self._lock:
+            self.buckets = buckets
+            self.calibrations = calibrations
+
+    def save(self) -> None:
+        with self._lock:
+            data = {
+                "version": FORMAT_VERSION,
+                "calibrations": self.calibrations,
+                "buckets": {
+                    str(grade): [bucket.weight, bucket.mean, bucket.variance]
+                    for grade, bucket in sorted(self.buckets.items())
+                },
+            }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The profile still works for this session
+            pass
+
+    def record(self, ari: float, wpm: float) -> bool:
+        """Adds a calibration on text of this ARI, False when the speed is implausible."""
+        if not MIN_WPM <= wpm <= MAX_WPM:
+            return False
+        with self._lock:
+            self.buckets.setdefault(grade_bucket(ari), SpeedBucket()).record(wpm)
+            self.calibrations += 1
+        self.save()
+        return True
+
+    def estimate(self, ari: float) -> Optional[Estimate]:
+        """Reading speed for text of this ARI, None before the first calibration."""
+        grade = grade_bucket(ari)
+        with self._lock:
+            weighted = [
+                (bucket.weight * math.exp(-0.5 * ((bucket_grade - grade) / KERNEL_WIDTH) ** 2), bucket.mean, bucket.variance)
+                for bucket_grade, bucket in self.buckets.items()
+            ]
+        total = sum(weight for weight, _, _ in weighted)
+        if total <= 0:
+            return None
+        wpm = sum(weight * mean for weight, mean, _ in weighted) / total
+        # Spread within the buckets plus between their means
+        variance = sum(weight * (variance + (mean - wpm) ** 2) for weight, mean, variance in weighted) / total
+        return Estimate(wpm, total, math.sqrt(variance) / wpm)
@@ -0,0 +1,108 @@
+import asyncio
+import heapq
+from itertools import count
+from time import monotonic
+from typing import Callable, Hashable, Optional
+from weakref import WeakKeyDictionary
+
+from textual.app import App
+
+from . import instrumentation
+
+# Cancelled entries allowed in the heap before it is rebuilt without them
+MAX_CANCELLED = 64
+
+_schedulers: "WeakKeyDictionary[App, DeadlineScheduler]" = WeakKeyDictionary()
+
+
+class DeadlineScheduler:
+    """
+    Calls callbacks at absolute monotonic() deadlines.
+    All deadlines sit in one heap and only the earliest one has an event loop
+    timer, so adding, cancelling or firing one of n deadlines is O(log n) and
+    everything that is due runs in a single wake-up.
+    """
+
+    def __init__(self):
+        # [deadline, order, owner, callback], owner is None once cancelled
+        self._heap: list[list] = []
+        self._entries: dict[Hashable, list] = {}
+        self._order = count()
+        self._cancelled = 0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._armed_for: Optional[float] = None
+
+    @classmethod
+    def for_app(cls, app: App) -> "DeadlineScheduler":
+        scheduler = _schedulers.get(app)
+        if scheduler is None:
+            scheduler = _schedulers[app] = cls()
+        return scheduler
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def schedule(self, owner: Hashable, deadline: float, callback: Callable[[], None]) -> None:
+        """Calls callback() at `deadline`, replacing what owner had scheduled before."""
+        self.cancel(owner)
+        entry = [deadline, next(self._order), owner, callback]
+        self._entries[owner] = entry
+        heapq.heappush(self._heap, entry)
+        if self._armed_for is None or deadline < self._armed_for:
+            self._arm()
+
+    def cancel(self, owner: Hashable) -> None:
+        entry = self._entries.pop(owner, None)
+        if entry is None:
+            return
+        entry[2] = None
+        self._cancelled += 1
+        if self._cancelled > MAX_CANCELLED and self._cancelled > len(self._heap) // 2:
+            self._heap = [entry for entry in self._heap if entry[2] is not None]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        if not self._entries:
+            self._disarm()
+
+    def deadline(self, owner: Hashable) -> Optional[float]:
+        entry = self._entries.get(owner)
+        return None if entry is None else entry[0]
+
+    def run_due(self) -> int:
+        """Runs every callback whose deadline has passed, returns how many ran."""
+        now = monotonic()
+        heap = self._heap
+        ran = 0
+        while heap and heap[0][0] <= now:
+            deadline, _, owner, callback = heapq.heappop(heap)
+            if owner is None:
+                self._cancelled -= 1
+                continue
+            del self._entries[owner]
+            instrumentation.record("scheduler/lateness", now - deadline)
+            callback()
+            ran += 1
+        self._arm()
+        return ran
+
+    def _arm(self) -> None:
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+            self._cancelled -= 1
+        self._disarm()
+        if heap:
+            deadline = heap[0][0]
+            self._armed_for = deadline
+            self._handle = asyncio.get_running_loop().call_later(max(0.0, deadline - monotonic()), self._wake)
+
+    def _disarm(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._armed_for = None
+
+    def _wake(self) -> None:
+        self._handle = None
+        self._armed_for = None
+        self.run_due()
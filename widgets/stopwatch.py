@@ -1,11 +1,16 @@
+from datetime import datetime
 from time import monotonic
+from typing import Optional
 
 from textual.app import ComposeResult
 from textual.containers import Container, HorizontalGroup, VerticalGroup
-from textual.widgets import Button, Digits
-from textual.reactive import reactive
+from textual.widgets import Button, Digits, Static
 from textual import on
 
+from .clock import Clock
+from .instrumentation import timed
+from .laps import LapRecorder
+
 class Stopwatch(HorizontalGroup):
     """A stopwatch widget."""
 
@@ -14,7 +19,10 @@ class Stopwatch(HorizontalGroup):
         yield Button("Start", id="timer-start", variant="success")
         yield Button("Stop", id="timer-stop", variant="error")
         yield Button("Reset", id="timer-reset")
+        yield Button("Lap", id="timer-lap")
+        yield Button("CSV", id="timer-export")
         yield Digits("00:00:00.00", id="timer-display")
+        yield Static(id="lap-stats")
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Event handler called when a button is pressed."""
@@ -23,38 +31,96 @@ class Stopwatch(HorizontalGroup):
         elif event.button.id == "stop":
             self.remove_class("started")
     
-    start_time = reactive(monotonic)
-    time = reactive(0.0)
-
     def on_mount(self) -> None:
         """Event handler called when widget is added to the app."""
-        self.update_timer = self.set_interval(1 / 60, self.update_time, pause=True)
+        self.start_time = monotonic()
+        self.time = 0.0
+        self.running = False
+        # Text on the display, it is only updated when this changes
+        self.display_text = "00:00:00.00"
+        self.digits = self.query_one("#timer-display", Digits)
+        self.clock = Clock.for_app(self.app)
+        self.laps = LapRecorder()
+
+    def on_show(self) -> None:
+        # Catch up at once instead of on the clock's next idle tick
+        if self.running:
+            self.clock.wake()
+
+    def on_unmount(self) -> None:
+        self.clock.unsubscribe(self)
 
     @on(Button.Pressed, "#timer-start")
     def start_timer(self) -> None:
+        if self.running:
+            return
+        self.running = True
         self.start_time = monotonic() - self.time
-        self.update_timer.resume()
+        # Nothing to show while the stopwatch is hidden, the time is computed from start_time
+        self.clock.subscribe(self, self.update_time)
 
     @on(Button.Pressed, "#timer-stop")
     def stop_timer(self) -> None:
-        self.update_timer.pause()
+        if self.running:
+            self.update_time()
+            self.running = False
+            self.clock.unsubscribe(self)
 
     @on(Button.Pressed, "#timer-reset")
     def reset_timer(self) -> None:
         self.start_time = monotonic()
         self.time = 0.0
-        
-    def update_time(self) -> None:
-        self.time = monotonic() - self.start_time
+        self.show_time()
+        self.laps.reset()
+        self.query_one("#lap-stats", Static).display = False
 
-    def watch_time(self, time: float) -> None:
-        minutes, seconds = divmod(time, 60)
+    @on(Button.Pressed, "#timer-lap")
+    def lap(self) -> None:
+        if not self.running:
+            return
+        self.update_time()
+        self.laps.record(self.time)
+        stats = self.query_one("#lap-stats", Static)
+        stats.update(self.laps.summary())
+        stats.display = True
+
+    @on(Button.Pressed, "#timer-export")
+    def export_pressed(self) -> None:
+        self.export_laps()
+
+    def export_laps(self, path: Optional[str] = None) -> Optional[str]:
+        """Writes the laps to a CSV file, by default laps-<date>-<time>.csv in the working directory."""
+        if not self.laps:
+            self.notify("No laps to export.", severity="warning")
+            return None
+        path = path or datetime.now().strftime("laps-%Y%m%d-%H%M%S.csv")
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                self.laps.write_csv(file)
+        except OSError as e:
+            self.notify(f"Could not save laps: {e}", severity="error")
+            return None
+        self.notify(f"{len(self.laps)} laps saved to {path}")
+        return path
+
+    @timed("stopwatch/update_time")
+    def update_time(self, now: Optional[float] = None) -> None:
+        self.time = (monotonic() if now is None else now) - self.start_time
+        self.show_time()
+
+    @timed("stopwatch/show_time")
+    def show_time(self) -> None:
+        minutes, seconds = divmod(self.time, 60)
         hours, minutes = divmod(minutes, 60)
-        self.query_one("#timer-display", Digits).update(f"{hours:02,.0f}:{minutes:02.0f}:{seconds:05.2f}")
-    
+        text = f"{hours:02,.0f}:{minutes:02.0f}:{seconds:05.2f}"
+        if text != self.display_text:
+            self.display_text = text
+            self.digits.update(text)
+
     @property
     def elapsed_seconds(self) -> float:
-        return self.time
+        # Not ticked while hidden, so work it out when running
+        return monotonic() - self.start_time if self.running else self.time
 
 
 class StopwatchContainer(Container):
@@ -0,0 +1,120 @@
+import codecs
+import copy
+import os
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Optional
+
+from .analysis import (
+    CHUNK_SIZE,
+    PROGRESS_INTERVAL,
+    AnalysisCancelled,
+    AnalysisResult,
+    ScanProgress,
+    SentenceReservoir,
+    StreamingAnalyzer,
+)
+
+# Bytes at the start of the file remembered to notice it being replaced in place
+HEAD_BYTES = 4096
+# Files whose analysis state is kept
+MAX_CHECKPOINTS = 8
+
+
+class FileCheckpoint:
+    """
+    Unfinished analysis of a plain UTF-8 file up to byte `offset`: the analyzer
+    with its open word, sentence and reservoir, plus the decoder holding a
+    character cut off by the last read. scan() only reads what was appended
+    since; a file that was truncated, replaced (new inode) or rewritten from the
+    start (different first bytes) is scanned again from byte 0.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        # Held while scanning, a cancelled worker may still be finishing its chunk
+        self.lock = threading.Lock()
+        self.rescans = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self.analyzer = StreamingAnalyzer(reservoir=SentenceReservoir())
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.offset = 0
+        self.identity: Optional[tuple[int, int]] = None
+        self.head = b""
+
+    def _replaced(self, stat: os.stat_result, head: bytes) -> bool:
+        return (
+            (stat.st_dev, stat.st_ino) != self.identity
+            or stat.st_size < self.offset
+            or not head.startswith(self.head)
+        )
+
+    def scan(
+        self,
+        progress: Optional[Callable[[ScanProgress], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+    ) -> int:
+        """Folds in the bytes appended since the last scan, returns how many were read."""
+        with self.lock, open(self.file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            head = f.read(HEAD_BYTES)
+            if self.offset and self._replaced(stat, head):
+                self._reset()
+                self.rescans += 1
+            self.identity = (stat.st_dev, stat.st_ino)
+            if len(self.head) < HEAD_BYTES:
+                self.head = head
+
+            f.seek(self.offset)
+            started = last_report = monotonic()
+            read = 0
+            while True:
+                if cancelled is not None and cancelled():
+                    raise AnalysisCancelled(self.file_path)
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                # Offset and state only move together, so a cancelled scan resumes cleanly
+                self.analyzer.feed(self.decoder.decode(chunk))
+                self.offset += len(chunk)
+                read += len(chunk)
+
+                now = monotonic()
+                if progress is not None and now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    progress(ScanProgress(self.offset, stat.st_size, self.analyzer.word_count, now - started))
+            return read
+
+    def result(self) -> AnalysisResult:
+        """Result as if the file ended here, the checkpoint itself stays open."""
+        with self.lock:
+            analyzer = copy.deepcopy(self.analyzer)
+        analyzer.finish()
+        return analyzer.result()
+
+
+class Checkpoints:
+    """The last MAX_CHECKPOINTS files analyzed, by path."""
+
+    def __init__(self, max_checkpoints: int = MAX_CHECKPOINTS):
+        self.max_checkpoints = max_checkpoints
+        self._checkpoints: OrderedDict[str, FileCheckpoint] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str) -> Optional[FileCheckpoint]:
+        with self._lock:
+            checkpoint = self._checkpoints.get(file_path)
+            if checkpoint is not None:
+                self._checkpoints.move_to_end(file_path)
+            return checkpoint
+
+    def create(self, file_path: str) -> FileCheckpoint:
+        with self._lock:
+            checkpoint = self._checkpoints[file_path] = FileCheckpoint(file_path)
+            self._checkpoints.move_to_end(file_path)
+            while len(self._checkpoints) > self.max_checkpoints:
+                self._checkpoints.popitem(last=False)
+            return checkpoint
@@ -1,11 +1,16 @@
-import re
-from textual.app import App, ComposeResult
-from textual.containers import Container, HorizontalGroup, VerticalGroup
-from textual.widgets import Button, Digits, Input, Header, Footer
+from time import monotonic
+
+from textual.app import ComposeResult
+from textual.containers import Container, HorizontalGroup, VerticalScroll
+from textual.widgets import Button, Digits, Input
 from textual.message import Message
 from textual.reactive import reactive
 from textual import on
 
+from .clock import Clock
+from .instrumentation import timed
+from .scheduler import DeadlineScheduler
+
 
 class CountdownTimer(HorizontalGroup):
     """A timer that accepts HH:MM:SS or MM:SS format."""
@@ -25,7 +30,7 @@ class CountdownTimer(HorizontalGroup):
         # 2. Input (Top-Middle) - standard 1x1 size
         yield Input(placeholder="MM:SS", id="countdown-timer-input")
         
-        # 3. Reset (Top-Right) - will span all 4 rows down
+        # 3. Reset (Top-Right) - will span 3 rows down
         yield Button("Reset", id="countdown-timer-reset")
 
         # ROW 2 (Hole Filling):
@@ -36,17 +41,44 @@ class CountdownTimer(HorizontalGroup):
         # 5. Stop (Bottom-Left) - fills the space under 'Start', spans 2 rows
         yield Button("Stop", id="countdown-timer-stop", variant="error")
 
+        # 6. Remove (Bottom-Right) - under 'Reset'
+        yield Button("Remove", id="countdown-timer-remove")
+
     def on_mount(self) -> None:
-        self.tick_timer = self.set_interval(0.1, self.tick, pause=True)
+        # monotonic() time of reaching zero while running, None when stopped
+        self.deadline = None
+        # Text on the display, it is only updated when this changes
+        self.display_text = "00:00:00"
+        self.digits = self.query_one("#countdown-timer-display", Digits)
+        self.clock = Clock.for_app(self.app)
+        self.scheduler = DeadlineScheduler.for_app(self.app)
+        if self.name:
+            self.border_title = self.name
+
+    def on_show(self) -> None:
+        if self.deadline is not None:
+            self.clock.wake()
+
+    def on_unmount(self) -> None:
+        self.clock.unsubscribe(self)
+        self.scheduler.cancel(self)
 
-    def tick(self) -> None:
-        if self.time_remaining > 0:
-            self.time_remaining = max(0, self.time_remaining - 0.1)
-        else:
-            self.tick_timer.pause()
-            self.add_class("expired")
-            self.app.bell() # Native terminal beep
-            self.post_message(self.Expired(self.id or "Timer"))
+    @timed("countdown/tick")
+    def tick(self, now: float) -> None:
+        """Display only, the scheduler takes care of reaching zero."""
+        remaining = max(0.0, self.deadline - now)
+        self.set_reactive(CountdownTimer.time_remaining, remaining)
+        self.show_time(remaining)
+
+    def expire(self) -> None:
+        self.deadline = None
+        self.clock.unsubscribe(self)
+        self.set_reactive(CountdownTimer.time_remaining, 0.0)
+        self.show_time(0.0)
+        # On the display only, a class on the timer restyles every widget in it
+        self.digits.add_class("expired")
+        self.app.bell() # Native terminal beep
+        self.post_message(self.Expired(self.name or self.id or "Timer"))
 
     def parse_time(self, time_str: str) -> float:
         """Converts HH:MM:SS or MM:SS string to total seconds."""
@@ -71,30 +103,64 @@ class CountdownTimer(HorizontalGroup):
 
     @on(Button.Pressed, "#countdown-timer-start")
     def start(self) -> None:
-        if self.time_remaining > 0:
-            self.remove_class("expired")
-            self.tick_timer.resume()
+        if self.time_remaining > 0 and self.deadline is None:
+            self.digits.remove_class("expired")
+            self.deadline = monotonic() + self.time_remaining
+            self.scheduler.schedule(self, self.deadline, self.expire)
+            # Hidden countdowns are not ticked, the scheduler fires expire() anyway
+            self.clock.subscribe(self, self.tick)
 
     @on(Button.Pressed, "#countdown-timer-reset")
     def reset(self) -> None:
-        self.tick_timer.pause()
+        self.deadline = None
+        self.clock.unsubscribe(self)
+        self.scheduler.cancel(self)
         self.time_remaining = 0.0
-        self.remove_class("expired")
+        self.digits.remove_class("expired")
         self.query_one("#countdown-timer-input", Input).value = ""
 
+    @on(Button.Pressed, "#countdown-timer-remove")
+    def remove_timer(self) -> None:
+        self.remove()
+
     @on(Button.Pressed, "#countdown-timer-stop")
     def stop(self) -> None:
-        self.tick_timer.pause()
+        if self.deadline is not None:
+            self.time_remaining = max(0.0, self.deadline - monotonic())
+            self.deadline = None
+            self.clock.unsubscribe(self)
+            self.scheduler.cancel(self)
 
     def watch_time_remaining(self, time: float) -> None:
         """Updates the digital display whenever time_remaining changes."""
+        self.show_time(time)
+
+    def show_time(self, time: float) -> None:
         minutes, seconds = divmod(int(time), 60)
         hours, minutes = divmod(minutes, 60)
-        self.query_one("#countdown-timer-display", Digits).update(f"{hours:02}:{minutes:02}:{seconds:02}")
+        text = f"{hours:02}:{minutes:02}:{seconds:02}"
+        if text != self.display_text:
+            self.display_text = text
+            self.digits.update(text)
 
 class CountdownTimerContainer(Container):
     """
-    Countdown Timer Container logic
+    Countdown Timer Container logic, any number of named timers can be added
     """
     def compose(self) -> ComposeResult:
-        yield VerticalGroup(CountdownTimer())
\ No newline at end of file
+        with HorizontalGroup(id="countdown-toolbar"):
+            yield Input(placeholder="Timer name", id="countdown-name")
+            yield Button("Add timer", id="countdown-add", variant="primary")
+        with VerticalScroll(id="countdown-list"):
+            yield CountdownTimer()
+
+    @on(Input.Submitted, "#countdown-name")
+    @on(Button.Pressed, "#countdown-add")
+    def add_timer(self) -> None:
+        name_input = self.query_one("#countdown-name", Input)
+        timer_list = self.query_one("#countdown-list", VerticalScroll)
+        name = name_input.value.strip() or f"Timer {len(timer_list.children) + 1}"
+        timer = CountdownTimer(name=name)
+        timer_list.mount(timer)
+        timer_list.scroll_to_widget(timer)
+        name_input.value = ""